@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache em Disco da Análise de Pixels
+Guarda o resultado de analyze_image_pixels() (contagens e máscaras empacotadas)
+indexado pelo hash do conteúdo do arquivo e pelos parâmetros do analisador,
+para que importar de novo a mesma imagem pule a decodificação e a análise.
+Ao lado da análise ficam as reduções da imagem para cada tamanho de grade e
+recorte (cinza, visíveis e cobertura, antes da binarização): reabrir a
+importação não refaz a redução, qualquer que seja o modo ou o limiar escolhido.
+
+Formato da análise (little-endian, versionado):
+    cabeçalho: MAGIC, versão do formato, altura, largura, canais,
+               total, coloridos, brancos, transparentes
+    corpo:     máscaras colorida, branca e transparente com np.packbits,
+               concatenadas e comprimidas com zlib
+
+Formato da redução:
+    cabeçalho: SAMPLED_MAGIC, versão do formato, altura, largura, tem cobertura
+    corpo:     cinza (float32), visíveis (np.packbits) e cobertura (float64),
+               concatenados e comprimidos com zlib
+"""
+
+import hashlib
+import os
+import struct
+import tempfile
+import zlib
+
+import numpy as np
+
+MAGIC = b'CASC'
+SAMPLED_MAGIC = b'CASG'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<4sHIIIQQQQ')
+_SAMPLED_HEADER = struct.Struct('<4sHII?')
+
+# Tamanho máximo do diretório de cache; os arquivos menos usados saem primeiro
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Variáveis de ambiente: diretório do cache e desativação (CONVERSOR_ASCII_NO_CACHE=1)
+CACHE_DIR_ENV = 'CONVERSOR_ASCII_CACHE'
+DISABLE_ENV = 'CONVERSOR_ASCII_NO_CACHE'
+
+def cache_enabled():
+    """O cache está ativo a menos que CONVERSOR_ASCII_NO_CACHE esteja definido"""
+    return os.environ.get(DISABLE_ENV, '') in ('', '0')
+
+def cache_dir():
+    """Diretório do cache (CONVERSOR_ASCII_CACHE ou ~/.cache/conversor_ascii)"""
+    path = os.environ.get(CACHE_DIR_ENV)
+    if not path:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        path = os.path.join(base, 'conversor_ascii')
+    return path
+
+def analysis_key(data, params=()):
+    """Chave do cache: SHA-256 do conteúdo do arquivo mais os parâmetros do analisador"""
+    digest = hashlib.sha256(data)
+    digest.update(repr(tuple(params)).encode('utf-8'))
+    return digest.hexdigest()
+
+def sampled_key(key, width, height, crop):
+    """Chave da redução de uma imagem (chave da análise) para width x height com o recorte crop"""
+    return analysis_key(key.encode('ascii'), ('sample', FORMAT_VERSION, width, height, tuple(crop)))
+
+def _entry_path(key):
+    return os.path.join(cache_dir(), f"{key}.bin")
+
+def encode_analysis(height, width, channels, counts, masks):
+    """Serializa (contagens, máscaras) no formato binário do cache"""
+    payload = b''.join(np.packbits(mask.ravel()).tobytes() for mask in masks)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, height, width, channels, *counts)
+    return header + zlib.compress(payload, 6)
+
+def decode_analysis(blob):
+    """
+    Lê um registro do cache. Retorna (altura, largura, canais, contagens, máscaras)
+    ou None se o registro for de outra versão ou estiver corrompido.
+    """
+    if len(blob) < _HEADER.size:
+        return None
+    magic, version, height, width, channels, *counts = _HEADER.unpack_from(blob)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    try:
+        payload = zlib.decompress(blob[_HEADER.size:])
+    except zlib.error:
+        return None
+
+    pixels = height * width
+    packed_size = (pixels + 7) // 8
+    if len(payload) != 3 * packed_size:
+        return None
+    packed = np.frombuffer(payload, dtype=np.uint8).reshape(3, packed_size)
+    masks = tuple(np.unpackbits(row, count=pixels).astype(bool).reshape(height, width) for row in packed)
+    return height, width, channels, tuple(counts), masks
+
+def encode_sampled(gray, visible, coverage=None):
+    """Serializa a redução (cinza, visíveis, cobertura ou None) no formato binário do cache"""
+    height, width = gray.shape
+    payload = gray.astype('<f4').tobytes() + np.packbits(visible.ravel()).tobytes()
+    if coverage is not None:
+        payload += coverage.astype('<f8').tobytes()
+    header = _SAMPLED_HEADER.pack(SAMPLED_MAGIC, FORMAT_VERSION, height, width, coverage is not None)
+    return header + zlib.compress(payload, 6)
+
+def decode_sampled(blob):
+    """Lê uma redução do cache. Retorna (cinza, visíveis, cobertura ou None) ou None se inválida"""
+    if len(blob) < _SAMPLED_HEADER.size:
+        return None
+    magic, version, height, width, has_coverage = _SAMPLED_HEADER.unpack_from(blob)
+    if magic != SAMPLED_MAGIC or version != FORMAT_VERSION:
+        return None
+    try:
+        payload = zlib.decompress(blob[_SAMPLED_HEADER.size:])
+    except zlib.error:
+        return None
+
+    cells = height * width
+    gray_size, visible_size = cells * 4, (cells + 7) // 8
+    if len(payload) != gray_size + visible_size + (cells * 8 if has_coverage else 0):
+        return None
+    gray = np.frombuffer(payload, dtype='<f4', count=cells).astype(np.float32).reshape(height, width)
+    visible = np.unpackbits(np.frombuffer(payload, dtype=np.uint8, count=visible_size, offset=gray_size),
+                            count=cells).astype(bool).reshape(height, width)
+    coverage = None
+    if has_coverage:
+        coverage = np.frombuffer(payload, dtype='<f8', offset=gray_size + visible_size)
+        coverage = coverage.astype(np.float64).reshape(height, width)
+    return gray, visible, coverage
+
+def _load(key, decode):
+    """Lê e decodifica um registro (ou None), marcando-o como usado recentemente"""
+    path = _entry_path(key)
+    try:
+        with open(path, 'rb') as f:
+            blob = f.read()
+    except OSError:
+        return None
+
+    entry = decode(blob)
+    if entry is None:
+        # Registro inválido ou de formato antigo: descartar
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return entry
+
+def load_analysis(key):
+    """Carrega uma análise do cache (ou None)"""
+    return _load(key, decode_analysis)
+
+def load_sampled(key):
+    """Carrega uma redução do cache (ou None)"""
+    return _load(key, decode_sampled)
+
+def save_analysis(key, height, width, channels, counts, masks, max_bytes=DEFAULT_MAX_BYTES):
+    """Grava uma análise no cache"""
+    _save(key, encode_analysis(height, width, channels, counts, masks), max_bytes)
+
+def save_sampled(key, gray, visible, coverage=None, max_bytes=DEFAULT_MAX_BYTES):
+    """Grava uma redução no cache"""
+    _save(key, encode_sampled(gray, visible, coverage), max_bytes)
+
+def _save(key, blob, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Grava um registro no cache (escrita atômica: arquivo temporário + os.replace)
+    e aplica o limite de tamanho. Falhas de disco são ignoradas: o cache é opcional.
+    """
+    directory = cache_dir()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp_path, _entry_path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        evict(max_bytes)
+    except OSError:
+        pass
+
+def evict(max_bytes=DEFAULT_MAX_BYTES):
+    """Remove os registros usados há mais tempo até o cache caber em max_bytes"""
+    directory = cache_dir()
+    entries = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.endswith('.bin') and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except OSError:
+        return
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+def clear_cache():
+    """Apaga todos os registros do cache"""
+    evict(0)
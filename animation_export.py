@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Exportação de Animações com Quadros Deduplicados
+Cada quadro é empacotado no formato XBM (mesmos bytes de converte()); quadros
+com bytes idênticos são gravados uma única vez e uma tabela de índices liga cada
+quadro da animação ao seu bitmap. No dispositivo:
+
+    u8g2.drawXBMP(0, 0, NOME_WIDTH, NOME_HEIGHT, nome_bits[pgm_read_byte(&nome_index[i])]);
+
+Com mais de 256 bitmaps únicos a tabela passa a uint16_t e a leitura vira
+pgm_read_word(&nome_index[i]); o comentário gerado no header já traz a leitura certa.
+"""
+
+from itertools import chain
+
+import numpy as np
+
+from bitmap_export import pack_xbm, c_identifier, format_c_bytes
+
+class FrameDeduplicator:
+    """
+    Deduplica quadros pelos bytes empacotados: o dicionário é indexado pelos
+    próprios bytes (hash + comparação exata, sem risco de colisão).
+    """
+
+    def __init__(self):
+        self.unique = []  # Bytes de cada bitmap único, na ordem em que apareceu
+        self.index = []  # Para cada quadro, a posição do seu bitmap em unique
+        self._positions = {}
+
+    def add(self, packed):
+        """Registra um quadro empacotado. Retorna (posição do bitmap, True se é novo)"""
+        key = bytes(packed)
+        position = self._positions.get(key)
+        is_new = position is None
+        if is_new:
+            position = len(self.unique)
+            self._positions[key] = position
+            self.unique.append(key)
+        self.index.append(position)
+        return position, is_new
+
+def index_type(unique_count):
+    """(tipo C, bytes por entrada) da tabela de índices"""
+    return ('uint8_t', 1) if unique_count <= 256 else ('uint16_t', 2)
+
+def pgm_read(c_type):
+    """Macro AVR que lê uma entrada do tipo c_type em PROGMEM"""
+    return 'pgm_read_byte' if c_type == 'uint8_t' else 'pgm_read_word'
+
+def flash_stats(frame_count, unique_count, bytes_per_frame):
+    """Bytes de flash sem e com deduplicação (bitmaps únicos + tabela de índices)"""
+    _, entry_size = index_type(unique_count)
+    naive = frame_count * bytes_per_frame
+    deduplicated = unique_count * bytes_per_frame + frame_count * entry_size
+    return {
+        'frames': frame_count,
+        'unique': unique_count,
+        'bytes_per_frame': bytes_per_frame,
+        'naive_bytes': naive,
+        'flash_bytes': deduplicated,
+        'saved_bytes': naive - deduplicated,
+    }
+
+def first_frame(grids):
+    """
+    Confere que há pelo menos um quadro sem consumir a sequência (que pode ser um
+    gerador). Retorna um iterador com todos os quadros; ValueError se não há nenhum.
+    """
+    grids = iter(grids)
+    first = next(grids, None)
+    if first is None:
+        raise ValueError("Nenhum quadro para gravar")
+    return chain([first], grids)
+
+def write_animation(grids, out, name, width, height):
+    """
+    Grava a animação deduplicada em código C, quadro a quadro (streaming):
+    os bitmaps únicos vão para nome_bits[][BYTES] assim que aparecem e a tabela
+    nome_index[] vem no final. Retorna o dicionário de flash_stats().
+    Sem nenhum quadro, levanta ValueError antes de gravar (arrays vazios não são C válido).
+    """
+    grids = first_frame(grids)
+    name = c_identifier(name)
+    upper = name.upper()
+    bytes_per_frame = height * ((width + 7) // 8)
+    dedup = FrameDeduplicator()
+
+    out.write(f"// Animação {name}: quadros XBM {width}x{height} deduplicados (u8g2.drawXBMP)\n")
+    out.write(f"#define {upper}_WIDTH {width}\n")
+    out.write(f"#define {upper}_HEIGHT {height}\n\n")
+    out.write(f"static const unsigned char {name}_bits[][{bytes_per_frame}] PROGMEM = {{\n")
+    for frame_number, grid in enumerate(grids):
+        grid = np.asarray(grid)
+        if grid.shape != (height, width):
+            raise ValueError(f"Quadro {frame_number} tem tamanho {grid.shape[1]}x{grid.shape[0]}, "
+                             f"esperado {width}x{height}")
+        position, is_new = dedup.add(pack_xbm(grid))
+        if is_new:
+            out.write(f"  {{ // Bitmap {position} (quadro {frame_number})\n")
+            out.write(format_c_bytes(np.frombuffer(dedup.unique[position], dtype=np.uint8), indent='    '))
+            out.write("\n  },\n")
+    out.write("};\n\n")
+
+    stats = flash_stats(len(dedup.index), len(dedup.unique), bytes_per_frame)
+    c_type, _ = index_type(stats['unique'])
+    out.write(f"#define {upper}_FRAME_COUNT {stats['frames']}\n")
+    out.write(f"#define {upper}_BITMAP_COUNT {stats['unique']}\n\n")
+    out.write(f"// Quadro i: {name}_bits[{pgm_read(c_type)}(&{name}_index[i])]\n")
+    out.write(f"static const {c_type} {name}_index[] PROGMEM = {{\n")
+    if dedup.index:
+        out.write(',\n'.join('  ' + ', '.join(str(i) for i in dedup.index[j:j + 16])
+                             for j in range(0, len(dedup.index), 16)))
+        out.write("\n")
+    out.write("};\n\n")
+    out.write(f"// {stats['frames']} quadros, {stats['unique']} bitmaps únicos: "
+              f"{stats['flash_bytes']} bytes de flash "
+              f"(sem deduplicação: {stats['naive_bytes']} bytes, economia de {stats['saved_bytes']} bytes)\n")
+    return stats
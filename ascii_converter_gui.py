@@ -9,8 +9,22 @@ Baseado no código T_1.py original.
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog
+import io
 import os
+import numpy as np
+
+from grid_parser import (GridParseError, parse_ascii, parse_binary, parse_c_code,
+                         clean_ascii, to_grid_array, grid_to_text)
+from grid_ops import (bresenham_line, brush_mask, mask_from_grid, stamp, flood_fill,
+                      flip_grid, rotate_grid, shift_grid, scale_grid,
+                      crop_or_pad, resample_grid,
+                      BRUSH_SHAPES, MAX_BRUSH_SIZE, MAX_GRID_SIZE)
+from animation_export import write_animation
+from file_export import FILE_FORMATS, export_file
+from grayscale import GRAY_BITS, level_count, level_palette, requantize, levels_to_text
+import converter_api as api
+from text_renderer import HERSHEY_FONTS, MIN_HEIGHT, MAX_HEIGHT, stamp_text
 
 # Importar o sistema de importação de imagem
 try:
@@ -21,6 +35,55 @@ except ImportError:
     print("Aviso: Sistema de importação de imagem não disponível. Instale as dependências:")
     print("pip install -r requirements_image_importer.txt")
 
+# Importar animações (vídeo/GIF) como quadros
+try:
+    from frame_importer import convert_frames
+    FRAME_IMPORTER_AVAILABLE = True
+except ImportError:
+    FRAME_IMPORTER_AVAILABLE = False
+
+# Limite de quadros ao importar uma animação para o editor
+MAX_IMPORTED_FRAMES = 500
+
+# Modos de redimensionamento da grade (rótulo -> modo)
+RESIZE_MODES = {
+    "Recortar/Expandir": 'crop',
+    "Reamostrar (vizinho)": 'nearest',
+    "Reamostrar (maioria)": 'majority',
+    "Limpar desenho": 'clear',
+}
+
+# Âncoras para recortar/expandir (rótulo -> âncora do Tk)
+RESIZE_ANCHORS = {
+    "Centro": 'center',
+    "Superior esquerdo": 'nw', "Superior": 'n', "Superior direito": 'ne',
+    "Esquerda": 'w', "Direita": 'e',
+    "Inferior esquerdo": 'sw', "Inferior": 's', "Inferior direito": 'se',
+}
+
+# Profundidade da grade (rótulo -> bits por pixel); acima de 1 bit a exportação é em tons de cinza
+GRAY_LABELS = {
+    "1 bit (P/B)": 1,
+    "2 bits (4 tons)": 2,
+    "4 bits (16 tons)": 4,
+}
+
+# Formatos do código C gerado (rótulo -> compressão; 'tileset' = tiles 8x8 deduplicados + mapa)
+EXPORT_FORMATS = {
+    "XBM": None,
+    "XBM + RLE": 'rle',
+    "XBM + LZ": 'lz',
+    "Tileset 8x8": 'tileset',
+}
+
+# Layouts de bytes do código C (rótulo -> layout de bitmap_export)
+LAYOUT_LABELS = {
+    "XBM (drawXBM)": 'xbm',
+    "MSB (drawBitmap)": 'msb',
+    "SSD1306 (páginas)": 'ssd1306',
+    "Tiles u8x8": 'tiles',
+}
+
 class AsciiConverterGUI:
     def __init__(self, root):
         self.root = root
@@ -40,14 +103,37 @@ class AsciiConverterGUI:
         self.cell_size = 40
         self.drawing = False
         self.brush_size = 1  # Tamanho do pincel
+        self.brush_shape = 'quadrado'  # Formato do pincel (BRUSH_SHAPES ou 'personalizado')
+        self.custom_brush = None  # Máscara do pincel personalizado
+        self.tool = 'pincel'  # Ferramenta ativa: 'pincel' ou 'balde'
+        self.fill_connectivity = 4  # Vizinhança do balde: 4 ou 8
+        self.frame_interval = 16  # ms entre quadros ao arrastar (~60 fps)
+        self.stroke_color = '#'  # Cor do traço em andamento
+        self.stroke_last_cell = None  # Última célula pintada no traço
+        self.stroke_pending = []  # Células recebidas desde o último quadro
+        self.stroke_job = None  # Quadro agendado com root.after
+        self.cell_items = None  # IDs dos retângulos do canvas (linha x coluna)
+        self.rendered_data = None  # Cópia da grade como está desenhada no canvas
         self.show_cell_borders = True  # Controla se as bordas das células são visíveis
-        self.grid_data = [['.' for _ in range(self.grid_width)] for _ in range(self.grid_height)]
+        self.gray_bits = 1  # Bits por pixel da grade (GRAY_BITS); 1 = preto e branco
+        self.paint_level = 1  # Nível pintado pelo botão esquerdo (1 até 2^bits - 1)
+        self.cell_colors = level_palette(self.gray_bits)  # Cor do canvas de cada nível
+        self.text_dialog = None  # Janela da ferramenta de texto (aberta = prévia na grade)
+        self.text_base = None  # Grade antes do texto, restaurada a cada tecla
+        self.text_target = None  # Grade em que o texto está sendo escrito
+        # Modelo da grade: array (altura x largura), 1 = preto (#), 0 = branco (.)
+        self.grid_data = np.zeros((self.grid_height, self.grid_width), dtype=np.uint8)
         
         # Sistema de histórico para Ctrl+Z
         self.history = []  # Lista de estados anteriores da grade
         self.max_history = 50  # Máximo de estados no histórico
         self.current_history_index = -1  # Índice atual no histórico
         
+        # Modo de múltiplos quadros (animação): cada quadro guarda sua grade e seu histórico
+        self.frames = [self.grid_data]
+        self.frame_histories = [None]  # (histórico, índice) dos quadros inativos
+        self.current_frame = 0
+        
         self.setup_ui()
         self.setup_bindings()
         
@@ -89,6 +175,14 @@ class AsciiConverterGUI:
         # Botão para aplicar mudança de tamanho
         ttk.Button(control_frame, text="Aplicar Tamanho", command=self.apply_size_change).grid(row=0, column=4, padx=5)
         
+        # Como o desenho atual é preservado ao mudar o tamanho
+        self.resize_mode_var = tk.StringVar(value="Recortar/Expandir")
+        ttk.Combobox(control_frame, textvariable=self.resize_mode_var, width=20, state="readonly",
+                     values=list(RESIZE_MODES)).grid(row=0, column=5, padx=5)
+        self.resize_anchor_var = tk.StringVar(value="Centro")
+        ttk.Combobox(control_frame, textvariable=self.resize_anchor_var, width=16, state="readonly",
+                     values=list(RESIZE_ANCHORS)).grid(row=0, column=6, padx=5)
+        
         # Tamanhos pré-definidos
         preset_frame = ttk.Frame(left_frame)
         preset_frame.grid(row=1, column=0, pady=(0, 10), sticky=(tk.W, tk.E))
@@ -107,20 +201,55 @@ class AsciiConverterGUI:
         
         ttk.Label(brush_frame, text="Tamanho do pincel:", font=("Arial", 9)).grid(row=0, column=0, padx=(0, 5))
         
-        # Botões de tamanho de pincel
-        brush_sizes = [1, 2, 3, 4, 5]
-        for i, size in enumerate(brush_sizes):
-            btn = ttk.Button(brush_frame, text=f"{size}x{size}", width=4,
-                           command=lambda s=size: self.set_brush_size(s))
-            btn.grid(row=0, column=i+1, padx=2)
-            # Destacar o tamanho atual
-            if size == self.brush_size:
-                btn.state(['pressed'])
+        # Tamanho do pincel (1 até MAX_BRUSH_SIZE)
+        self.brush_size_var = tk.StringVar(value=str(self.brush_size))
+        size_spin = ttk.Spinbox(brush_frame, from_=1, to=MAX_BRUSH_SIZE, width=4,
+                                textvariable=self.brush_size_var,
+                                command=lambda: self.set_brush_size(self.brush_size_var.get()))
+        size_spin.grid(row=0, column=1, padx=2)
+        size_spin.bind("<Return>", lambda e: self.set_brush_size(self.brush_size_var.get()))
+        size_spin.bind("<FocusOut>", lambda e: self.set_brush_size(self.brush_size_var.get()))
+        
+        # Formato do pincel
+        self.brush_shape_var = tk.StringVar(value=self.brush_shape)
+        shape_combo = ttk.Combobox(brush_frame, textvariable=self.brush_shape_var, width=12, state="readonly",
+                                   values=list(BRUSH_SHAPES) + ['personalizado'])
+        shape_combo.grid(row=0, column=2, padx=2)
+        shape_combo.bind("<<ComboboxSelected>>", lambda e: self.set_brush_shape(self.brush_shape_var.get()))
+        
+        # Usar o desenho atual como pincel personalizado
+        ttk.Button(brush_frame, text="Grade → Pincel", 
+                   command=self.set_custom_brush_from_grid).grid(row=0, column=3, padx=2)
         
         # Label para mostrar tamanho atual do pincel
-        self.brush_info_label = ttk.Label(brush_frame, text=f"Pincel: {self.brush_size}x{self.brush_size}", 
+        self.brush_info_label = ttk.Label(brush_frame, text=self.brush_description(), 
                                          font=("Arial", 9, "bold"), foreground="blue")
-        self.brush_info_label.grid(row=0, column=len(brush_sizes)+1, padx=(10, 0))
+        self.brush_info_label.grid(row=0, column=4, padx=(10, 0))
+        
+        # Ferramenta ativa (pincel ou balde de preenchimento)
+        ttk.Label(brush_frame, text="Ferramenta:", font=("Arial", 9)).grid(row=1, column=0, padx=(0, 5), pady=(5, 0), sticky=tk.W)
+        self.tool_var = tk.StringVar(value=self.tool)
+        ttk.Radiobutton(brush_frame, text="Pincel", value='pincel', variable=self.tool_var,
+                        command=lambda: self.set_tool(self.tool_var.get())).grid(row=1, column=1, pady=(5, 0), sticky=tk.W)
+        ttk.Radiobutton(brush_frame, text="Balde", value='balde', variable=self.tool_var,
+                        command=lambda: self.set_tool(self.tool_var.get())).grid(row=1, column=2, pady=(5, 0), sticky=tk.W)
+        self.connectivity_var = tk.BooleanVar(value=self.fill_connectivity == 8)
+        ttk.Checkbutton(brush_frame, text="Balde: 8 vizinhos", variable=self.connectivity_var,
+                        command=lambda: setattr(self, 'fill_connectivity', 8 if self.connectivity_var.get() else 4)
+                        ).grid(row=1, column=3, pady=(5, 0), sticky=tk.W)
+        
+        # Tons de cinza: profundidade da grade e nível pintado pelo botão esquerdo
+        self.gray_var = tk.StringVar(value="1 bit (P/B)")
+        gray_combo = ttk.Combobox(brush_frame, textvariable=self.gray_var, width=14, state="readonly",
+                                  values=list(GRAY_LABELS))
+        gray_combo.grid(row=1, column=4, padx=(10, 2), pady=(5, 0), sticky=tk.W)
+        gray_combo.bind("<<ComboboxSelected>>", lambda e: self.set_gray_bits(GRAY_LABELS[self.gray_var.get()]))
+        self.paint_level_var = tk.StringVar(value=str(self.paint_level))
+        self.paint_level_spin = ttk.Spinbox(brush_frame, from_=1, to=1, width=4, state="disabled",
+                                            textvariable=self.paint_level_var,
+                                            command=lambda: self.set_paint_level(self.paint_level_var.get()))
+        self.paint_level_spin.grid(row=1, column=5, padx=2, pady=(5, 0), sticky=tk.W)
+        self.paint_level_spin.bind("<Return>", lambda e: self.set_paint_level(self.paint_level_var.get()))
         
         # Título do canvas
         ttk.Label(left_frame, text="Desenhe seu padrão:", font=("Arial", 12, "bold")).grid(row=3, column=0, pady=(0, 10))
@@ -140,6 +269,7 @@ class AsciiConverterGUI:
         btn_frame.columnconfigure(3, weight=1)
         btn_frame.columnconfigure(4, weight=1)
         btn_frame.columnconfigure(5, weight=1)  # Novo para o botão de importação
+        btn_frame.columnconfigure(6, weight=1)
         
         ttk.Button(btn_frame, text="Limpar", command=self.clear_grid).grid(row=0, column=0, padx=5, sticky=(tk.W, tk.E))
         ttk.Button(btn_frame, text="Inverter", command=self.invert_grid).grid(row=0, column=1, padx=5, sticky=(tk.W, tk.E))
@@ -162,9 +292,58 @@ class AsciiConverterGUI:
                                    command=self.show_import_error, state="disabled")
             import_btn.grid(row=0, column=5, padx=5, sticky=(tk.W, tk.E))
         
+        # Ferramenta de texto (fontes Hershey do OpenCV)
+        ttk.Button(btn_frame, text="🔤 Texto", command=self.open_text_tool,
+                   state="normal" if HERSHEY_FONTS else "disabled").grid(row=0, column=6, padx=5, sticky=(tk.W, tk.E))
+        
+        # Transformações da grade inteira
+        transform_frame = ttk.Frame(left_frame)
+        transform_frame.grid(row=6, column=0, pady=(0, 10), sticky=(tk.W, tk.E))
+        
+        ttk.Label(transform_frame, text="Transformar:", font=("Arial", 9)).grid(row=0, column=0, padx=(0, 5))
+        transforms = [
+            ("⇆", lambda: self.transform(flip_grid, 'horizontal')),
+            ("⇅", lambda: self.transform(flip_grid, 'vertical')),
+            ("⟳ 90°", lambda: self.transform(rotate_grid, clockwise=True)),
+            ("⟲ 90°", lambda: self.transform(rotate_grid, clockwise=False)),
+            ("←", lambda: self.shift(0, -1)),
+            ("→", lambda: self.shift(0, 1)),
+            ("↑", lambda: self.shift(-1, 0)),
+            ("↓", lambda: self.shift(1, 0)),
+            ("2x", lambda: self.transform(scale_grid, 2)),
+        ]
+        for i, (text, command) in enumerate(transforms):
+            ttk.Button(transform_frame, text=text, width=5, command=command).grid(row=0, column=i+1, padx=2)
+        
+        # Deslocamento circular (o que sai por uma borda entra pela outra)
+        self.wrap_shift_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(transform_frame, text="Circular", 
+                        variable=self.wrap_shift_var).grid(row=0, column=len(transforms)+1, padx=(5, 0))
+        
+        # Quadros da animação
+        frames_frame = ttk.Frame(left_frame)
+        frames_frame.grid(row=7, column=0, pady=(0, 10), sticky=(tk.W, tk.E))
+        
+        ttk.Label(frames_frame, text="Quadros:", font=("Arial", 9)).grid(row=0, column=0, padx=(0, 5))
+        ttk.Button(frames_frame, text="◀", width=3,
+                   command=lambda: self.go_to_frame(self.current_frame - 1)).grid(row=0, column=1, padx=2)
+        self.frame_label = ttk.Label(frames_frame, text="1/1", width=8, anchor="center")
+        self.frame_label.grid(row=0, column=2, padx=2)
+        ttk.Button(frames_frame, text="▶", width=3,
+                   command=lambda: self.go_to_frame(self.current_frame + 1)).grid(row=0, column=3, padx=2)
+        ttk.Button(frames_frame, text="+ Novo",
+                   command=lambda: self.add_frame(duplicate=False)).grid(row=0, column=4, padx=2)
+        ttk.Button(frames_frame, text="Duplicar",
+                   command=lambda: self.add_frame(duplicate=True)).grid(row=0, column=5, padx=2)
+        ttk.Button(frames_frame, text="Remover", command=self.remove_frame).grid(row=0, column=6, padx=2)
+        ttk.Button(frames_frame, text="🎞️ Importar animação", command=self.import_animation,
+                   state="normal" if FRAME_IMPORTER_AVAILABLE else "disabled").grid(row=0, column=7, padx=2)
+        ttk.Button(frames_frame, text="Converter animação",
+                   command=self.convert_animation).grid(row=0, column=8, padx=2)
+        
         # Frame de status
         status_frame = ttk.Frame(left_frame)
-        status_frame.grid(row=6, column=0, pady=(0, 10), sticky=(tk.W, tk.E))
+        status_frame.grid(row=8, column=0, pady=(0, 10), sticky=(tk.W, tk.E))
         
         self.status_label = ttk.Label(status_frame, text=f"Grade: {self.grid_width}x{self.grid_height} | Pincel: {self.brush_size}x{self.brush_size}", 
                                      font=("Arial", 9), foreground="green")
@@ -183,6 +362,9 @@ class AsciiConverterGUI:
         copy_paste_frame.columnconfigure(1, weight=1)
         copy_paste_frame.columnconfigure(2, weight=1)
         copy_paste_frame.columnconfigure(3, weight=1)
+        copy_paste_frame.columnconfigure(4, weight=1)
+        copy_paste_frame.columnconfigure(5, weight=1)
+        copy_paste_frame.columnconfigure(6, weight=1)
         
         # Botões de copiar e colar
         ttk.Button(copy_paste_frame, text="📋 Copiar", 
@@ -194,6 +376,20 @@ class AsciiConverterGUI:
         ttk.Button(copy_paste_frame, text="🗑️ Limpar", 
                   command=self.clear_active_tab).grid(row=0, column=3, padx=(5, 0), sticky=(tk.W, tk.E))
         
+        # Formato do código C (com ou sem compressão)
+        self.export_format_var = tk.StringVar(value="XBM")
+        ttk.Combobox(copy_paste_frame, textvariable=self.export_format_var, width=10, state="readonly",
+                     values=list(EXPORT_FORMATS)).grid(row=0, column=4, padx=(5, 0), sticky=(tk.W, tk.E))
+        
+        # Ordem dos bytes para o display (XBM, MSB, páginas verticais ou tiles)
+        self.layout_var = tk.StringVar(value="XBM (drawXBM)")
+        ttk.Combobox(copy_paste_frame, textvariable=self.layout_var, width=16, state="readonly",
+                     values=list(LAYOUT_LABELS)).grid(row=0, column=5, padx=(5, 0), sticky=(tk.W, tk.E))
+        
+        # Gravar direto em arquivo (.pbm, .pgm, .bin no layout escolhido, .xbm)
+        ttk.Button(copy_paste_frame, text="💾 Salvar",
+                   command=self.save_to_file).grid(row=0, column=6, padx=(5, 0), sticky=(tk.W, tk.E))
+        
         # Notebook para diferentes formatos de saída
         self.notebook = ttk.Notebook(right_frame)
         self.notebook.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -267,15 +463,103 @@ class AsciiConverterGUI:
             
     def set_brush_size(self, size):
         """Define o tamanho do pincel"""
-        self.brush_size = size
-        self.brush_info_label.config(text=f"Pincel: {self.brush_size}x{self.brush_size}")
+        try:
+            size = int(size)
+        except (TypeError, ValueError):
+            return
+        self.brush_size = max(1, min(MAX_BRUSH_SIZE, size))
+        self.brush_size_var.set(str(self.brush_size))
+        self.brush_info_label.config(text=self.brush_description())
         self.update_status()
         
-        # Atualizar aparência dos botões (abordagem mais simples)
-        # Os botões serão atualizados visualmente na próxima interação
+    def set_brush_shape(self, shape):
+        """Define o formato do pincel"""
+        if shape == 'personalizado' and self.custom_brush is None:
+            messagebox.showinfo("Pincel", "Desenhe o formato na grade e clique em 'Grade → Pincel'.")
+            self.brush_shape_var.set(self.brush_shape)
+            return
+        self.brush_shape = shape
+        self.brush_info_label.config(text=self.brush_description())
+        self.update_status()
+        
+    def set_tool(self, tool):
+        """Define a ferramenta ativa ('pincel' ou 'balde')"""
+        self.tool = tool
+        self.update_status()
+        
+    def max_level(self):
+        """Maior nível da grade (1 em preto e branco, 3 ou 15 em tons de cinza)"""
+        return level_count(self.gray_bits) - 1
+        
+    def paint_value(self, color):
+        """Valor gravado na grade: nível do pincel para '#', 0 para '.'"""
+        return self.paint_level if color == '#' else 0
+        
+    def from_binary(self, grid):
+        """Grade 0/1 (texto colado, animação importada) -> preto no nível máximo"""
+        return (grid != 0).astype(np.uint8) * self.max_level()
+        
+    def set_paint_level(self, level):
+        """Define o tom pintado pelo botão esquerdo"""
+        try:
+            level = int(level)
+        except (TypeError, ValueError):
+            return
+        self.paint_level = max(1, min(self.max_level(), level))
+        self.paint_level_var.set(str(self.paint_level))
+        self.update_status()
+        
+    def set_gray_bits(self, bits):
+        """
+        Muda a profundidade da grade. Quadros e históricos de desfazer são
+        requantizados juntos, então desfazer continua coerente com a nova profundidade.
+        """
+        if bits == self.gray_bits or bits not in GRAY_BITS:
+            return
+        self.cancel_text()
+        old_bits = self.gray_bits
+        self.sync_frame()
+        convert = lambda grid: requantize(grid, old_bits, bits)
+        self.frames = [convert(grid) for grid in self.frames]
+        self.frame_histories = [None if entry is None else ([convert(state) for state in entry[0]], entry[1])
+                                for entry in self.frame_histories]
+        self.history = [convert(state) for state in self.history]
+        
+        self.gray_bits = bits
+        self.cell_colors = level_palette(bits)
+        self.paint_level = self.max_level()
+        self.paint_level_var.set(str(self.paint_level))
+        self.paint_level_spin.config(to=self.max_level(), state="normal" if bits > 1 else "disabled")
+        self.grid_data = self.frames[self.current_frame]
+        self.fill_cells()
+        self.update_status()
+        
+    def set_custom_brush_from_grid(self):
+        """Usa as células pretas da grade atual como pincel personalizado"""
+        mask = mask_from_grid(self.grid_data)
+        if mask is None:
+            messagebox.showwarning("Aviso", "A grade está vazia: desenhe o formato do pincel primeiro.")
+            return
+        self.custom_brush = mask
+        self.brush_shape_var.set('personalizado')
+        self.set_brush_shape('personalizado')
+        
+    def current_brush_mask(self):
+        """Retorna a máscara pré-calculada do pincel atual"""
+        if self.brush_shape == 'personalizado' and self.custom_brush is not None:
+            return self.custom_brush
+        return brush_mask(self.brush_shape, self.brush_size)
+        
+    def brush_description(self):
+        """Texto curto descrevendo o pincel atual"""
+        if self.brush_shape == 'personalizado' and self.custom_brush is not None:
+            height, width = self.custom_brush.shape
+            return f"Pincel: personalizado {width}x{height}"
+        return f"Pincel: {self.brush_shape} {self.brush_size}x{self.brush_size}"
             
     def apply_size_change(self):
         """Aplica a mudança de tamanho da grade"""
+        self.cancel_text()  # A prévia do texto não entra no novo tamanho
         try:
             new_width = int(self.width_var.get())
             new_height = int(self.height_var.get())
@@ -289,23 +573,24 @@ class AsciiConverterGUI:
                 return
                 
             if new_width != self.grid_width or new_height != self.grid_height:
-                # Confirmar mudança se houver dados
-                if any(any(cell == '#' for cell in row) for row in self.grid_data):
+                mode = RESIZE_MODES[self.resize_mode_var.get()]
+                
+                # Confirmar mudança se o desenho for apagado
+                if mode == 'clear' and self.grid_data.any():
                     if not messagebox.askyesno("Confirmar", 
                                              f"Alterar o tamanho da grade de {self.grid_width}x{self.grid_height} para {new_width}x{new_height}?\n"
                                              "Isso apagará o desenho atual."):
                         return
                 
-                # Atualizar tamanhos
-                self.grid_width = new_width
-                self.grid_height = new_height
-                self.update_canvas_size()
-                # Limpar histórico ao mudar tamanho da grade
-                self.history = []
-                self.current_history_index = -1
-                self.clear_grid()
-                self.draw_grid()
-                self.update_status()
+                # Novo conteúdo calculado de uma vez; a mudança pode ser desfeita
+                if mode == 'crop':
+                    new_grid = crop_or_pad(self.grid_data, new_height, new_width,
+                                           RESIZE_ANCHORS[self.resize_anchor_var.get()])
+                elif mode == 'clear':
+                    new_grid = np.zeros((new_height, new_width), dtype=np.uint8)
+                else:
+                    new_grid = resample_grid(self.grid_data, new_height, new_width, mode)
+                self.apply_transform(new_grid)
                 
         except ValueError:
             messagebox.showerror("Erro", "Por favor, insira números válidos para largura e altura")
@@ -359,6 +644,7 @@ class AsciiConverterGUI:
     def fill_cells(self):
         """Preenche as células do canvas com os dados atuais"""
         self.canvas.delete("cells")
+        self.cell_items = np.zeros((self.grid_height, self.grid_width), dtype=np.int64)
         
         for row in range(self.grid_height):
             for col in range(self.grid_width):
@@ -368,17 +654,34 @@ class AsciiConverterGUI:
                 y2 = y1 + self.cell_size
                 
                 # Definir cor de preenchimento
-                fill_color = 'black' if self.grid_data[row][col] == '#' else 'white'
+                fill_color = self.cell_colors[self.grid_data[row, col]]
                 
                 # Definir cor da borda
                 outline_color = 'lightgray' if self.show_cell_borders else ''
                 
                 # Criar retângulo da célula
-                self.canvas.create_rectangle(x1, y1, x2, y2, 
+                self.cell_items[row, col] = self.canvas.create_rectangle(x1, y1, x2, y2, 
                                           fill=fill_color, 
                                           outline=outline_color, 
                                           width=1 if self.show_cell_borders else 0,
                                           tags="cells")
+        
+        self.rendered_data = self.grid_data.copy()
+        
+    def render_cells(self):
+        """
+        Atualiza no canvas apenas as células que mudaram desde o último desenho.
+        Se a grade mudou de tamanho, redesenha tudo com fill_cells().
+        """
+        if self.rendered_data is None or self.rendered_data.shape != self.grid_data.shape:
+            self.fill_cells()
+            return
+            
+        rows, cols = np.nonzero(self.rendered_data != self.grid_data)
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            fill_color = self.cell_colors[self.grid_data[row, col]]
+            self.canvas.itemconfigure(int(self.cell_items[row, col]), fill=fill_color)
+        self.rendered_data[rows, cols] = self.grid_data[rows, cols]
                     
     def get_canvas_coords(self, event):
         """Converte coordenadas do evento para coordenadas da grade"""
@@ -391,57 +694,359 @@ class AsciiConverterGUI:
         
     def on_canvas_click(self, event):
         """Manipula clique esquerdo no canvas (preto)"""
-        row, col = self.get_canvas_coords(event)
-        if row is not None and col is not None:
-            # Aplicar pincel do tamanho selecionado (preto)
-            self.apply_brush(row, col, '#')
-            self.fill_cells()
+        self.begin_stroke(event, '#')
             
     def on_canvas_right_click(self, event):
         """Manipula clique direito no canvas (branco)"""
-        row, col = self.get_canvas_coords(event)
-        if row is not None and col is not None:
-            # Aplicar pincel do tamanho selecionado (branco)
-            self.apply_brush(row, col, '.')
-            self.fill_cells()
+        self.begin_stroke(event, '.')
             
     def on_canvas_drag(self, event):
         """Manipula arrastar no canvas com botão esquerdo (preto)"""
-        row, col = self.get_canvas_coords(event)
-        if row is not None and col is not None:
-            # Aplicar pincel do tamanho selecionado (preto)
-            self.apply_brush(row, col, '#')
-            self.fill_cells()
+        self.queue_stroke_point(event)
             
     def on_canvas_right_drag(self, event):
         """Manipula arrastar no canvas com botão direito (branco)"""
-        row, col = self.get_canvas_coords(event)
-        if row is not None and col is not None:
-            # Aplicar pincel do tamanho selecionado (branco)
-            self.apply_brush(row, col, '.')
-            self.fill_cells()
+        self.queue_stroke_point(event)
             
     def on_canvas_release(self, event):
-        """Manipula soltura do botão do mouse"""
-        pass
+        """Manipula soltura do botão do mouse: conclui o traço como um único passo no histórico"""
+        if not self.drawing:
+            return
+        self.flush_stroke()
+        self.drawing = False
+        self.stroke_last_cell = None
+        # Clique ou arrasto que não mudou nenhuma célula não vira passo no histórico
+        if self.grid_changed():
+            self.save_state()
+        
+    def begin_stroke(self, event, color):
+        """Inicia um traço na célula clicada"""
+        row, col = self.get_canvas_coords(event)
+        if row is None or col is None:
+            return
+        if self.text_dialog is not None:
+            # Com a ferramenta de texto aberta, o clique posiciona o texto
+            self.text_row_var.set(str(row))
+            self.text_col_var.set(str(col))
+            return
+        if self.tool == 'balde':
+            self.bucket_fill(row, col, color)
+            return
+        self.drawing = True
+        self.stroke_color = color
+        self.stroke_last_cell = (row, col)
+        self.stroke_pending = []
+        # Aplicar pincel do tamanho selecionado
+        self.apply_brush(row, col, color)
+        self.render_cells()
+        
+    def queue_stroke_point(self, event):
+        """
+        Acumula a célula do evento de movimento; a pintura acontece uma vez por quadro
+        em flush_stroke(), em vez de a cada evento.
+        """
+        if not self.drawing:
+            return
+        # Coordenadas sem limite: a reta é recortada nas bordas ao pintar
+        cell = (event.y // self.cell_size, event.x // self.cell_size)
+        last = self.stroke_pending[-1] if self.stroke_pending else self.stroke_last_cell
+        if cell == last:
+            return
+        self.stroke_pending.append(cell)
+        if self.stroke_job is None:
+            self.stroke_job = self.root.after(self.frame_interval, self.flush_stroke)
+            
+    def flush_stroke(self):
+        """Pinta os segmentos pendentes do traço (sem lacunas) e redesenha uma única vez"""
+        if self.stroke_job is not None:
+            self.root.after_cancel(self.stroke_job)
+            self.stroke_job = None
+        if not self.stroke_pending:
+            return
+            
+        for cell in self.stroke_pending:
+            self.paint_line(self.stroke_last_cell, cell, self.stroke_color)
+            self.stroke_last_cell = cell
+        self.stroke_pending = []
+        self.render_cells()
+        
+    def bucket_fill(self, row, col, color='#'):
+        """Preenche a região conectada à célula: um passo no histórico e um redesenho incremental"""
+        if flood_fill(self.grid_data, row, col, self.paint_value(color), self.fill_connectivity):
+            self.render_cells()
+            self.save_state()
+        
+    def paint_line(self, start, end, color='#'):
+        """Aplica o pincel em todas as células da reta de start até end (exceto start)"""
+        rows, cols = bresenham_line(start[0], start[1], end[0], end[1])
+        for row, col in zip(rows[1:].tolist(), cols[1:].tolist()):
+            self.apply_brush(row, col, color)
+        
+    def open_text_tool(self):
+        """
+        Janela da ferramenta de texto: cada alteração redesenha o texto sobre a grade
+        (os caracteres vêm do cache de glifos). Aplicar grava um passo no histórico.
+        """
+        if self.text_dialog is not None:
+            self.text_dialog.lift()
+            return
+        self.text_base = self.grid_data.copy()
+        self.text_target = self.grid_data
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Texto")
+        dialog.transient(self.root)
+        dialog.resizable(False, False)
+        dialog.protocol("WM_DELETE_WINDOW", self.cancel_text)
+        self.text_dialog = dialog
+        frame = ttk.Frame(dialog, padding=10)
+        frame.grid(row=0, column=0)
+        
+        self.text_var = tk.StringVar()
+        self.text_font_var = tk.StringVar(value='simplex')
+        self.text_height_var = tk.StringVar(value=str(max(MIN_HEIGHT, min(8, self.grid_height))))
+        self.text_thickness_var = tk.StringVar(value="1")
+        self.text_row_var = tk.StringVar(value="0")
+        self.text_col_var = tk.StringVar(value="0")
+        
+        ttk.Label(frame, text="Texto:").grid(row=0, column=0, sticky=tk.W)
+        entry = ttk.Entry(frame, textvariable=self.text_var, width=30)
+        entry.grid(row=0, column=1, columnspan=3, pady=2, sticky=(tk.W, tk.E))
+        ttk.Label(frame, text="Fonte:").grid(row=1, column=0, sticky=tk.W)
+        ttk.Combobox(frame, textvariable=self.text_font_var, values=list(HERSHEY_FONTS), width=14,
+                     state="readonly").grid(row=1, column=1, pady=2, sticky=tk.W)
+        ttk.Label(frame, text="Altura (px):").grid(row=1, column=2, padx=(10, 2), sticky=tk.W)
+        ttk.Spinbox(frame, from_=MIN_HEIGHT, to=MAX_HEIGHT, width=5,
+                    textvariable=self.text_height_var).grid(row=1, column=3, pady=2, sticky=tk.W)
+        ttk.Label(frame, text="Espessura:").grid(row=2, column=0, sticky=tk.W)
+        ttk.Spinbox(frame, from_=1, to=MAX_HEIGHT // 4, width=5,
+                    textvariable=self.text_thickness_var).grid(row=2, column=1, pady=2, sticky=tk.W)
+        ttk.Label(frame, text="Linha / coluna:").grid(row=3, column=0, sticky=tk.W)
+        ttk.Spinbox(frame, from_=-MAX_GRID_SIZE, to=MAX_GRID_SIZE, width=5,
+                    textvariable=self.text_row_var).grid(row=3, column=1, pady=2, sticky=tk.W)
+        ttk.Spinbox(frame, from_=-MAX_GRID_SIZE, to=MAX_GRID_SIZE, width=5,
+                    textvariable=self.text_col_var).grid(row=3, column=2, pady=2, sticky=tk.W)
+        self.text_info_label = ttk.Label(frame, text="Clique na grade para posicionar o texto",
+                                         font=("Arial", 9), foreground="blue")
+        self.text_info_label.grid(row=4, column=0, columnspan=4, pady=(5, 5), sticky=tk.W)
+        ttk.Button(frame, text="Aplicar", command=self.apply_text).grid(row=5, column=2, padx=2)
+        ttk.Button(frame, text="Cancelar", command=self.cancel_text).grid(row=5, column=3, padx=2)
+        
+        for var in (self.text_var, self.text_font_var, self.text_height_var, self.text_thickness_var,
+                    self.text_row_var, self.text_col_var):
+            var.trace_add('write', lambda *args: self.update_text_preview())
+        entry.bind("<Return>", lambda e: self.apply_text())
+        entry.bind("<Escape>", lambda e: self.cancel_text())
+        entry.focus_set()
+        
+    def update_text_preview(self):
+        """Redesenha o texto sobre a grade de antes (só as células alteradas vão para o canvas)"""
+        if self.text_dialog is None:
+            return
+        if self.grid_data is not self.text_target:
+            # Outra grade (desfazer, outro quadro, novo tamanho): a prévia não vale mais
+            self.close_text_tool()
+            return
+        try:
+            height = int(self.text_height_var.get())
+            thickness = int(self.text_thickness_var.get())
+            row = int(self.text_row_var.get())
+            col = int(self.text_col_var.get())
+        except ValueError:
+            return  # Campo numérico sendo editado
+        grid = self.text_base.copy()
+        try:
+            text_grid = stamp_text(grid, self.text_var.get(), row, col, self.paint_level,
+                                   self.text_font_var.get(), height, thickness)
+        except ValueError as e:
+            self.text_info_label.config(text=f"⚠️ {e}")
+            return
+        self.grid_data[:] = grid
+        self.render_cells()
+        text_h, text_w = text_grid.shape
+        fits = row >= 0 and col >= 0 and row + text_h <= self.grid_height and col + text_w <= self.grid_width
+        self.text_info_label.config(text=f"Texto {text_w}x{text_h} em ({row}, {col})" +
+                                    ("" if fits or not text_w else " - recortado nas bordas"))
+        
+    def apply_text(self):
+        """Mantém o texto na grade como um passo no histórico"""
+        self.update_text_preview()
+        # update_text_preview() fecha a ferramenta se a grade já não é a da prévia
+        applied = self.text_dialog is not None
+        self.close_text_tool()
+        if applied:
+            self.save_state()
+        
+    def cancel_text(self):
+        """Fecha a ferramenta de texto devolvendo a grade como estava"""
+        if self.text_base is not None and self.grid_data is self.text_target:
+            self.grid_data[:] = self.text_base
+            self.render_cells()
+        self.close_text_tool()
+        
+    def close_text_tool(self):
+        if self.text_dialog is not None:
+            self.text_dialog.destroy()
+        self.text_dialog = None
+        self.text_base = self.text_target = None
         
     def clear_grid(self):
         """Limpa toda a grade"""
-        # Salvar estado anterior no histórico
-        self.save_state()
+        self.cancel_text()
+        self.grid_data = np.zeros((self.grid_height, self.grid_width), dtype=np.uint8)
+        self.render_cells()
         
-        self.grid_data = [['.' for _ in range(self.grid_width)] for _ in range(self.grid_height)]
-        self.fill_cells()
+        # Salvar novo estado no histórico
+        self.save_state()
         
     def invert_grid(self):
-        """Inverte todos os valores da grade"""
-        # Salvar estado anterior no histórico
+        """Inverte todos os valores da grade (em tons de cinza, cada nível vira o oposto)"""
+        self.cancel_text()
+        self.grid_data = self.max_level() - self.grid_data
+        self.render_cells()
+        
+        # Salvar novo estado no histórico
         self.save_state()
         
-        for row in range(self.grid_height):
-            for col in range(self.grid_width):
-                self.grid_data[row][col] = '#' if self.grid_data[row][col] == '.' else '.'
-        self.fill_cells()
+    def shift(self, rows, cols):
+        """Desloca o desenho, circular ou recortado conforme a opção 'Circular'"""
+        self.transform(shift_grid, rows, cols, wrap=self.wrap_shift_var.get())
+        
+    def transform(self, function, *args, **kwargs):
+        """Aplica function(grade, ...) à grade; uma prévia de texto aberta é descartada antes"""
+        self.cancel_text()
+        self.apply_transform(function(self.grid_data, *args, **kwargs))
+        
+    def apply_transform(self, new_grid):
+        """Aplica o resultado de uma transformação da grade inteira como um único passo no histórico"""
+        height, width = new_grid.shape
+        if width > MAX_GRID_SIZE or height > MAX_GRID_SIZE:
+            messagebox.showerror("Erro", f"A grade resultante ({width}x{height}) excede o máximo de "
+                               f"{MAX_GRID_SIZE}x{MAX_GRID_SIZE}")
+            return
+        self.set_grid(new_grid)
+        self.save_state()
+        
+    def set_grid(self, new_grid):
+        """Substitui o modelo da grade, ajustando o canvas se as dimensões mudarem"""
+        height, width = new_grid.shape
+        self.grid_data = new_grid
+        if (width, height) != (self.grid_width, self.grid_height):
+            self.grid_width = width
+            self.grid_height = height
+            self.width_var.set(str(width))
+            self.height_var.set(str(height))
+            self.update_canvas_size()
+            self.draw_grid()
+        else:
+            self.render_cells()
+        self.update_status()
+        
+    def sync_frame(self):
+        """Guarda a grade atual no quadro ativo (set_grid troca o objeto da grade)"""
+        self.frames[self.current_frame] = self.grid_data
+        
+    def go_to_frame(self, index):
+        """Troca o quadro ativo, preservando o histórico de desfazer de cada quadro"""
+        if not 0 <= index < len(self.frames) or index == self.current_frame:
+            return
+        self.cancel_text()  # A prévia do texto não pode ficar gravada no quadro
+        self.sync_frame()
+        self.frame_histories[self.current_frame] = (self.history, self.current_history_index)
+        
+        self.current_frame = index
+        self.set_grid(self.frames[index])
+        if self.frame_histories[index] is None:
+            self.history = []
+            self.current_history_index = -1
+            self.save_state()
+        else:
+            self.history, self.current_history_index = self.frame_histories[index]
+            self.frame_histories[index] = None
+        self.update_frame_label()
+        self.update_status()
+        
+    def add_frame(self, duplicate=False):
+        """Insere um quadro depois do atual (vazio ou cópia do atual) e vai para ele"""
+        self.cancel_text()
+        self.sync_frame()
+        if duplicate:
+            new_grid = self.grid_data.copy()
+        else:
+            new_grid = np.zeros_like(self.grid_data)
+        self.frames.insert(self.current_frame + 1, new_grid)
+        self.frame_histories.insert(self.current_frame + 1, None)
+        self.go_to_frame(self.current_frame + 1)
+        
+    def remove_frame(self):
+        """Remove o quadro atual (sempre resta pelo menos um)"""
+        if len(self.frames) == 1:
+            messagebox.showinfo("Quadros", "A animação precisa de pelo menos um quadro.")
+            return
+        removed = self.current_frame
+        target = removed - 1 if removed > 0 else 1
+        self.go_to_frame(target)
+        del self.frames[removed]
+        del self.frame_histories[removed]
+        if removed < self.current_frame:
+            self.current_frame -= 1
+        self.update_frame_label()
+        
+    def update_frame_label(self):
+        """Atualiza o indicador 'quadro atual/total'"""
+        self.frame_label.config(text=f"{self.current_frame + 1}/{len(self.frames)}")
+        
+    def import_animation(self):
+        """Importa um vídeo/GIF animado como quadros do tamanho da grade atual"""
+        path = filedialog.askopenfilename(
+            title="Selecionar Animação",
+            filetypes=[("Animações", "*.gif *.mp4 *.avi *.mov *.webm"), ("Todos os arquivos", "*.*")])
+        if not path:
+            return
+        self.cancel_text()
+        try:
+            frames = list(convert_frames(path, self.grid_width, self.grid_height,
+                                         max_frames=MAX_IMPORTED_FRAMES))
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao importar animação: {str(e)}")
+            return
+        if not frames:
+            messagebox.showerror("Erro", "Nenhum quadro foi lido do arquivo.")
+            return
+        
+        # Substitui os quadros atuais; cada quadro começa com histórico próprio
+        if self.gray_bits > 1:
+            frames = [self.from_binary(frame) for frame in frames]
+        self.frames = frames
+        self.frame_histories = [None] * len(frames)
+        self.current_frame = 0
+        self.set_grid(frames[0])
+        self.history = []
+        self.current_history_index = -1
+        self.save_state()
+        self.update_frame_label()
+        
+    def convert_animation(self):
+        """Gera o código C de todos os quadros, com quadros repetidos gravados uma vez"""
+        if self.gray_bits > 1:
+            messagebox.showwarning("Aviso", "A animação deduplicada é gerada em XBM de 1 bit.\n"
+                                   "Volte a grade para 1 bit (P/B) antes de converter os quadros.")
+            return
+        self.sync_frame()
+        try:
+            out = io.StringIO()
+            stats = write_animation(self.frames, out, "animacao", self.grid_width, self.grid_height)
+        except ValueError as e:
+            messagebox.showerror("Erro", f"Todos os quadros devem ter o tamanho da grade atual.\n{str(e)}")
+            return
+        
+        self.c_text.delete(1.0, tk.END)
+        self.c_text.insert(1.0, out.getvalue())
+        self.notebook.select(0)
+        
+        summary = (f"{stats['frames']} quadros, {stats['unique']} bitmaps únicos: "
+                   f"{stats['flash_bytes']} bytes de flash (economia de {stats['saved_bytes']} bytes)")
+        self.status_label.config(text=f"Animação: {summary}")
         
     def linha_para_byte(self, linha):
         """
@@ -457,41 +1062,34 @@ class AsciiConverterGUI:
         return bits
         
     def converte(self, desenho):
-        """Converte o desenho para bytes"""
+        """Converte o desenho (grade ou lista de linhas '#'/'.') para bytes"""
         if len(desenho) != self.grid_height:
             raise ValueError(f"O desenho deve ter exatamente {self.grid_height} linhas.")
             
-        bytes_result = []
+        grid = to_grid_array(desenho)[:, :self.grid_width]
         
-        # Para grades maiores que 8, dividir em bytes de 8 bits
-        for row in desenho:
-            if self.grid_width <= 8:
-                # Uma linha = um byte (se couber)
-                bytes_result.append(self.linha_para_byte(row))
-            else:
-                # Dividir linha em bytes de 8 bits
-                for i in range(0, self.grid_width, 8):
-                    chunk = row[i:i+8]
-                    # Preencher com '.' se necessário
-                    chunk = ''.join(chunk).ljust(8, '.')
-                    bytes_result.append(self.linha_para_byte(chunk))
-                    
-        return bytes_result
+        # Completar cada linha com branco até a largura da grade e empacotar
+        # (bit 0 = pixel da esquerda, igual a linha_para_byte)
+        grid = np.pad(grid, ((0, 0), (0, self.grid_width - grid.shape[1])))
+        return api.pack(grid).tolist()
         
     def convert_to_xbm(self):
         """Converte o desenho para formato XBM e exibe os resultados"""
+        if self.gray_bits > 1:
+            if EXPORT_FORMATS[self.export_format_var.get()] is not None:
+                messagebox.showwarning("Aviso", f"O formato {self.export_format_var.get()} só existe em 1 bit.\n"
+                                       "Escolha XBM para exportar os tons ou volte a grade para 1 bit (P/B).")
+                return
+            self.convert_to_gray()
+            return
         try:
             # Converter linhas para bytes
             bytes_hex = self.converte(self.grid_data)
             
-            # Gerar código C
-            c_code = f"// Bytes para PROGMEM (u8g2) - Grade {self.grid_width}x{self.grid_height}\n"
-            c_code += f"// {self.grid_height} linhas x {self.grid_width} colunas = {len(bytes_hex)} bytes\n\n"
-            c_code += "static const unsigned char icone_bits[] PROGMEM = {\n"
-            for b in bytes_hex:
-                c_code += f"  0x{b:02X},\n"
-            c_code += "};\n\n"
-            c_code += f"// Tamanho: {len(bytes_hex)} bytes"
+            # Código C pela API de conversão (layout e formato de exportação escolhidos)
+            layout = LAYOUT_LABELS[self.layout_var.get()]
+            compression = EXPORT_FORMATS[self.export_format_var.get()]
+            c_code = api.c_source(self.grid_data, "icone", layout, compression=compression)
             
             # Gerar representação binária
             bin_code = f"Representação binária - Grade {self.grid_width}x{self.grid_height}:\n"
@@ -510,8 +1108,7 @@ class AsciiConverterGUI:
                 
             # Gerar representação ASCII
             ascii_code = f"Representação ASCII - Grade {self.grid_width}x{self.grid_height}:\n"
-            for row in self.grid_data:
-                ascii_code += "".join(row) + "\n"
+            ascii_code += grid_to_text(self.grid_data) + "\n"
                 
             # Atualizar textos
             self.c_text.delete(1.0, tk.END)
@@ -529,44 +1126,81 @@ class AsciiConverterGUI:
         except Exception as e:
             messagebox.showerror("Erro", f"Erro na conversão: {str(e)}")
 
+    def convert_to_gray(self):
+        """Exporta a grade em tons de cinza: pixels empacotados em 2 ou 4 bits"""
+        try:
+            c_code = api.c_source(self.grid_data, "icone", bits=self.gray_bits)
+            
+            # Níveis de cada célula, linha a linha
+            bin_code = (f"Níveis ({self.gray_bits} bits) - Grade {self.grid_width}x{self.grid_height}:\n")
+            for row_idx, row in enumerate(self.grid_data.tolist()):
+                bin_code += f"Linha {row_idx}: " + ' '.join(f"{v:0{self.gray_bits}b}" for v in row) + "\n"
+            
+            ascii_code = (f"Tons ('.' = branco, 1-{self.max_level():X} = mais escuro) - "
+                          f"Grade {self.grid_width}x{self.grid_height}:\n")
+            ascii_code += levels_to_text(self.grid_data) + "\n"
+            
+            self.c_text.delete(1.0, tk.END)
+            self.c_text.insert(1.0, c_code)
+            self.bin_text.delete(1.0, tk.END)
+            self.bin_text.insert(1.0, bin_code)
+            self.ascii_text.delete(1.0, tk.END)
+            self.ascii_text.insert(1.0, ascii_code)
+            self.notebook.select(0)
+            
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro na conversão: {str(e)}")
+
+    def save_to_file(self):
+        """
+        Grava a grade em arquivo binário (formato pela extensão). Com vários quadros,
+        oferece gravar todos como nome_000.ext, nome_001.ext, ... (uma escrita por arquivo).
+        """
+        path = filedialog.asksaveasfilename(
+            title="Salvar Bitmap", defaultextension=".bin", initialfile="icone.bin",
+            filetypes=[(description, f"*.{fmt}") for fmt, description in FILE_FORMATS.items()])
+        if not path:
+            return
+        fmt = os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt not in FILE_FORMATS:
+            messagebox.showerror("Erro", f"Extensão desconhecida: use {', '.join('.' + f for f in FILE_FORMATS)}")
+            return
+        layout = LAYOUT_LABELS[self.layout_var.get()]
+        
+        self.sync_frame()
+        targets = [(path, self.grid_data)]
+        if len(self.frames) > 1 and messagebox.askyesno(
+                "Salvar", f"Gravar os {len(self.frames)} quadros em arquivos separados?"):
+            base, extension = os.path.splitext(path)
+            targets = [(f"{base}_{i:03d}{extension}", frame) for i, frame in enumerate(self.frames)]
+        try:
+            total = sum(export_file(target, grid, fmt, layout, self.gray_bits) for target, grid in targets)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Erro", f"Erro ao salvar: {str(e)}")
+            return
+        self.status_label.config(text=f"💾 {len(targets)} arquivo(s) .{fmt} gravado(s): {total:,} bytes")
+
     def apply_brush(self, center_row, center_col, color='#'):
         """
-        Aplica o pincel do tamanho selecionado na posição central
+        Aplica o pincel selecionado centrado na posição
         color: '#' para preto, '.' para branco
         """
-        # Salvar estado anterior no histórico
-        self.save_state()
-        
-        # Calcular área afetada pelo pincel
-        # Para pincel 1x1: apenas a célula central
-        # Para pincel 2x2: 2x2 células a partir da posição
-        # Para pincel 3x3: 3x3 células a partir da posição, etc.
+        # O histórico é salvo uma vez por traço, em on_canvas_release()
         
-        if self.brush_size == 1:
-            # Pincel 1x1: apenas a célula clicada
-            if 0 <= center_row < self.grid_height and 0 <= center_col < self.grid_width:
-                self.grid_data[center_row][center_col] = color
-        else:
-            # Pincel maior: calcular a área correta
-            # O pincel deve cobrir exatamente o tamanho especificado
-            start_row = center_row
-            end_row = min(self.grid_height, center_row + self.brush_size)
-            start_col = center_col
-            end_col = min(self.grid_width, center_col + self.brush_size)
-            
-            for row in range(start_row, end_row):
-                for col in range(start_col, end_col):
-                    # Definir cor da célula
-                    self.grid_data[row][col] = color
+        # Máscara pré-calculada, recortada nas bordas: uma atribuição por carimbo
+        stamp(self.grid_data, self.current_brush_mask(), center_row, center_col,
+              self.paint_value(color))
 
     def update_status(self):
         """Atualiza o texto do status label"""
         border_status = "ON" if self.show_cell_borders else "OFF"
         undo_status = f"Desfazer: {len(self.history)}" if len(self.history) > 1 else "Desfazer: N/A"
-        mouse_info = "🖱️ Esq: Preto | Dir: Branco"
+        mouse_info = f"🖱️ {self.tool.capitalize()} - Esq: Preto | Dir: Branco"
+        if self.gray_bits > 1:
+            mouse_info = f"🖱️ {self.tool.capitalize()} - Esq: Tom {self.paint_level}/{self.max_level()} | Dir: Branco"
         import_status = "📁 Importar: Disponível" if IMAGE_IMPORTER_AVAILABLE else "📁 Importar: Não disponível"
         
-        self.status_label.config(text=f"Grade: {self.grid_width}x{self.grid_height} | Pincel: {self.brush_size}x{self.brush_size} | Bordas: {border_status} | {undo_status} | {mouse_info} | {import_status}")
+        self.status_label.config(text=f"Grade: {self.grid_width}x{self.grid_height} | {self.brush_description()} | Bordas: {border_status} | {undo_status} | {mouse_info} | {import_status}")
 
     def toggle_cell_borders(self):
         """Alterna a visibilidade das bordas das células"""
@@ -574,10 +1208,16 @@ class AsciiConverterGUI:
         self.draw_grid() # Redesenha a grade para mostrar/ocultar as bordas
         self.update_status() # Atualiza o status para mostrar o estado atual
 
+    def grid_changed(self):
+        """A grade difere do último estado salvo no histórico?"""
+        if not 0 <= self.current_history_index < len(self.history):
+            return True
+        return not np.array_equal(self.history[self.current_history_index], self.grid_data)
+        
     def save_state(self):
         """Salva o estado atual da grade no histórico"""
         # Criar uma cópia profunda do estado atual
-        current_state = [row[:] for row in self.grid_data]
+        current_state = self.grid_data.copy()
         
         # Se estamos no meio do histórico, remover estados futuros
         if self.current_history_index < len(self.history) - 1:
@@ -597,13 +1237,13 @@ class AsciiConverterGUI:
         
     def undo(self):
         """Desfaz a última ação (Ctrl+Z)"""
+        self.cancel_text()
         if self.current_history_index > 0:
             self.current_history_index -= 1
             # Restaurar estado anterior
             previous_state = self.history[self.current_history_index]
-            self.grid_data = [row[:] for row in previous_state]
-            self.fill_cells()
-            self.update_status()
+            # set_grid() também restaura as dimensões (giro e escala mudam o tamanho)
+            self.set_grid(previous_state.copy())
         else:
             # Não há mais estados para desfazer
             messagebox.showinfo("Desfazer", "Não há mais ações para desfazer.")
@@ -647,41 +1287,7 @@ class AsciiConverterGUI:
     
     def clean_ascii_content(self, content):
         """Limpa e valida o conteúdo ASCII colado"""
-        if not content:
-            return ""
-            
-        # Remover caracteres de controle e espaços extras
-        lines = content.strip().splitlines()
-        cleaned_lines = []
-        
-        for line in lines:
-            # Remover espaços em branco e caracteres inválidos
-            cleaned_line = ''.join(char for char in line if char in ['#', '.', ' '])
-            # Substituir espaços por pontos (branco)
-            cleaned_line = cleaned_line.replace(' ', '.')
-            
-            if cleaned_line:  # Se a linha não estiver vazia
-                cleaned_lines.append(cleaned_line)
-        
-        # Verificar se o conteúdo tem o formato correto
-        if len(cleaned_lines) == 0:
-            return ""
-            
-        # Verificar se todas as linhas têm o mesmo comprimento
-        line_lengths = set(len(line) for line in cleaned_lines)
-        if len(line_lengths) != 1:
-            return ""
-            
-        # Verificar se o comprimento é válido para a grade atual
-        line_length = list(line_lengths)[0]
-        if line_length != self.grid_width:
-            return ""
-            
-        # Verificar se o número de linhas é válido
-        if len(cleaned_lines) != self.grid_height:
-            return ""
-            
-        return '\n'.join(cleaned_lines)
+        return clean_ascii(content, self.grid_width, self.grid_height)
 
     def apply_ascii_to_grid(self):
         """Aplica o conteúdo da área de texto ASCII para a grade"""
@@ -691,30 +1297,15 @@ class AsciiConverterGUI:
             messagebox.showwarning("Aviso", "A área de texto ASCII está vazia.")
             return
             
-        lines = ascii_content.splitlines()
-        
-        # Validações
-        if len(lines) != self.grid_height:
-            messagebox.showerror("Erro", f"O conteúdo ASCII deve ter exatamente {self.grid_height} linhas.\n"
-                               f"Atual: {len(lines)} linhas")
+        # Validar e converter em uma única passada
+        try:
+            new_grid = parse_ascii(ascii_content, self.grid_width, self.grid_height)
+        except GridParseError as e:
+            messagebox.showerror("Erro", str(e))
             return
-            
-        # Verificar cada linha
-        for i, line in enumerate(lines):
-            if len(line) != self.grid_width:
-                messagebox.showerror("Erro", f"A linha {i+1} deve ter exatamente {self.grid_width} caracteres.\n"
-                                   f"Atual: {len(line)} caracteres")
-                return
-                
-            # Verificar caracteres válidos
-            for j, char in enumerate(line):
-                if char not in ['#', '.']:
-                    messagebox.showerror("Erro", f"Caractere inválido na linha {i+1}, coluna {j+1}: '{char}'\n"
-                                       f"Use apenas '#' (preto) ou '.' (branco)")
-                    return
         
         # Confirmar aplicação se houver dados na grade
-        if any(any(cell == '#' for cell in row) for row in self.grid_data):
+        if self.grid_data.any():
             if not messagebox.askyesno("Confirmar", 
                                      f"Aplicar o padrão ASCII à grade {self.grid_width}x{self.grid_height}?\n"
                                      "Isso substituirá o desenho atual."):
@@ -722,9 +1313,7 @@ class AsciiConverterGUI:
         
         # Aplicar à grade
         try:
-            for i, line in enumerate(lines):
-                for j, char in enumerate(line):
-                    self.grid_data[i][j] = char
+            self.grid_data = self.from_binary(new_grid)
             
             # Atualizar interface
             self.fill_cells()
@@ -785,48 +1374,34 @@ class AsciiConverterGUI:
         """Aplica o conteúdo da aba ativa para a grade"""
         active_tab = self.notebook.tab(self.notebook.select(), "text")
         
-        # Obter conteúdo da aba ativa
+        # Obter conteúdo da aba ativa e o parser correspondente
         if active_tab == "Código C":
             content = self.c_text.get(1.0, tk.END).strip()
-            # Tentar extrair apenas o conteúdo ASCII do código C
-            ascii_content = self.extract_ascii_from_c_code(content)
+            # Extrair apenas o conteúdo ASCII do código C
+            parser = parse_c_code
         elif active_tab == "Binário":
             content = self.bin_text.get(1.0, tk.END).strip()
-            # Tentar converter binário para ASCII
-            ascii_content = self.convert_binary_to_ascii(content)
+            # Converter binário (0/1) para a grade
+            parser = parse_binary
         elif active_tab == "ASCII":
-            ascii_content = self.ascii_text.get(1.0, tk.END).strip()
+            content = self.ascii_text.get(1.0, tk.END).strip()
+            parser = parse_ascii
         else:
-            ascii_content = ""
+            content = ""
 
-        if not ascii_content:
+        if not content:
             messagebox.showwarning("Aviso", f"A área de texto da aba '{active_tab}' está vazia ou não contém dados válidos.")
             return
             
-        lines = ascii_content.splitlines()
-        
-        # Validações
-        if len(lines) != self.grid_height:
-            messagebox.showerror("Erro", f"O conteúdo deve ter exatamente {self.grid_height} linhas.\n"
-                               f"Atual: {len(lines)} linhas")
+        # Validar e converter direto para o modelo da grade
+        try:
+            new_grid = parser(content, self.grid_width, self.grid_height)
+        except GridParseError as e:
+            messagebox.showerror("Erro", f"Aba '{active_tab}': {str(e)}")
             return
-            
-        # Verificar cada linha
-        for i, line in enumerate(lines):
-            if len(line) != self.grid_width:
-                messagebox.showerror("Erro", f"A linha {i+1} deve ter exatamente {self.grid_width} caracteres.\n"
-                                   f"Atual: {len(line)} caracteres")
-                return
-                
-            # Verificar caracteres válidos
-            for j, char in enumerate(line):
-                if char not in ['#', '.']:
-                    messagebox.showerror("Erro", f"Caractere inválido na linha {i+1}, coluna {j+1}: '{char}'\n"
-                                       f"Use apenas '#' (preto) ou '.' (branco)")
-                    return
         
         # Confirmar aplicação se houver dados na grade
-        if any(any(cell == '#' for cell in row) for row in self.grid_data):
+        if self.grid_data.any():
             if not messagebox.askyesno("Confirmar", 
                                      f"Aplicar o padrão da aba '{active_tab}' à grade {self.grid_width}x{self.grid_height}?\n"
                                      "Isso substituirá o desenho atual."):
@@ -834,9 +1409,7 @@ class AsciiConverterGUI:
         
         # Aplicar à grade
         try:
-            for i, line in enumerate(lines):
-                for j, char in enumerate(line):
-                    self.grid_data[i][j] = char
+            self.grid_data = self.from_binary(new_grid)
             
             # Atualizar interface
             self.fill_cells()
@@ -850,40 +1423,17 @@ class AsciiConverterGUI:
     
     def extract_ascii_from_c_code(self, c_code):
         """Extrai conteúdo ASCII do código C"""
-        # Tentar encontrar padrões ASCII no código C
-        lines = c_code.splitlines()
-        ascii_lines = []
-        
-        for line in lines:
-            # Procurar por linhas que contenham apenas # e .
-            if all(char in ['#', '.', ' ', '\t'] for char in line):
-                # Limpar espaços e tabs
-                cleaned_line = ''.join(char for char in line if char in ['#', '.'])
-                if cleaned_line and len(cleaned_line) <= self.grid_width:
-                    ascii_lines.append(cleaned_line)
-        
-        if len(ascii_lines) == self.grid_height:
-            return '\n'.join(ascii_lines)
-        return ""
+        try:
+            return grid_to_text(parse_c_code(c_code, self.grid_width, self.grid_height))
+        except GridParseError:
+            return ""
     
     def convert_binary_to_ascii(self, binary_content):
         """Converte conteúdo binário para ASCII"""
-        lines = binary_content.splitlines()
-        ascii_lines = []
-        
-        for line in lines:
-            # Procurar por padrões binários (0s e 1s)
-            if all(char in ['0', '1', ' '] for char in line):
-                # Converter 0 para . e 1 para #
-                ascii_line = line.replace('0', '.').replace('1', '#')
-                # Remover espaços
-                ascii_line = ''.join(char for char in ascii_line if char in ['#', '.'])
-                if ascii_line and len(ascii_line) <= self.grid_width:
-                    ascii_lines.append(ascii_line)
-        
-        if len(ascii_lines) == self.grid_height:
-            return '\n'.join(ascii_lines)
-        return ""
+        try:
+            return grid_to_text(parse_binary(binary_content, self.grid_width, self.grid_height))
+        except GridParseError:
+            return ""
 
     def clear_active_tab(self):
         """Limpa o conteúdo da aba ativa"""
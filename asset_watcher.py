@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modo de Observação de Assets
+Observa um diretório de imagens (ou grades ASCII em .txt) por polling e
+regenera apenas os headers cujas fontes mudaram. Um manifesto no diretório de
+saída guarda, para cada fonte, o hash do conteúdo junto com as opções de
+conversão; o arquivo só é relido quando tamanho ou data de modificação mudam,
+e só é reconvertido quando o hash muda. Headers e manifesto são gravados de
+forma atômica (temporário + os.replace): o build nunca vê um arquivo pela metade.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from atlas_packer import load_icon
+from binarization import BINARIZATION_MODES, DEFAULT_THRESHOLD
+from bitmap_export import BYTE_LAYOUTS, LAYOUT_PACKERS, pack_layout, c_identifier, c_array
+from compression import COMPRESSION_FORMATS, compressed_c_code
+from file_export import write_bytes
+
+MANIFEST_NAME = '.conversor_manifest.json'
+MANIFEST_VERSION = 1
+
+# Extensões observadas
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tiff', '.txt')
+
+def icon_header(grid, name, layout='xbm', compression=None):
+    """Header C de um ícone: defines de tamanho + bytes no layout (opcionalmente comprimidos)"""
+    height, width = grid.shape
+    name = c_identifier(name)
+    upper = name.upper()
+    description, draw_call = BYTE_LAYOUTS[layout]
+    data = pack_layout(grid, layout)
+    if compression:
+        code, _ = compressed_c_code(data, compression, name, width, height,
+                                    draw_call=f"{draw_call}  // dados = buf")
+    else:
+        code = f"// {name}: {width}x{height}, {description}\n// Uso: {draw_call}\n"
+        code += f"#define {upper}_WIDTH {width}\n#define {upper}_HEIGHT {height}\n\n"
+        code += c_array(f"{name}_bits", data)
+    guard = f"{upper}_H"
+    return f"#ifndef {guard}\n#define {guard}\n\n{code}\n#endif\n"
+
+def _convert_job(job):
+    """Converte uma fonte em header; roda em processo separado. Retorna (header, erro)"""
+    path, name, size, mode, threshold, invert, layout, compression = job
+    try:
+        grid = load_icon(path, size, mode, threshold, invert)
+        return icon_header(grid, name, layout, compression), None
+    except Exception as e:  # Imagem pela metade ou inválida: tentar de novo quando mudar
+        return None, str(e)
+
+class AssetWatcher:
+    """Sincroniza os headers de output_dir com as fontes de source_dir"""
+
+    def __init__(self, source_dir, output_dir, size=None, mode='fixo', threshold=DEFAULT_THRESHOLD,
+                 invert=False, layout='xbm', compression=None, workers=None):
+        self.source_dir = source_dir
+        self.output_dir = output_dir
+        self.size = size
+        self.mode = mode
+        self.threshold = threshold
+        self.invert = invert
+        self.layout = layout
+        self.compression = compression
+        self.workers = workers
+        # Mudar qualquer opção muda todos os hashes e regenera todos os headers
+        self.options_key = json.dumps([list(size) if size else None, mode, threshold, invert,
+                                       layout, compression, MANIFEST_VERSION]).encode('utf-8')
+        self.options_digest = hashlib.sha256(self.options_key).hexdigest()[:16]
+        self.manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        self.manifest = self.load_manifest()
+
+    def load_manifest(self):
+        """Entradas do manifesto (fonte relativa -> estado); vazio se ausente ou de outra versão"""
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != MANIFEST_VERSION:
+            return {}
+        return data.get('files', {})
+
+    def save_manifest(self):
+        data = json.dumps({'version': MANIFEST_VERSION, 'files': self.manifest}, indent=1, sort_keys=True)
+        write_bytes(self.manifest_path, data.encode('utf-8'), atomic=True)
+
+    def header_name(self, relative):
+        """Nome do header de uma fonte: caminho relativo sem extensão, em identificador C"""
+        return c_identifier(os.path.splitext(relative)[0].replace(os.sep, '_'))
+
+    def scan(self):
+        """Fontes atuais: caminho relativo -> (caminho, tamanho, mtime em ns)"""
+        sources = {}
+        stack = [self.source_dir]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.'):
+                            stack.append(entry.path)
+                        elif entry.name.lower().endswith(SOURCE_EXTENSIONS) and entry.is_file():
+                            stat = entry.stat()
+                            relative = os.path.relpath(entry.path, self.source_dir)
+                            sources[relative] = (entry.path, stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                continue
+        return sources
+
+    def content_hash(self, path):
+        digest = hashlib.sha256(self.options_key)
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+        return digest.hexdigest()
+
+    def sync(self):
+        """
+        Uma passada de polling. Retorna (headers regenerados, headers removidos, erros),
+        cada um como lista de caminhos relativos das fontes.
+        Fontes que gerariam o mesmo header são reportadas como erro até uma ser renomeada.
+        """
+        sources = self.scan()
+        changed = False
+        pending = []  # (relativo, caminho, hash, tamanho, mtime, header)
+        regenerated, errors = [], []
+
+        # Fontes que gerariam o mesmo header (a.png e a.bmp, x/y.png e x_y.png)
+        owners = {}
+        for relative in sources:
+            owners.setdefault(f"{self.header_name(relative)}.h", []).append(relative)
+
+        for relative, (path, size, mtime) in sorted(sources.items()):
+            entry = self.manifest.get(relative)
+            header_file = f"{self.header_name(relative)}.h"
+            others = sorted(r for r in owners[header_file] if r != relative)
+            if others:
+                # Nenhuma das fontes em conflito é convertida; o header existente fica
+                error = f"{header_file} também seria gerado por {', '.join(others)}: renomeie uma das fontes"
+                if not (entry and entry.get('error') == error):
+                    self.manifest[relative] = {'hash': None, 'size': size, 'mtime_ns': mtime,
+                                               'header': header_file, 'options': self.options_digest,
+                                               'error': error, 'conflict': True}
+                    errors.append(relative)
+                    changed = True
+                continue
+            header = entry and os.path.join(self.output_dir, entry['header'])
+            if (entry and entry['size'] == size and entry['mtime_ns'] == mtime
+                    and entry.get('options') == self.options_digest and not entry.get('conflict')
+                    and (entry.get('error') or os.path.exists(header))):
+                continue  # Nada mudou: nem abre o arquivo
+            try:
+                digest = self.content_hash(path)
+            except OSError:
+                continue  # Removida entre o scan e a leitura
+            if entry and entry['hash'] == digest and entry['header'] == header_file and (
+                    entry.get('error') or os.path.exists(header)):
+                # Só a data mudou (ex.: arquivo salvo de novo sem alterações)
+                entry['size'], entry['mtime_ns'] = size, mtime
+                entry['options'] = self.options_digest
+                changed = True
+                continue
+            pending.append((relative, path, digest, size, mtime, header_file))
+
+        if pending:
+            os.makedirs(self.output_dir, exist_ok=True)
+            jobs = [(path, os.path.splitext(header_file)[0], self.size, self.mode, self.threshold,
+                     self.invert, self.layout, self.compression)
+                    for _, path, _, _, _, header_file in pending]
+            if len(jobs) > 1 and self.workers != 1:
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    results = list(pool.map(_convert_job, jobs))
+            else:
+                results = [_convert_job(job) for job in jobs]
+
+            for (relative, _, digest, size, mtime, header_file), (code, error) in zip(pending, results):
+                entry = {'hash': digest, 'size': size, 'mtime_ns': mtime, 'header': header_file,
+                         'options': self.options_digest}
+                if error is None:
+                    write_bytes(os.path.join(self.output_dir, header_file), code.encode('utf-8'), atomic=True)
+                    regenerated.append(relative)
+                else:
+                    entry['error'] = error
+                    errors.append(relative)
+                self.manifest[relative] = entry
+                changed = True
+
+        # Fontes apagadas: remover o header gerado, se nenhuma outra fonte o usa
+        removed = []
+        in_use = {entry['header'] for relative, entry in self.manifest.items() if relative in sources}
+        for relative in sorted(set(self.manifest) - set(sources)):
+            entry = self.manifest.pop(relative)
+            if entry['header'] not in in_use:
+                try:
+                    os.remove(os.path.join(self.output_dir, entry['header']))
+                except OSError:
+                    pass
+            removed.append(relative)
+            changed = True
+
+        if changed:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self.save_manifest()
+        return regenerated, removed, errors
+
+    def run(self, interval=1.0, once=False):
+        """Faz polling até Ctrl+C (ou uma única passada com once=True)"""
+        while True:
+            regenerated, removed, errors = self.sync()
+            for relative in regenerated:
+                print(f"✅ {relative} -> {self.manifest[relative]['header']}")
+            for relative in removed:
+                print(f"🗑️ {relative} removido")
+            for relative in errors:
+                print(f"❌ {relative}: {self.manifest[relative]['error']}")
+            if once:
+                return
+            time.sleep(interval)
+
+def main():
+    """
+    Função principal
+    """
+    args = sys.argv[1:]
+    if not args or args[0].startswith('--'):
+        print("📖 USO:")
+        print("python3 asset_watcher.py <diretório de assets> [opções]")
+        print("\n🔧 OPÇÕES:")
+        print("--saida DIR      : Diretório dos headers (padrão: <assets>/include)")
+        print("--tamanho WxH    : Converte todas as imagens para este tamanho (padrão: original)")
+        print(f"--modo M         : Binarização ({', '.join(BINARIZATION_MODES)})")
+        print("--limiar N       : Limiar do modo fixo (padrão 240)")
+        print(f"--layout L       : Layout dos bytes ({', '.join(LAYOUT_PACKERS)}; padrão xbm)")
+        print(f"--compressao C   : Comprime os headers ({', '.join(COMPRESSION_FORMATS)})")
+        print("--intervalo S    : Segundos entre verificações (padrão 1)")
+        print("--processos N    : Número de processos de conversão")
+        print("--uma-vez        : Sincroniza uma vez e sai (para scripts de build)")
+        print("--inverter       : Inverte preto e branco")
+        print("\n📝 EXEMPLOS:")
+        print("python3 asset_watcher.py assets/ --saida include/icones --tamanho 16x16")
+        print("python3 asset_watcher.py assets/ --saida include/ --uma-vez")
+        return
+
+    source_dir = args[0]
+
+    def option(flag, default, convert=str):
+        if flag in args:
+            return convert(args[args.index(flag) + 1])
+        return default
+
+    def size_option(value):
+        width, height = value.split('x')
+        return int(width), int(height)
+
+    try:
+        output_dir = option('--saida', os.path.join(source_dir, 'include'))
+        size = option('--tamanho', None, size_option)
+        mode = option('--modo', 'fixo')
+        threshold = option('--limiar', DEFAULT_THRESHOLD, int)
+        layout = option('--layout', 'xbm')
+        compression = option('--compressao', None)
+        interval = option('--intervalo', 1.0, float)
+        workers = option('--processos', None, int)
+    except (IndexError, ValueError):
+        print("❌ Erro: opções inválidas (ex: --tamanho 16x16 --intervalo 0.5)")
+        return
+    if (mode not in BINARIZATION_MODES or layout not in LAYOUT_PACKERS
+            or compression not in (None,) + COMPRESSION_FORMATS):
+        print(f"❌ Erro: --modo aceita {', '.join(BINARIZATION_MODES)}, --layout {', '.join(LAYOUT_PACKERS)} "
+              f"e --compressao {', '.join(COMPRESSION_FORMATS)}")
+        return
+    if not os.path.isdir(source_dir):
+        print(f"❌ Erro: diretório não encontrado: {source_dir}")
+        return
+
+    watcher = AssetWatcher(source_dir, output_dir, size, mode, threshold, '--inverter' in args,
+                           layout, compression, workers)
+    once = '--uma-vez' in args
+    if not once:
+        print(f"👀 Observando {source_dir} a cada {interval:g} s (Ctrl+C para sair)")
+    try:
+        watcher.run(interval, once)
+    except KeyboardInterrupt:
+        print("\n👋 Observação encerrada")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Empacotador de Atlas de Ícones
+Converte muitas imagens (ou grades ASCII em .txt) em paralelo, distribui os ícones
+em um ou mais atlas (prateleiras ou MaxRects) e gera um único header com os atlas
+em XBM, uma tabela de retângulos por ícone e uma função C que desenha um ícone.
+
+Em vez de um array por ícone (cada um com a própria sobra de bits no fim das
+linhas e a própria declaração), os ícones dividem as linhas dos atlas.
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from binarization import BINARIZATION_MODES, DEFAULT_THRESHOLD
+from bitmap_export import pack_xbm, c_identifier, c_array
+import converter_api as api
+from grid_parser import to_grid_array
+
+PACKING_METHODS = ('prateleira', 'maxrects')
+
+class AtlasError(ValueError):
+    """Ícone maior que o atlas ou entrada inválida"""
+
+def load_icon(path, size=None, mode='fixo', threshold=DEFAULT_THRESHOLD, invert=False):
+    """
+    Carrega um ícone como grade (uint8, 1 = preto).
+    .txt: grade ASCII ('#' e '.'); demais: imagem convertida pelo núcleo de binarização,
+    no tamanho size=(largura, altura) ou no tamanho original.
+    Função de módulo para poder rodar em processos separados.
+    """
+    if path.lower().endswith('.txt'):
+        with open(path, encoding='utf-8') as f:
+            lines = [line.strip() for line in f if line.strip()]
+        return to_grid_array(lines)
+
+    # A API só importa o OpenCV ao decodificar: grades em .txt não precisam dele
+    try:
+        image = api.load(path)
+    except ValueError:
+        raise AtlasError(f"Não foi possível carregar a imagem: {path}")
+    width, height = size or (image.shape[1], image.shape[0])
+    return api.binarize(image, width, height, mode, threshold, invert)
+
+def icon_names(paths):
+    """
+    Nome de cada ícone (nome do arquivo sem extensão). Arquivos que geram o mesmo
+    #define (a/wifi.png e b/wifi.png, seta-1.png e seta_1.txt) são rejeitados.
+    """
+    names = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    seen = {}
+    for path, icon_name in zip(paths, names):
+        key = c_identifier(icon_name).upper()
+        if key in seen:
+            raise AtlasError(f"{seen[key]} e {path} geram o mesmo nome de ícone ({key}); renomeie um deles")
+        seen[key] = path
+    return names
+
+def _load_icon_args(args):
+    return load_icon(*args)
+
+def load_icons(paths, size=None, mode='fixo', threshold=DEFAULT_THRESHOLD, invert=False, workers=None):
+    """Converte os arquivos em grades num conjunto de processos, mantendo a ordem"""
+    jobs = [(path, size, mode, threshold, invert) for path in paths]
+    if workers == 1 or len(jobs) < 2:
+        return [_load_icon_args(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_load_icon_args, jobs, chunksize=max(1, len(jobs) // 32)))
+
+def pack_shelf(sizes, atlas_width, atlas_height):
+    """
+    Empacotamento em prateleiras: ícones do mais alto ao mais baixo, da esquerda
+    para a direita; nova prateleira quando a linha enche, novo atlas quando a altura acaba.
+    sizes: lista de (largura, altura). Retorna lista de (atlas, x, y) na mesma ordem.
+    """
+    placements = [None] * len(sizes)
+    shelves = []  # (atlas, y, altura, x livre)
+    used_height = []  # Altura ocupada de cada atlas
+    for i in sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0])):
+        width, height = sizes[i]
+        for s, (atlas, y, shelf_height, x) in enumerate(shelves):
+            if height <= shelf_height and x + width <= atlas_width:
+                placements[i] = (atlas, x, y)
+                shelves[s] = (atlas, y, shelf_height, x + width)
+                break
+        else:
+            atlas = next((a for a, h in enumerate(used_height) if h + height <= atlas_height), None)
+            if atlas is None:
+                atlas = len(used_height)
+                used_height.append(0)
+            y = used_height[atlas]
+            used_height[atlas] += height
+            shelves.append((atlas, y, height, width))
+            placements[i] = (atlas, 0, y)
+    return placements
+
+def _split_free(free, placed):
+    """Divide os retângulos livres que tocam o retângulo colocado (MaxRects)"""
+    px, py, pw, ph = placed
+    result = []
+    for fx, fy, fw, fh in free:
+        if px >= fx + fw or px + pw <= fx or py >= fy + fh or py + ph <= fy:
+            result.append((fx, fy, fw, fh))
+            continue
+        if px > fx:
+            result.append((fx, fy, px - fx, fh))
+        if px + pw < fx + fw:
+            result.append((px + pw, fy, fx + fw - px - pw, fh))
+        if py > fy:
+            result.append((fx, fy, fw, py - fy))
+        if py + ph < fy + fh:
+            result.append((fx, py + ph, fw, fy + fh - py - ph))
+
+    # Remover retângulos contidos em outros
+    return [a for i, a in enumerate(result)
+            if not any(j != i and b[0] <= a[0] and b[1] <= a[1]
+                       and a[0] + a[2] <= b[0] + b[2] and a[1] + a[3] <= b[1] + b[3]
+                       and (b != a or j < i)
+                       for j, b in enumerate(result))]
+
+def pack_maxrects(sizes, atlas_width, atlas_height):
+    """
+    MaxRects com a regra inferior-esquerda: cada ícone, do maior para o menor, vai
+    para o retângulo livre onde sua borda de baixo fica mais alta (desempate: mais à
+    esquerda e menor sobra), o que mantém os atlas baixos para serem cortados.
+    Retorna lista de (atlas, x, y) na mesma ordem de sizes.
+    """
+    placements = [None] * len(sizes)
+    atlases = []  # Retângulos livres de cada atlas
+    for i in sorted(range(len(sizes)), key=lambda i: -sizes[i][0] * sizes[i][1]):
+        width, height = sizes[i]
+        best = None
+        for a, free in enumerate(atlases):
+            for fx, fy, fw, fh in free:
+                if width <= fw and height <= fh:
+                    score = (fy + height, fx, min(fw - width, fh - height))
+                    if best is None or score < best[0]:
+                        best = (score, a, fx, fy)
+        if best is None:
+            atlases.append([(0, 0, atlas_width, atlas_height)])
+            best = (None, len(atlases) - 1, 0, 0)
+        _, a, x, y = best
+        atlases[a] = _split_free(atlases[a], (x, y, width, height))
+        placements[i] = (a, x, y)
+    return placements
+
+PACKERS = {'prateleira': pack_shelf, 'maxrects': pack_maxrects}
+
+def build_atlases(icons, atlas_width=128, atlas_height=128, method='maxrects'):
+    """
+    Distribui as grades dos ícones em atlas.
+    Retorna (lista de atlas (uint8, altura x atlas_width), lista de (atlas, x, y, largura, altura)).
+    Cada atlas é cortado na última linha ocupada.
+    """
+    if method not in PACKERS:
+        raise AtlasError(f"Método de empacotamento desconhecido: {method}")
+    sizes = [(icon.shape[1], icon.shape[0]) for icon in icons]
+    for width, height in sizes:
+        if width > atlas_width or height > atlas_height:
+            raise AtlasError(f"Ícone {width}x{height} não cabe no atlas {atlas_width}x{atlas_height}")
+
+    placements = PACKERS[method](sizes, atlas_width, atlas_height)
+    count = max((a for a, _, _ in placements), default=-1) + 1
+    used = [0] * count
+    for (a, _, y), (_, height) in zip(placements, sizes):
+        used[a] = max(used[a], y + height)
+
+    atlases = [np.zeros((used[a], atlas_width), dtype=np.uint8) for a in range(count)]
+    rects = []
+    for icon, (a, x, y) in zip(icons, placements):
+        height, width = icon.shape
+        atlases[a][y:y + height, x:x + width] = icon
+        rects.append((a, x, y, width, height))
+    return atlases, rects
+
+def rect_layout(atlases):
+    """
+    (tipo C das coordenadas e dimensões, bytes por retângulo): uint8_t se os atlas
+    têm até 255 pixels de lado (a largura de um ícone pode chegar ao lado do atlas)
+    """
+    largest = max((max(atlas.shape) for atlas in atlases), default=0)
+    return ('uint8_t', 5) if largest <= 255 else ('uint16_t', 9)
+
+def atlas_stats(icons, atlases):
+    """Flash dos arrays individuais contra atlas + tabela de retângulos"""
+    _, rect_bytes = rect_layout(atlases)
+    separate = sum(icon.shape[0] * ((icon.shape[1] + 7) // 8) for icon in icons)
+    packed = sum(atlas.shape[0] * ((atlas.shape[1] + 7) // 8) for atlas in atlases)
+    packed += rect_bytes * len(icons)
+    return {'icons': len(icons), 'atlases': len(atlases), 'separate_bytes': separate,
+            'atlas_bytes': packed, 'saved_bytes': separate - packed}
+
+_C_DRAW = """// Desenha o ícone i com o canto superior esquerdo em (x, y), pixel a pixel
+static void {name}_draw(u8g2_t *u8g2, uint16_t i, int16_t x, int16_t y) {{
+  {name}_rect_t r;
+  memcpy_P(&r, &{name}_rects[i], sizeof(r));
+  const uint8_t *atlas = (const uint8_t *)pgm_read_ptr(&{name}_atlases[r.atlas]);
+  for ({coord_type} dy = 0; dy < r.h; dy++) {{
+    const uint8_t *row = atlas + (uint32_t)(r.y + dy) * {upper}_ROW_BYTES;  // Atlas pode passar de 64 KiB
+    for ({coord_type} dx = 0; dx < r.w; dx++) {{
+      uint16_t px = r.x + dx;
+      if (pgm_read_byte(row + (px >> 3)) & (1 << (px & 7))) u8g2_DrawPixel(u8g2, x + dx, y + dy);
+    }}
+  }}
+}}
+"""
+
+def atlas_c_code(names, icons, atlases, rects, name='icones'):
+    """Header C com os atlas, a tabela de retângulos, um #define por ícone e a função de desenho"""
+    name = c_identifier(name)
+    upper = name.upper()
+    atlas_width = atlases[0].shape[1] if atlases else 0
+    stats = atlas_stats(icons, atlases)
+
+    code = f"// {stats['icons']} ícones em {stats['atlases']} atlas de {atlas_width} colunas (XBM)\n"
+    code += (f"// {stats['atlas_bytes']} bytes de flash com a tabela de retângulos "
+             f"(arrays separados: {stats['separate_bytes']} bytes)\n")
+    code += "#include <stdint.h>\n#include <string.h>\n\n"
+    code += f"#define {upper}_ATLAS_WIDTH {atlas_width}\n"
+    code += f"#define {upper}_ROW_BYTES {(atlas_width + 7) // 8}\n"
+    code += f"#define {upper}_COUNT {len(icons)}\n"
+    for i, icon_name in enumerate(names):
+        code += f"#define {upper}_{c_identifier(icon_name).upper()} {i}\n"
+    code += "\n"
+
+    for a, atlas in enumerate(atlases):
+        code += c_array(f"{name}_atlas_{a}", pack_xbm(atlas),
+                        comment=f"Atlas {a}: {atlas_width}x{atlas.shape[0]}")
+        code += "\n"
+    code += f"static const uint8_t * const {name}_atlases[] PROGMEM = {{\n"
+    code += ''.join(f"  {name}_atlas_{a},\n" for a in range(len(atlases)))
+    code += "};\n\n"
+
+    coord_type, _ = rect_layout(atlases)
+    code += f"typedef struct {{ {coord_type} x, y; uint8_t atlas; {coord_type} w, h; }} {name}_rect_t;\n\n"
+    code += f"static const {name}_rect_t {name}_rects[] PROGMEM = {{\n"
+    for icon_name, (a, x, y, width, height) in zip(names, rects):
+        code += f"  {{{x}, {y}, {a}, {width}, {height}}},  // {icon_name}\n"
+    code += "};\n\n"
+    code += _C_DRAW.format(name=name, upper=upper, coord_type=coord_type)
+    return code, stats
+
+def main():
+    """
+    Função principal
+    """
+    args = sys.argv[1:]
+    if not args or args[0].startswith('--'):
+        print("📖 USO:")
+        print("python3 atlas_packer.py <imagens ou .txt...> [opções]")
+        print("\n🔧 OPÇÕES:")
+        print("--atlas WxH      : Tamanho máximo de cada atlas (padrão 128x128)")
+        print(f"--metodo M       : Empacotamento ({', '.join(PACKING_METHODS)}, padrão maxrects)")
+        print("--tamanho WxH    : Converte todas as imagens para este tamanho (padrão: original)")
+        print(f"--modo M         : Binarização ({', '.join(BINARIZATION_MODES)})")
+        print("--limiar N       : Limiar do modo fixo (padrão 240)")
+        print("--processos N    : Número de processos de conversão")
+        print("--nome NOME      : Prefixo dos símbolos C (padrão icones)")
+        print("--saida ARQ      : Header de saída (padrão icones.h)")
+        print("\n📝 EXEMPLOS:")
+        print("python3 atlas_packer.py icones/*.png --tamanho 16x16 --saida icones.h")
+        print("python3 atlas_packer.py wifi.png bateria.png seta.txt --atlas 128x64 --metodo prateleira")
+        return
+
+    # Arquivos de entrada: tudo antes da primeira opção
+    first_option = next((i for i, a in enumerate(args) if a.startswith('--')), len(args))
+    paths = args[:first_option]
+
+    def option(flag, default, convert=str):
+        if flag in args:
+            return convert(args[args.index(flag) + 1])
+        return default
+
+    def size_option(value):
+        width, height = value.split('x')
+        return int(width), int(height)
+
+    try:
+        atlas_width, atlas_height = option('--atlas', (128, 128), size_option)
+        method = option('--metodo', 'maxrects')
+        size = option('--tamanho', None, size_option)
+        mode = option('--modo', 'fixo')
+        threshold = option('--limiar', DEFAULT_THRESHOLD, int)
+        workers = option('--processos', None, int)
+        name = option('--nome', 'icones')
+        output = option('--saida', f"{name}.h")
+    except (IndexError, ValueError):
+        print("❌ Erro: opções inválidas (ex: --atlas 128x64 --tamanho 16x16)")
+        return
+    if method not in PACKING_METHODS or mode not in BINARIZATION_MODES:
+        print(f"❌ Erro: --metodo deve ser {', '.join(PACKING_METHODS)} e --modo um de {', '.join(BINARIZATION_MODES)}")
+        return
+
+    print(f"🖼️ Convertendo {len(paths)} ícones...")
+    try:
+        names = icon_names(paths)
+        icons = load_icons(paths, size, mode, threshold, '--inverter' in args, workers)
+        atlases, rects = build_atlases(icons, atlas_width, atlas_height, method)
+    except (AtlasError, OSError) as e:
+        print(f"❌ Erro: {e}")
+        return
+
+    code, stats = atlas_c_code(names, icons, atlases, rects, name)
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write(code)
+    print(f"✅ {stats['icons']} ícones em {stats['atlases']} atlas gravados em {output}")
+    print(f"💾 {stats['atlas_bytes']} bytes de flash (arrays separados: {stats['separate_bytes']} bytes, "
+          f"economia de {stats['saved_bytes']} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de Binarização
+Reduz imagens (ou máscaras de pixels) para o tamanho da grade e decide
+preto/branco de cada célula com operações vetorizadas (numpy).
+"""
+
+import numpy as np
+
+# OpenCV é opcional aqui: só o modo adaptativo depende dele
+try:
+    import cv2
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+
+# Modos de binarização disponíveis
+BINARIZATION_MODES = ('fixo', 'otsu', 'adaptativo', 'bayer', 'floyd-steinberg')
+
+# Limiar padrão do modo fixo: cinza acima disso é branco
+DEFAULT_THRESHOLD = 240
+
+# Matriz de Bayer 8x8 normalizada para limiares de 0 a 255
+_BAYER = np.zeros((1, 1), dtype=int)
+for _ in range(3):
+    _BAYER = np.block([[4 * _BAYER, 4 * _BAYER + 2], [4 * _BAYER + 3, 4 * _BAYER + 1]])
+BAYER_THRESHOLDS = (_BAYER + 0.5) * (255.0 / 64)
+
+# Fração mínima de pixels coloridos no bloco para a célula ficar preta
+# (baixa o suficiente para traços de 1 pixel sobreviverem a reduções de até 10x)
+DEFAULT_COVERAGE_THRESHOLD = 0.1
+
+def block_edges(source_size, target_size):
+    """
+    Limites (início, fim) dos blocos de origem de cada célula de destino.
+    Cada bloco tem pelo menos 1 pixel, mesmo ao ampliar.
+    """
+    starts = (np.arange(target_size) * source_size) // target_size
+    ends = (np.arange(1, target_size + 1) * source_size) // target_size
+    ends = np.maximum(ends, starts + 1)
+    return starts, ends
+
+def block_mean(values, target_width, target_height):
+    """
+    Média dos valores em cada bloco de origem que corresponde a uma célula
+    da grade, calculada com uma imagem integral (uma passada na imagem).
+    Retorna um array float (target_height x target_width).
+    """
+    height, width = values.shape
+
+    # Imagem integral com uma linha e uma coluna de zeros no início
+    dtype = np.int64 if values.dtype.kind in 'biu' else np.float64
+    integral = np.zeros((height + 1, width + 1), dtype=dtype)
+    np.cumsum(np.cumsum(values, axis=0, dtype=dtype), axis=1, out=integral[1:, 1:])
+
+    y0, y1 = block_edges(height, target_height)
+    x0, x1 = block_edges(width, target_width)
+    sums = (integral[np.ix_(y1, x1)] - integral[np.ix_(y0, x1)]
+            - integral[np.ix_(y1, x0)] + integral[np.ix_(y0, x0)])
+    areas = np.outer(y1 - y0, x1 - x0)
+    return sums / areas
+
+def block_coverage(mask, target_width, target_height):
+    """
+    Fração de pixels marcados em cada bloco da máscara que corresponde a uma
+    célula da grade. Retorna um array float com valores de 0 a 1.
+    """
+    return block_mean(mask, target_width, target_height)
+
+def binarize_coverage(coverage, threshold=DEFAULT_COVERAGE_THRESHOLD):
+    """Converte frações de cobertura em array 0/255 (255 = preto), como process_image()"""
+    black = (coverage > 0) & (coverage >= threshold)
+    return np.where(black, 255, 0).astype(np.uint8)
+
+def to_grayscale(image):
+    """
+    Converte imagem BGR/BGRA/cinza do OpenCV em (cinza float32 0-255, máscara de pixels visíveis).
+    Pixels transparentes (alpha < 128) ficam brancos (255) no cinza.
+    """
+    height, width = image.shape[:2]
+    channels = image.shape[2] if len(image.shape) > 2 else 1
+
+    if channels == 1:
+        gray = image.reshape(height, width).astype(np.float32)
+        visible = np.ones((height, width), dtype=bool)
+    else:
+        b = image[:, :, 0].astype(np.float32)
+        g = image[:, :, 1].astype(np.float32)
+        r = image[:, :, 2].astype(np.float32)
+        gray = 0.299 * r + 0.587 * g + 0.114 * b
+        visible = image[:, :, 3] >= 128 if channels == 4 else np.ones((height, width), dtype=bool)
+        gray[~visible] = 255
+
+    return gray, visible
+
+def otsu_threshold(gray):
+    """Limiar de Otsu calculado sobre o histograma (vetorizado, sem OpenCV)"""
+    hist = np.bincount(np.clip(gray, 0, 255).astype(np.uint8).ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256)
+    weight_low = np.cumsum(hist)
+    weight_high = weight_low[-1] - weight_low
+    sum_low = np.cumsum(hist * levels)
+    mean_low = sum_low / np.maximum(weight_low, 1)
+    mean_high = (sum_low[-1] - sum_low) / np.maximum(weight_high, 1)
+    variance = weight_low * weight_high * (mean_low - mean_high) ** 2
+    return int(np.argmax(variance))
+
+def floyd_steinberg(gray, levels=2):
+    """
+    Difusão de erro de Floyd–Steinberg exata, processada em frentes de onda:
+    o pixel (y, x) só depende de vizinhos com x + 2y menor, então todos os pixels
+    com o mesmo x + 2y são quantizados juntos (largura + 2 * altura passos).
+    Retorna máscara booleana (True = preto); com levels > 2, quantiza para
+    levels tons igualmente espaçados e retorna o cinza quantizado (float32 0-255).
+    """
+    height, width = gray.shape
+    # Uma coluna extra de cada lado e uma linha extra embaixo recebem o erro que sai da imagem
+    stride = width + 2
+    work = np.zeros((height + 1, stride), dtype=np.float32)
+    work[:height, 1:width + 1] = gray
+    black = np.zeros((height + 1, stride), dtype=bool)
+    quantized = np.zeros((height + 1, stride), dtype=np.float32) if levels > 2 else None
+    step = np.float32(255 / (levels - 1))
+
+    # Em memória linear, os pixels de uma frente de onda ficam a `width` posições
+    # um do outro: cada frente é uma fatia simples (sem indexação avançada)
+    flat = work.ravel()
+    flat_black = black.ravel()
+    flat_quantized = quantized.ravel() if quantized is not None else None
+
+    for t in range(width + 2 * (height - 1)):
+        first = max(0, (t - width + 2) // 2)
+        last = min(height - 1, t // 2)
+        start = first * stride + t - 2 * first + 1
+        stop = last * stride + t - 2 * last + 2
+        wave = slice(start, stop, width)
+
+        value = flat[wave]
+        if quantized is None:
+            dark = value < 128
+            flat_black[wave] = dark
+            error = value - np.where(dark, np.float32(0), np.float32(255))
+        else:
+            tone = np.clip(np.round(value / step), 0, levels - 1) * step
+            flat_quantized[wave] = tone
+            error = value - tone
+
+        flat[start + 1:stop + 1:width] += error * (7 / 16)
+        flat[start + stride - 1:stop + stride - 1:width] += error * (3 / 16)
+        flat[start + stride:stop + stride:width] += error * (5 / 16)
+        flat[start + stride + 1:stop + stride + 1:width] += error * (1 / 16)
+
+    if quantized is not None:
+        return quantized[:height, 1:width + 1].copy()
+    return black[:height, 1:width + 1].copy()
+
+def binarize(gray, mode='fixo', threshold=DEFAULT_THRESHOLD, invert=False, visible=None):
+    """
+    Binariza uma imagem em cinza (0-255) já no tamanho da grade.
+    mode: 'fixo' (cinza <= threshold é preto), 'otsu', 'adaptativo' (OpenCV),
+          'bayer' (pontilhado ordenado) ou 'floyd-steinberg' (difusão de erro).
+    visible: máscara opcional; pixels fora dela são sempre brancos.
+    Retorna array uint8 0/255 (255 = preto), como process_image().
+    """
+    gray = np.asarray(gray, dtype=np.float32)
+    if invert:
+        gray = 255 - gray
+
+    if mode == 'fixo':
+        black = gray <= threshold
+    elif mode == 'otsu':
+        black = gray <= otsu_threshold(gray)
+    elif mode == 'adaptativo':
+        if not OPENCV_AVAILABLE:
+            raise RuntimeError("O modo adaptativo requer OpenCV (pip install opencv-python)")
+        # Vizinhança ímpar proporcional ao tamanho da imagem
+        block = max(3, (min(gray.shape) // 8) | 1)
+        white = cv2.adaptiveThreshold(np.clip(gray, 0, 255).astype(np.uint8), 255,
+                                      cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block, 2)
+        black = white == 0
+    elif mode == 'bayer':
+        height, width = gray.shape
+        tiled = np.tile(BAYER_THRESHOLDS, (height // 8 + 1, width // 8 + 1))[:height, :width]
+        black = gray < tiled
+    elif mode == 'floyd-steinberg':
+        black = floyd_steinberg(gray)
+    else:
+        raise ValueError(f"Modo de binarização desconhecido: {mode}")
+
+    if visible is not None:
+        black &= visible
+    return np.where(black, 255, 0).astype(np.uint8)
+
+def crop_bounds(width, height, crop):
+    """
+    Recorte por margens (esquerda, topo, direita, base) em frações de 0 a 1.
+    Retorna (x0, y0, x1, y1); o recorte tem sempre pelo menos 1 pixel.
+    """
+    left, top, right, bottom = crop
+    x0 = min(int(round(left * width)), width - 1)
+    y0 = min(int(round(top * height)), height - 1)
+    x1 = max(int(round((1.0 - right) * width)), x0 + 1)
+    y1 = max(int(round((1.0 - bottom) * height)), y0 + 1)
+    return x0, y0, x1, y1
+
+def reduce_gray(gray, visible, width, height):
+    """
+    Redução de todas as conversões: cinza e máscara de visíveis (de to_grayscale)
+    -> (cinza float32 0-255, máscara de células visíveis) no tamanho da grade.
+    Pixels transparentes contam como brancos na média; uma célula é visível se
+    pelo menos metade da sua área é opaca.
+    """
+    if OPENCV_AVAILABLE:
+        gray = cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA)
+        opacity = cv2.resize(visible.astype(np.float32), (width, height), interpolation=cv2.INTER_AREA)
+    else:
+        gray = block_mean(gray, width, height).astype(np.float32)
+        opacity = block_mean(visible, width, height)
+    return gray, opacity >= 0.5
+
+def prepare_gray(image, width, height):
+    """
+    Reduz uma imagem BGR/BGRA/cinza do OpenCV para o tamanho da grade.
+    Retorna (cinza float32 0-255, máscara de células visíveis), prontos para binarize().
+    """
+    gray, visible = to_grayscale(image)
+    return reduce_gray(gray, visible, width, height)
+
+def image_to_binary(image, width, height, mode='fixo', threshold=DEFAULT_THRESHOLD, invert=False):
+    """
+    Núcleo de conversão compartilhado: imagem do OpenCV -> array 0/255
+    (255 = preto) no tamanho width x height.
+    """
+    gray, visible = prepare_gray(image, width, height)
+    return binarize(gray, mode, threshold, invert, visible)
+
+class SourcePlanes:
+    """
+    Planos da imagem de origem (cinza, opacidade e, opcionalmente, pixels coloridos),
+    convertidos uma vez por imagem. Ajustes de recorte e de tamanho só refazem a
+    redução, sempre na resolução original e com reduce_gray(): a prévia da
+    importação dá exatamente a grade de prepare_gray() e do converter_api.
+    """
+
+    def __init__(self, image, colored_mask=None):
+        self.gray, self.visible = to_grayscale(image)
+        self.colored_mask = None
+        if colored_mask is not None and colored_mask.shape == self.gray.shape:
+            self.colored_mask = colored_mask
+
+    @property
+    def has_coverage(self):
+        return self.colored_mask is not None
+
+    @property
+    def shape(self):
+        """(altura, largura) da imagem de origem"""
+        return self.gray.shape
+
+    def sample(self, width, height, crop=(0, 0, 0, 0)):
+        """
+        Reduz o recorte para width x height.
+        crop: margens (esquerda, topo, direita, base) em frações de 0 a 1 removidas da imagem.
+        Retorna (cinza float32, máscara de visíveis, cobertura ou None), prontos para binarize().
+        """
+        source_height, source_width = self.shape
+        x0, y0, x1, y1 = crop_bounds(source_width, source_height, crop)
+        gray, visible = reduce_gray(self.gray[y0:y1, x0:x1], self.visible[y0:y1, x0:x1], width, height)
+        coverage = None
+        if self.has_coverage:
+            coverage = block_coverage(self.colored_mask[y0:y1, x0:x1], width, height)
+        return gray, visible, coverage
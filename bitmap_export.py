@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Exportação de Bitmaps
+Empacota o modelo da grade (array uint8, 1 = preto) nos bytes do formato XBM
+usado por u8g2.drawXBM() e gera os arrays em código C.
+"""
+
+import re
+import sys
+
+import numpy as np
+
+def pack_xbm(grid):
+    """
+    Empacota a grade no formato XBM: cada linha completada com branco até
+    múltiplo de 8 colunas, bit 0 (LSB) = pixel da esquerda.
+    Retorna array uint8 com altura * ceil(largura / 8) bytes.
+    """
+    grid = np.asarray(grid) != 0
+    pad = (-grid.shape[1]) % 8
+    if pad:
+        grid = np.pad(grid, ((0, 0), (0, pad)))
+    return np.packbits(grid, axis=1, bitorder='little').ravel()
+
+def c_identifier(name):
+    """Converte um nome qualquer (ex.: nome de arquivo) em identificador C válido"""
+    name = re.sub(r'\W', '_', name.strip(), flags=re.ASCII) or 'bitmap'
+    return f"_{name}" if name[0].isdigit() else name
+
+def format_c_bytes(data, per_line=16, indent='  '):
+    """Bytes em hexadecimal ('0x00, 0x1F, ...'), per_line por linha"""
+    data = np.asarray(data, dtype=np.uint8)
+    hex_bytes = [f"0x{b:02X}" for b in data.tolist()]
+    lines = [', '.join(hex_bytes[i:i + per_line]) for i in range(0, len(hex_bytes), per_line)]
+    return ',\n'.join(indent + line for line in lines)
+
+def c_array(name, data, comment=None, storage='static const unsigned char', attribute='PROGMEM'):
+    """Array C com os bytes (ex.: static const unsigned char nome[] PROGMEM = {...};)"""
+    header = f"// {comment}\n" if comment else ""
+    body = format_c_bytes(data)
+    return f"{header}{storage} {name}[] {attribute} = {{\n{body}\n}};\n"
+
+# Layouts de bytes suportados -> (descrição, como desenhar no dispositivo)
+BYTE_LAYOUTS = {
+    'xbm': ("XBM: linhas, bit 0 = pixel da esquerda",
+            "u8g2.drawXBMP(x, y, largura, altura, dados);"),
+    'msb': ("Linhas, bit 7 = pixel da esquerda",
+            "u8g2.drawBitmap(x, y, largura / 8, altura, dados);"),
+    'ssd1306': ("Páginas verticais SSD1306/SH1106: 8 linhas por byte, bit 0 = linha de cima",
+                "memcpy_P(u8g2.getBufferPtr(), dados, sizeof(dados));  // grade do tamanho do display"),
+    'tiles': ("Tiles 8x8 do u8g2/u8x8: 8 bytes verticais por tile, tiles da esquerda para a direita",
+              "u8x8.drawTile(coluna, linha, tiles_por_linha, dados + linha * tiles_por_linha * 8);"),
+}
+
+def _pad_to(grid, row_multiple, col_multiple):
+    """Completa a grade com branco até múltiplos das dimensões indicadas"""
+    pad_rows = (-grid.shape[0]) % row_multiple
+    pad_cols = (-grid.shape[1]) % col_multiple
+    if pad_rows or pad_cols:
+        grid = np.pad(grid, ((0, pad_rows), (0, pad_cols)))
+    return grid
+
+def pack_msb(grid):
+    """Linhas completadas até múltiplo de 8 colunas, bit 7 (MSB) = pixel da esquerda"""
+    grid = _pad_to(np.asarray(grid) != 0, 1, 8)
+    return np.packbits(grid, axis=1, bitorder='big').ravel()
+
+def pack_vertical_pages(grid, col_multiple=1):
+    """
+    Páginas verticais (SSD1306/SH1106): para cada faixa de 8 linhas, um byte por
+    coluna, bit k = linha k da faixa (LSB em cima). Altura completada até múltiplo de 8.
+    """
+    grid = _pad_to(np.asarray(grid) != 0, 8, col_multiple)
+    pages = grid.reshape(grid.shape[0] // 8, 8, grid.shape[1]).transpose(0, 2, 1)
+    return np.packbits(pages, axis=2, bitorder='little').ravel()
+
+def pack_tiles(grid):
+    """
+    Tiles 8x8 do u8g2/u8x8 (drawTile): cada tile são 8 bytes verticais (LSB em cima),
+    tiles em ordem de linha. É a ordem de páginas com largura completada até múltiplo de 8.
+    """
+    return pack_vertical_pages(grid, col_multiple=8)
+
+LAYOUT_PACKERS = {
+    'xbm': pack_xbm,
+    'msb': pack_msb,
+    'ssd1306': pack_vertical_pages,
+    'tiles': pack_tiles,
+}
+
+def pack_layout(grid, layout='xbm'):
+    """Empacota a grade no layout de bytes indicado (BYTE_LAYOUTS)"""
+    if layout not in LAYOUT_PACKERS:
+        raise ValueError(f"Layout desconhecido: {layout}")
+    return LAYOUT_PACKERS[layout](grid)
+
+def decode_layout_reference(data, layout, width, height):
+    """
+    Decodificador de referência, pixel a pixel e sem numpy, escrito a partir da
+    definição de cada layout. Retorna a grade como lista de listas (1 = preto).
+    """
+    data = bytes(data)
+    row_bytes = (width + 7) // 8
+    columns = width if layout == 'ssd1306' else row_bytes * 8
+    grid = [[0] * width for _ in range(height)]
+    for y in range(height):
+        for x in range(width):
+            if layout == 'xbm':
+                bit = data[y * row_bytes + x // 8] >> (x % 8)
+            elif layout == 'msb':
+                bit = data[y * row_bytes + x // 8] >> (7 - x % 8)
+            elif layout in ('ssd1306', 'tiles'):
+                bit = data[(y // 8) * columns + x] >> (y % 8)
+            else:
+                raise ValueError(f"Layout desconhecido: {layout}")
+            grid[y][x] = bit & 1
+    return grid
+
+def self_test():
+    """Empacota grades aleatórias em cada layout e confere com o decodificador de referência"""
+    rng = np.random.default_rng(0)
+    ok = True
+    for width, height in ((8, 8), (1, 1), (13, 7), (20, 31), (128, 64), (200, 200)):
+        grid = (rng.random((height, width)) < 0.5).astype(np.uint8)
+        for layout in LAYOUT_PACKERS:
+            decoded = decode_layout_reference(pack_layout(grid, layout), layout, width, height)
+            if decoded != grid.tolist():
+                ok = False
+                print(f"❌ {layout} {width}x{height}: decodificação não confere")
+    print("✅ Todos os layouts conferem" if ok else "❌ Falha nos layouts")
+    return ok
+
+if __name__ == "__main__":
+    if '--teste' in sys.argv:
+        sys.exit(0 if self_test() else 1)
+    print("📖 USO:")
+    print("python3 bitmap_export.py --teste  : Verifica os layouts de bytes (XBM, MSB, SSD1306, tiles)")
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compressão de Bitmaps para Flash
+Comprime os bytes do bitmap (saída de converte()) em dois formatos simples,
+cada um com um decodificador C pequeno incluído no header gerado:
+
+RLE (estilo PackBits, em ordem de linhas):
+    controle c < 128:  copiar os próximos c + 1 bytes literais (1 a 128)
+    controle c >= 128: repetir o próximo byte c - 125 vezes (3 a 130)
+
+LZ (LZ77 com janela de 64 KB):
+    controle c < 128:  copiar os próximos c + 1 bytes literais (1 a 128)
+    controle c >= 128: copiar (c & 0x7F) + 3 bytes (3 a 130) que começam
+                       d + 1 bytes atrás, com d nos 2 bytes seguintes (little-endian);
+                       a cópia pode sobrepor o destino (repetições)
+
+Uso: python3 compression.py --teste   (verificação de ida e volta)
+"""
+
+import sys
+
+import numpy as np
+
+from bitmap_export import pack_xbm, c_identifier, c_array
+
+COMPRESSION_FORMATS = ('rle', 'lz')
+
+MAX_LITERAL = 128
+MIN_RUN = 3
+MAX_RUN = 130
+MAX_DISTANCE = 65536
+
+def _as_bytes(data):
+    """Aceita bytes, bytearray, lista ou array numpy de bytes"""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return bytes(data)
+    return np.asarray(data, dtype=np.uint8).tobytes()
+
+def _runs(data):
+    """(inícios, comprimentos) das sequências de bytes iguais, de forma vetorizada"""
+    data = np.asarray(data, dtype=np.uint8)
+    if len(data) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(data)) + 1))
+    lengths = np.diff(np.concatenate((starts, [len(data)])))
+    return starts, lengths
+
+def _flush_literals(out, literals):
+    """Grava literais pendentes em blocos de até MAX_LITERAL bytes"""
+    for i in range(0, len(literals), MAX_LITERAL):
+        chunk = literals[i:i + MAX_LITERAL]
+        out.append(len(chunk) - 1)
+        out.extend(chunk)
+    literals.clear()
+
+def rle_encode(data):
+    """Codifica bytes em RLE (controle + literais/repetição). Retorna bytes"""
+    data = _as_bytes(data)
+    out = bytearray()
+    literals = bytearray()
+    starts, lengths = _runs(np.frombuffer(data, dtype=np.uint8))
+    for start, length in zip(starts.tolist(), lengths.tolist()):
+        value = data[start]
+        # Sequências curtas ficam mais baratas como literais
+        while length >= MIN_RUN:
+            _flush_literals(out, literals)
+            count = min(length, MAX_RUN)
+            if length - count and length - count < MIN_RUN:
+                count = length - MIN_RUN  # Deixa sobra suficiente para outra repetição
+            out.append(count + 125)
+            out.append(value)
+            length -= count
+        literals.extend(bytes([value]) * length)
+    _flush_literals(out, literals)
+    return bytes(out)
+
+def rle_decode(data):
+    """Decodificador de referência do RLE (mesma lógica do decodificador C)"""
+    out = bytearray()
+    i = 0
+    while i < len(data):
+        control = data[i]
+        if control < 128:
+            out.extend(data[i + 1:i + 2 + control])
+            i += control + 2
+        else:
+            out.extend(bytes([data[i + 1]]) * (control - 125))
+            i += 2
+    return bytes(out)
+
+def lz_encode(data):
+    """
+    Codifica bytes em LZ77 guloso: procura a maior repetição (3 a 130 bytes) nas
+    ocorrências anteriores do mesmo prefixo de 3 bytes. Retorna bytes.
+    """
+    data = _as_bytes(data)
+    size = len(data)
+    out = bytearray()
+    literals = bytearray()
+    chains = {}  # Prefixo de 3 bytes -> posições anteriores (mais recentes no fim)
+    i = 0
+
+    def remember(position):
+        if position + MIN_RUN <= size:
+            chains.setdefault(data[position:position + MIN_RUN], []).append(position)
+
+    while i < size:
+        best_length = 0
+        best_distance = 0
+        if i + MIN_RUN <= size:
+            limit = min(MAX_RUN, size - i)
+            candidates = chains.get(data[i:i + MIN_RUN], ())
+            # As 32 ocorrências mais recentes bastam para bitmaps
+            for start in reversed(candidates[-32:]):
+                if i - start > MAX_DISTANCE:
+                    break
+                length = MIN_RUN
+                while length < limit and data[start + length] == data[i + length]:
+                    length += 1
+                if length > best_length:
+                    best_length, best_distance = length, i - start
+                    if length == limit:
+                        break
+
+        if best_length >= MIN_RUN:
+            _flush_literals(out, literals)
+            distance = best_distance - 1
+            out.extend((0x80 | (best_length - MIN_RUN), distance & 0xFF, distance >> 8))
+            for position in range(i, i + best_length):
+                remember(position)
+            i += best_length
+        else:
+            literals.append(data[i])
+            remember(i)
+            i += 1
+
+    _flush_literals(out, literals)
+    return bytes(out)
+
+def lz_decode(data):
+    """Decodificador de referência do LZ (mesma lógica do decodificador C)"""
+    out = bytearray()
+    i = 0
+    while i < len(data):
+        control = data[i]
+        if control < 128:
+            out.extend(data[i + 1:i + 2 + control])
+            i += control + 2
+        else:
+            length = (control & 0x7F) + MIN_RUN
+            start = len(out) - (data[i + 1] | (data[i + 2] << 8)) - 1
+            # Byte a byte: a origem pode sobrepor o que está sendo escrito
+            for k in range(length):
+                out.append(out[start + k])
+            i += 3
+    return bytes(out)
+
+ENCODERS = {'rle': rle_encode, 'lz': lz_encode}
+DECODERS = {'rle': rle_decode, 'lz': lz_decode}
+
+_PGM_READ = """#ifndef pgm_read_byte
+#define pgm_read_byte(p) (*(const uint8_t *)(p))
+#endif
+"""
+
+_C_DECODERS = {
+    'rle': """// Decodifica RLE (PROGMEM) em dst; retorna o número de bytes escritos
+static {size_type} {name}_decode(const uint8_t *src, {size_type} src_len, uint8_t *dst) {{
+  {size_type} i = 0, n = 0;
+  while (i < src_len) {{
+    uint8_t c = pgm_read_byte(src + i++);
+    if (c < 128) {{
+      for (uint8_t k = 0; k <= c; k++) dst[n++] = pgm_read_byte(src + i++);
+    }} else {{
+      uint8_t v = pgm_read_byte(src + i++);
+      for (uint8_t k = 0; k < (uint8_t)(c - 125); k++) dst[n++] = v;
+    }}
+  }}
+  return n;
+}}
+""",
+    'lz': """// Decodifica LZ (PROGMEM) em dst; retorna o número de bytes escritos
+static {size_type} {name}_decode(const uint8_t *src, {size_type} src_len, uint8_t *dst) {{
+  {size_type} i = 0, n = 0;
+  while (i < src_len) {{
+    uint8_t c = pgm_read_byte(src + i++);
+    if (c < 128) {{
+      for (uint8_t k = 0; k <= c; k++) dst[n++] = pgm_read_byte(src + i++);
+    }} else {{
+      uint16_t d = pgm_read_byte(src + i) | ((uint16_t)pgm_read_byte(src + i + 1) << 8);
+      i += 2;
+      uint8_t len = (c & 0x7F) + 3;
+      const uint8_t *from = dst + n - d - 1;
+      for (uint8_t k = 0; k < len; k++) dst[n++] = from[k];
+    }}
+  }}
+  return n;
+}}
+""",
+}
+
+def size_type(*sizes):
+    """Tipo C dos tamanhos e contadores do decodificador: uint16_t até 64 KiB"""
+    return 'uint16_t' if max(sizes) <= 0xFFFF else 'uint32_t'
+
+def compression_ratio(raw_size, compressed_size):
+    """Tamanho comprimido / original (menor é melhor)"""
+    return compressed_size / raw_size if raw_size else 1.0
+
+def compressed_c_code(raw, fmt, name, width, height, draw_call=None):
+    """
+    Header C com o bitmap comprimido, o decodificador e os tamanhos.
+    raw: bytes do bitmap (saída de converte() ou de outro layout de bitmap_export).
+    draw_call: como desenhar o buffer descomprimido (padrão: u8g2.drawXBM).
+    Retorna (código, razão de compressão).
+    """
+    if fmt not in ENCODERS:
+        raise ValueError(f"Formato de compressão desconhecido: {fmt}")
+    raw = _as_bytes(raw)
+    encoded = ENCODERS[fmt](raw)
+    ratio = compression_ratio(len(raw), len(encoded))
+    name = c_identifier(name)
+    upper = name.upper()
+
+    draw_call = draw_call or f"u8g2.drawXBM(0, 0, {upper}_WIDTH, {upper}_HEIGHT, buf);"
+    code = f"// Bitmap {width}x{height} comprimido ({fmt.upper()}) - descomprimir antes de desenhar\n"
+    code += f"// {len(raw)} bytes -> {len(encoded)} bytes ({ratio * 100:.1f}% do original)\n"
+    code += "#include <stdint.h>\n"
+    code += _PGM_READ + "\n"
+    code += f"#define {upper}_WIDTH {width}\n"
+    code += f"#define {upper}_HEIGHT {height}\n"
+    code += f"#define {upper}_RAW_SIZE {len(raw)}\n"
+    code += f"#define {upper}_{fmt.upper()}_SIZE {len(encoded)}\n\n"
+    code += c_array(f"{name}_{fmt}", np.frombuffer(encoded, dtype=np.uint8))
+    code += "\n" + _C_DECODERS[fmt].format(name=f"{name}_{fmt}", size_type=size_type(len(raw), len(encoded)))
+    code += (f"\n// Uso:\n"
+             f"//   static uint8_t buf[{upper}_RAW_SIZE];\n"
+             f"//   {name}_{fmt}_decode({name}_{fmt}, {upper}_{fmt.upper()}_SIZE, buf);\n"
+             f"//   {draw_call}\n")
+    return code, ratio
+
+def _self_test_grids():
+    """Grades de teste: vazia, cheia, padrões regulares, ruído e um desenho com bordas"""
+    rng = np.random.default_rng(0)
+    grids = {
+        'vazia 8x8': np.zeros((8, 8), dtype=np.uint8),
+        'cheia 128x64': np.ones((64, 128), dtype=np.uint8),
+        'xadrez 20x31': (np.indices((31, 20)).sum(axis=0) % 2).astype(np.uint8),
+        'ruído 64x64': (rng.random((64, 64)) < 0.5).astype(np.uint8),
+        'ruído esparso 200x200': (rng.random((200, 200)) < 0.02).astype(np.uint8),
+    }
+    splash = np.zeros((64, 128), dtype=np.uint8)
+    splash[8:56, 16:112] = 1
+    splash[16:48, 24:104] = 0
+    splash[28:36, :] ^= 1
+    grids['moldura 128x64'] = splash
+    return grids
+
+def self_test():
+    """
+    Ida e volta de cada formato nas grades de teste: descomprime em Python e compara
+    com os bytes de converte() (pack_xbm). Retorna True se tudo confere.
+    """
+    ok = True
+    print(f"{'Grade':<24}{'Bytes':>7}" + ''.join(f"{fmt.upper():>14}" for fmt in COMPRESSION_FORMATS))
+    for label, grid in _self_test_grids().items():
+        raw = pack_xbm(grid).tobytes()
+        row = f"{label:<24}{len(raw):>7}"
+        for fmt in COMPRESSION_FORMATS:
+            encoded = ENCODERS[fmt](raw)
+            if DECODERS[fmt](encoded) != raw:
+                ok = False
+                row += f"{'FALHOU':>14}"
+            else:
+                row += f"{len(encoded):>6} ({compression_ratio(len(raw), len(encoded)) * 100:4.0f}%)"
+        print(row)
+
+    # Acima de 64 KiB os contadores do decodificador C não cabem em uint16_t
+    large = (np.indices((600, 1024)).sum(axis=0) % 3 == 0).astype(np.uint8)
+    for fmt in COMPRESSION_FORMATS:
+        code, _ = compressed_c_code(pack_xbm(large), fmt, 'grande', 1024, 600)
+        if 'uint32_t i = 0, n = 0;' not in code:
+            ok = False
+            print(f"❌ {fmt.upper()} 1024x600: decodificador com contadores de 16 bits")
+    print("✅ Ida e volta conferem" if ok else "❌ Falha na ida e volta")
+    return ok
+
+if __name__ == "__main__":
+    if '--teste' in sys.argv:
+        sys.exit(0 if self_test() else 1)
+    print("📖 USO:")
+    print("python3 compression.py --teste  : Verifica compressão e descompressão (RLE e LZ)")
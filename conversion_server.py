@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serviço Local de Conversão
+Servidor HTTP (asyncio) em localhost ou num socket Unix que mantém o núcleo de
+conversão carregado: vários jobs de build na mesma máquina enviam imagens e
+recebem os bytes, sem pagar a cada vez a partida do Python e o import do OpenCV.
+As conversões são distribuídas num conjunto de processos já aquecidos.
+
+    POST /converter?tamanho=16x16&modo=fixo&formato=c&nome=wifi   (corpo = PNG, JPEG, BMP...)
+    GET  /status                                                  (contadores em JSON)
+
+Parâmetros de /converter (todos opcionais):
+    tamanho   WxH da grade, até 1024x1024 (padrão: tamanho da imagem)
+    modo      cobertura, fixo, otsu, adaptativo, bayer, floyd-steinberg (padrão fixo)
+    limiar    limiar do modo fixo; inverter=1 inverte preto e branco
+    bits      1, 2 ou 4 (tons de cinza)
+    formato   c (código C), bin (bytes crus), xbm, pbm ou pgm (padrão c)
+    layout    xbm, msb, ssd1306 ou tiles; compressao rle, lz ou tileset (só em formato c, 1 bit)
+    nome      nome do array C
+
+A resposta traz o conteúdo no corpo e o tamanho da grade no cabeçalho X-Grade.
+Exemplos com curl:
+
+    curl --data-binary @wifi.png 'http://127.0.0.1:8765/converter?tamanho=16x16&formato=bin'
+    curl --unix-socket /tmp/conversor.sock --data-binary @wifi.png 'http://x/converter?nome=wifi'
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlsplit, parse_qsl
+
+# Maior imagem decodificada: o OpenCV confere as dimensões do cabeçalho antes de
+# alocar, então uma imagem pequena comprimida não força uma decodificação gigante.
+# O OpenCV lê esta variável ao ser importado: precisa vir antes dos imports abaixo.
+MAX_IMAGE_PIXELS = 4096 * 4096
+os.environ.setdefault('OPENCV_IO_MAX_IMAGE_PIXELS', str(MAX_IMAGE_PIXELS))
+
+from binarization import DEFAULT_THRESHOLD
+from bitmap_export import LAYOUT_PACKERS
+from compression import COMPRESSION_FORMATS
+from grayscale import GRAY_BITS
+import converter_api as api
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Maior corpo aceito (imagens maiores recebem 413)
+MAX_BODY = 32 * 1024 * 1024
+
+# Maior cabeçalho HTTP aceito
+MAX_HEADER = 16 * 1024
+
+# Maior lado da grade: acima disso um processo do pool pode esgotar a memória
+# (e cair) numa única requisição
+MAX_GRID_SIDE = 1024
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+class RequestError(ValueError):
+    """Requisição inválida; status é o código HTTP da resposta"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+def parse_options(query):
+    """Parâmetros de /converter (texto da query) -> dicionário validado de opções"""
+    params = dict(parse_qsl(query))
+    unknown = set(params) - {'tamanho', 'modo', 'limiar', 'inverter', 'bits', 'formato',
+                             'layout', 'compressao', 'nome'}
+    if unknown:
+        raise RequestError(f"Parâmetros desconhecidos: {', '.join(sorted(unknown))}")
+    try:
+        size = None
+        if 'tamanho' in params:
+            width, height = (int(v) for v in params['tamanho'].split('x'))
+            if width < 1 or height < 1:
+                raise ValueError
+            size = (width, height)
+        options = {
+            'size': size,
+            'mode': params.get('modo', 'fixo'),
+            'threshold': int(params.get('limiar', DEFAULT_THRESHOLD)),
+            'invert': params.get('inverter', '0') not in ('0', '', 'false'),
+            'bits': int(params.get('bits', 1)),
+            'fmt': params.get('formato', 'c'),
+            'layout': params.get('layout', 'xbm'),
+            'compression': params.get('compressao') or None,
+            'name': params.get('nome', 'icone'),
+        }
+    except ValueError:
+        raise RequestError("Parâmetros inválidos (ex: tamanho=16x16&limiar=200&bits=4)")
+    if options['size'] and max(options['size']) > MAX_GRID_SIDE:
+        raise RequestError(f"tamanho aceita no máximo {MAX_GRID_SIDE}x{MAX_GRID_SIDE}")
+    if options['mode'] not in api.MODES:
+        raise RequestError(f"modo aceita {', '.join(api.MODES)}")
+    if options['fmt'] not in api.EMIT_FORMATS:
+        raise RequestError(f"formato aceita {', '.join(api.EMIT_FORMATS)}")
+    if options['layout'] not in LAYOUT_PACKERS:
+        raise RequestError(f"layout aceita {', '.join(LAYOUT_PACKERS)}")
+    if options['bits'] not in GRAY_BITS:
+        raise RequestError(f"bits aceita {', '.join(map(str, GRAY_BITS))}")
+    if options['compression'] not in (None, 'tileset') + COMPRESSION_FORMATS:
+        raise RequestError(f"compressao aceita {', '.join(COMPRESSION_FORMATS + ('tileset',))}")
+    if options['compression'] and (options['fmt'] != 'c' or options['bits'] > 1):
+        raise RequestError("compressao só vale com formato=c e bits=1")
+    return options
+
+def _warm_up():
+    """Inicializador dos processos: carrega o OpenCV e passa uma imagem pelo núcleo"""
+    import cv2
+    image = cv2.imencode('.png', api.as_image(bytes(64), 8, 8, 1))[1]
+    api.emit(api.binarize(api.decode(image)), 'c')
+
+def convert_bytes(data, options):
+    """Converte uma imagem codificada conforme as opções. Retorna (conteúdo, largura, altura)"""
+    image = api.decode(data)
+    if image.shape[0] * image.shape[1] > MAX_IMAGE_PIXELS:
+        raise ValueError(f"Imagem {image.shape[1]}x{image.shape[0]} acima do limite de "
+                         f"{MAX_IMAGE_PIXELS // 1_000_000} megapixels")
+    width, height = options['size'] or (image.shape[1], image.shape[0])
+    if max(width, height) > MAX_GRID_SIDE:
+        raise ValueError(f"Grade {width}x{height} acima de {MAX_GRID_SIDE}x{MAX_GRID_SIDE}: "
+                         f"informe tamanho=WxH")
+    grid = api.binarize(image, width, height, options['mode'], options['threshold'],
+                        options['invert'], bits=options['bits'])
+    content = api.emit(grid, options['fmt'], options['name'], options['layout'],
+                       options['bits'], options['compression'])
+    return content, width, height
+
+class ConversionServer:
+    """Servidor HTTP mínimo (HTTP/1.1 com keep-alive) que repassa as conversões ao pool"""
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None
+        self.requests = 0
+        self.errors = 0
+        self.started = time.time()
+
+    def start_pool(self):
+        """Cria os processos e espera todos aquecerem (a primeira requisição já sai rápida)"""
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up)
+        for future in [self.pool.submit(time.sleep, 0.05) for _ in range(self.workers)]:
+            future.result()
+
+    def restart_pool(self, broken):
+        """
+        Troca um pool quebrado (um processo morreu, ex.: sem memória) por um novo, sem
+        esperar o aquecimento. Várias requisições podem ver o mesmo pool quebrado: só a
+        primeira o troca.
+        """
+        if self.pool is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    async def read_request(self, reader):
+        """Lê uma requisição. Retorna (método, caminho, cabeçalhos, corpo) ou None se a conexão fechou"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise RequestError("Requisição incompleta")
+            return None
+        except asyncio.LimitOverrunError:
+            raise RequestError("Cabeçalho grande demais", 413)
+        lines = head.decode('latin-1').split("\r\n")
+        try:
+            method, target, _ = lines[0].split(' ', 2)
+        except ValueError:
+            raise RequestError("Linha de requisição inválida")
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                headers[key.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise RequestError("Content-Length inválido")
+        if length < 0:
+            raise RequestError("Content-Length inválido")
+        if length > MAX_BODY:
+            raise RequestError(f"Imagem maior que {MAX_BODY // (1024 * 1024)} MB", 413)
+        body = await reader.readexactly(length) if length else b''
+        return method, target, headers, body
+
+    async def respond(self, method, target, body):
+        """Atende uma requisição. Retorna (status, cabeçalhos extras, corpo)"""
+        url = urlsplit(target)
+        if url.path == '/status':
+            status = {'requisicoes': self.requests, 'erros': self.errors, 'processos': self.workers,
+                      'ativo_ha_s': round(time.time() - self.started, 1)}
+            return 200, {'Content-Type': 'application/json'}, json.dumps(status).encode('utf-8')
+        if url.path != '/converter':
+            raise RequestError(f"Caminho desconhecido: {url.path} (use /converter ou /status)", 404)
+        if method != 'POST':
+            raise RequestError("Use POST com a imagem no corpo", 405)
+        if not body:
+            raise RequestError("Corpo vazio: envie os bytes da imagem")
+        options = parse_options(url.query)
+        loop = asyncio.get_running_loop()
+        pool = self.pool
+        try:
+            content, width, height = await loop.run_in_executor(pool, convert_bytes, body, options)
+        except ValueError as e:  # Imagem que o OpenCV não decodifica
+            raise RequestError(str(e))
+        except BrokenProcessPool:
+            self.restart_pool(pool)
+            raise RequestError("Processo de conversão encerrado inesperadamente; tente de novo", 503)
+        content_type = 'text/plain; charset=utf-8' if options['fmt'] in ('c', 'xbm') else 'application/octet-stream'
+        return 200, {'Content-Type': content_type, 'X-Grade': f"{width}x{height}"}, content
+
+    async def handle(self, reader, writer):
+        """Uma conexão: atende requisições em sequência até o cliente fechar"""
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except RequestError as e:
+                    # Requisição mal formada: responde e fecha (não dá para achar a próxima)
+                    keep_alive = False
+                    self.errors += 1
+                    status, extra, content = e.status, {}, f"Erro: {e}\n".encode('utf-8')
+                else:
+                    if request is None:
+                        break
+                    method, target, headers, body = request
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+                    self.requests += 1
+                    try:
+                        status, extra, content = await self.respond(method, target, body)
+                    except RequestError as e:
+                        self.errors += 1
+                        status, extra, content = e.status, {}, f"Erro: {e}\n".encode('utf-8')
+                    except Exception as e:  # Falha inesperada num processo: responde e segue servindo
+                        self.errors += 1
+                        status, extra, content = 500, {}, f"Erro: {e}\n".encode('utf-8')
+
+                head = f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\nContent-Length: {len(content)}\r\n"
+                extra.setdefault('Content-Type', 'text/plain; charset=utf-8')
+                head += ''.join(f"{key}: {value}\r\n" for key, value in extra.items())
+                if not keep_alive:
+                    head += "Connection: close\r\n"
+                writer.write(head.encode('latin-1') + b"\r\n" + content)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass  # Serviço encerrando com a conexão ainda aberta
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, ready=None):
+        """Atende até ser cancelado. ready: callback chamado com o servidor já escutando"""
+        if socket_path:
+            server = await asyncio.start_unix_server(self.handle, socket_path, limit=MAX_HEADER)
+        else:
+            server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER)
+        try:
+            async with server:
+                if ready:
+                    ready(server)
+                await server.serve_forever()
+        finally:
+            if socket_path and os.path.exists(socket_path):
+                os.remove(socket_path)
+
+async def open_client(address):
+    """Conexão com o serviço: address é (host, porta) ou o caminho do socket Unix"""
+    if isinstance(address, str):
+        return await asyncio.open_unix_connection(address)
+    return await asyncio.open_connection(*address)
+
+async def request_conversion(reader, writer, data, query=''):
+    """Envia uma imagem por uma conexão aberta (keep-alive). Retorna (status, cabeçalhos, corpo)"""
+    writer.write(f"POST /converter?{query} HTTP/1.1\r\nHost: localhost\r\n"
+                 f"Content-Length: {len(data)}\r\n\r\n".encode('latin-1') + data)
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode('latin-1').split("\r\n")
+    status = int(head[0].split(' ', 2)[1])
+    headers = {}
+    for line in head[1:]:
+        if ':' in line:
+            key, value = line.split(':', 1)
+            headers[key.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers, body
+
+def sample_image(size=64):
+    """PNG de teste: círculo e texto em fundo branco"""
+    import cv2
+    import numpy as np
+    image = np.full((size, size, 3), 255, dtype=np.uint8)
+    cv2.circle(image, (size // 2, size // 2), size // 3, (0, 0, 0), max(1, size // 16))
+    cv2.putText(image, "Ab", (size // 4, size * 3 // 5), cv2.FONT_HERSHEY_SIMPLEX, size / 96, (0, 0, 0), 1)
+    return cv2.imencode('.png', image)[1].tobytes()
+
+async def run_benchmark(address, data, query, clients, count):
+    """
+    Carga: clients conexões simultâneas, cada uma enviando count requisições em sequência.
+    Retorna (latências em segundos, tempo total, falhas).
+    """
+    latencies, failures = [], 0
+
+    async def client():
+        nonlocal failures
+        reader, writer = await open_client(address)
+        try:
+            for _ in range(count):
+                start = time.perf_counter()
+                status, _, _ = await request_conversion(reader, writer, data, query)
+                latencies.append(time.perf_counter() - start)
+                failures += status != 200
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies, time.perf_counter() - start, failures
+
+def cold_start_time(runs=3):
+    """Tempo médio de um processo novo que importa o núcleo e converte uma imagem (sem o serviço)"""
+    import subprocess
+    code = "import sys, converter_api as api; api.emit(api.binarize(api.decode(sys.stdin.buffer.read()), 16, 16))"
+    data = sample_image()
+    start = time.perf_counter()
+    for _ in range(runs):
+        subprocess.run([sys.executable, '-c', code], input=data, check=True,
+                       cwd=os.path.dirname(os.path.abspath(__file__)))
+    return (time.perf_counter() - start) / runs
+
+def benchmark(address=None, clients=8, count=50, query='tamanho=16x16&formato=bin', workers=None, data=None):
+    """
+    Mede vazão e latência do serviço em address; sem address, sobe um serviço temporário
+    num socket local. Compara com o custo de um processo novo por conversão.
+    """
+    data = data or sample_image()
+
+    async def measure():
+        if address is not None:
+            return await run_benchmark(address, data, query, clients, count)
+        server = ConversionServer(workers)
+        server.start_pool()
+        listening = asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(server.serve(DEFAULT_HOST, 0, ready=listening.set_result))
+        try:
+            port = (await listening).sockets[0].getsockname()[1]
+            await run_benchmark((DEFAULT_HOST, port), data, query, clients, 2)  # Aquecimento
+            return await run_benchmark((DEFAULT_HOST, port), data, query, clients, count)
+        finally:
+            task.cancel()
+            server.close()
+
+    latencies, elapsed, failures = asyncio.run(measure())
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print(f"📊 {len(latencies)} requisições ({clients} clientes x {count}) em {elapsed:.2f} s: "
+          f"{len(latencies) / elapsed:,.0f} req/s")
+    print(f"   latência p50 {percentile(0.5):.1f} ms, p95 {percentile(0.95):.1f} ms, "
+          f"p99 {percentile(0.99):.1f} ms; falhas: {failures}")
+    cold = cold_start_time()
+    print(f"   sem o serviço: {cold * 1000:.0f} ms por processo novo (import + conversão)")
+    return failures == 0
+
+def self_test():
+    """Sobe o serviço numa porta livre e confere respostas, erros e keep-alive"""
+    import cv2
+    import numpy as np
+    data = sample_image(48)
+    # Poucos KB comprimidos, mas 25 megapixels decodificados
+    huge = cv2.imencode('.png', np.zeros((5000, 5000), dtype=np.uint8))[1].tobytes()
+    ok = True
+
+    async def check():
+        nonlocal ok
+        server = ConversionServer(workers=2)
+        server.start_pool()
+        listening = asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(server.serve(DEFAULT_HOST, 0, ready=listening.set_result))
+        try:
+            address = (DEFAULT_HOST, (await listening).sockets[0].getsockname()[1])
+            reader, writer = await open_client(address)
+            for query, fmt in (('tamanho=16x16&formato=bin&layout=ssd1306', 'bin'),
+                               ('tamanho=24x24&nome=teste', 'c'),
+                               ('tamanho=16x16&bits=4&formato=bin', 'bin')):
+                options = parse_options(query)
+                status, headers, body = await request_conversion(reader, writer, data, query)
+                expected, width, height = convert_bytes(data, options)
+                if status != 200 or body != expected or headers.get('x-grade') != f"{width}x{height}":
+                    ok = False
+                    print(f"❌ /converter?{query}: resposta não confere ({status})")
+            writer.close()
+
+            for query, payload, code in (('modo=nenhum', data, 400), ('', b'nao e imagem', 400),
+                                         ('tamanho=20000x20000', data, 400), ('tamanho=16x16', huge, 400),
+                                         ('compressao=rle&formato=bin', data, 400),
+                                         ('compressao=lz&bits=4', data, 400)):
+                reader, writer = await open_client(address)
+                status, _, _ = await request_conversion(reader, writer, payload, query)
+                writer.close()
+                if status != code:
+                    ok = False
+                    print(f"❌ Erro esperado {code}, recebido {status} ({query or payload[:12]})")
+
+            reader, writer = await open_client(address)
+            writer.write(b"POST /converter HTTP/1.1\r\nContent-Length: -5\r\n\r\n")
+            head = await reader.readuntil(b"\r\n")
+            writer.close()
+            if b" 400 " not in head:
+                ok = False
+                print(f"❌ Content-Length negativo: {head.strip()!r}")
+
+            # Um processo que morre não pode derrubar o serviço: o pool é recriado
+            try:
+                server.pool.submit(os._exit, 1).result()
+            except BrokenProcessPool:
+                pass
+            statuses = []
+            for _ in range(2):
+                reader, writer = await open_client(address)
+                statuses.append((await request_conversion(reader, writer, data, 'tamanho=16x16'))[0])
+                writer.close()
+            if statuses != [503, 200]:
+                ok = False
+                print(f"❌ Depois de um processo encerrado: {statuses} (esperado [503, 200])")
+        finally:
+            task.cancel()
+            server.close()
+
+    asyncio.run(check())
+    print("✅ Serviço confere" if ok else "❌ Falha no serviço")
+    return ok
+
+def main():
+    """
+    Função principal
+    """
+    args = sys.argv[1:]
+    if '--teste' in args:
+        sys.exit(0 if self_test() else 1)
+    if '--ajuda' in args or '-h' in args:
+        print("📖 USO:")
+        print("python3 conversion_server.py [opções]")
+        print("python3 conversion_server.py --benchmark [opções]")
+        print("\n🔧 OPÇÕES:")
+        print(f"--host H         : Endereço (padrão {DEFAULT_HOST}; use só endereços locais)")
+        print(f"--porta N        : Porta TCP (padrão {DEFAULT_PORT})")
+        print("--socket PATH    : Escuta num socket Unix em vez de TCP")
+        print("--processos N    : Processos de conversão (padrão: número de CPUs)")
+        print("--benchmark      : Mede vazão e latência (serviço temporário, ou --porta/--socket de um ativo)")
+        print("--clientes N     : Conexões simultâneas do benchmark (padrão 8)")
+        print("--requisicoes N  : Requisições por conexão (padrão 50)")
+        print("--imagem ARQ     : Imagem enviada no benchmark (padrão: imagem sintética 64x64)")
+        print("--teste          : Verifica o serviço numa porta livre")
+        print("\n📝 EXEMPLOS:")
+        print("python3 conversion_server.py --socket /tmp/conversor.sock --processos 4")
+        print("curl --data-binary @wifi.png 'http://127.0.0.1:8765/converter?tamanho=16x16&nome=wifi'")
+        print("python3 conversion_server.py --benchmark --clientes 16 --requisicoes 100")
+        return
+
+    def option(flag, default, convert=str):
+        if flag in args:
+            return convert(args[args.index(flag) + 1])
+        return default
+
+    try:
+        host = option('--host', DEFAULT_HOST)
+        port = option('--porta', DEFAULT_PORT, int)
+        socket_path = option('--socket', None)
+        workers = option('--processos', None, int)
+        clients = option('--clientes', 8, int)
+        count = option('--requisicoes', 50, int)
+        image_path = option('--imagem', None)
+    except (IndexError, ValueError):
+        print("❌ Erro: opções inválidas (ex: --porta 8765 --processos 4)")
+        return
+
+    if '--benchmark' in args:
+        data = None
+        if image_path:
+            with open(image_path, 'rb') as f:
+                data = f.read()
+        address = socket_path or ((host, port) if '--porta' in args else None)
+        benchmark(address, clients, count, workers=workers, data=data)
+        return
+
+    server = ConversionServer(workers)
+    print(f"⏳ Aquecendo {server.workers} processos...")
+    server.start_pool()
+    where = socket_path or f"http://{host}:{port}"
+    try:
+        asyncio.run(server.serve(host, port, socket_path,
+                                 ready=lambda _: print(f"🚀 Servindo em {where} (Ctrl+C para sair)")))
+    except KeyboardInterrupt:
+        print("\n👋 Serviço encerrado")
+    finally:
+        server.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API de Conversão (sem interface gráfica)
+Núcleo de conversão para scripts de build e outros programas Python, sem
+criar janelas: analisar, binarizar, empacotar e emitir.
+
+As entradas podem ser arrays NumPy ou qualquer objeto com o protocolo de buffer
+(bytes, bytearray, memoryview, array.array, mmap...): elas são vistas como
+arrays sem cópia. As saídas são memoryview (bytes empacotados, sem cópia do
+array gerado) ou bytes (arquivos e código C).
+
+    import converter_api as api
+    grid = api.binarize(api.decode(png_bytes), 16, 16)
+    dados = api.pack(grid, 'ssd1306')           # memoryview
+    header = api.emit(grid, 'c', name='wifi')   # bytes
+
+A interface gráfica, o importador e as ferramentas de linha de comando usam
+estas mesmas funções.
+
+Uso: python3 converter_api.py --teste   (verificação de cópia zero e da saída)
+"""
+
+import sys
+
+import numpy as np
+
+from binarization import (BINARIZATION_MODES, DEFAULT_COVERAGE_THRESHOLD, DEFAULT_THRESHOLD,
+                          binarize as binarize_gray, binarize_coverage, block_coverage, crop_bounds,
+                          prepare_gray)
+from bitmap_export import BYTE_LAYOUTS, pack_layout, c_identifier
+from compression import compressed_c_code
+from file_export import FILE_FORMATS, export_bytes
+from grayscale import GRAY_MODES, gray_c_code, pack_gray, quantize_coverage, quantize_gray
+from tileset import tileset_c_code
+
+# Modos de conversão: 'cobertura' (fração de pixels coloridos) ou um modo de binarização do cinza
+MODES = ('cobertura',) + BINARIZATION_MODES
+
+# Formatos de emit(): código C ou um dos formatos de arquivo de file_export
+EMIT_FORMATS = ('c',) + tuple(FILE_FORMATS)
+
+def _view(data):
+    """Array uint8 que compartilha a memória de data (ndarray ou objeto com protocolo de buffer)"""
+    if isinstance(data, np.ndarray):
+        return data
+    view = memoryview(data)
+    if view.ndim > 1:
+        return np.asarray(view)  # Mantém a forma (ex.: memoryview de outro array)
+    return np.frombuffer(view, dtype=np.uint8)
+
+def as_image(data, width=None, height=None, channels=None):
+    """
+    Imagem no formato do OpenCV (altura x largura [x canais], uint8) sem cópia.
+    Buffers planos precisam de width e height (channels: 1, 3 = BGR ou 4 = BGRA).
+    """
+    image = _view(data)
+    if image.ndim == 1:
+        if width is None or height is None:
+            raise ValueError("Buffer plano: informe width e height")
+        channels = channels or len(image) // (width * height)
+        shape = (height, width) if channels == 1 else (height, width, channels)
+        image = image.reshape(shape)
+    return image
+
+def as_grid(data, width=None, height=None):
+    """Grade (altura x largura, não zero = preto ou nível de cinza) sem cópia"""
+    grid = _view(data)
+    if grid.ndim == 1:
+        if width is None or height is None:
+            raise ValueError("Buffer plano: informe width e height")
+        grid = grid.reshape(height, width)
+    if grid.ndim != 2:
+        raise ValueError(f"A grade deve ser 2D, recebida com forma {grid.shape}")
+    return grid
+
+def decode(data):
+    """Decodifica uma imagem codificada (PNG, JPEG, BMP...) a partir dos bytes, sem copiá-los"""
+    import cv2
+    try:
+        image = cv2.imdecode(_view(data).reshape(-1), cv2.IMREAD_UNCHANGED)
+    except cv2.error as e:  # Ex.: dimensões acima de OPENCV_IO_MAX_IMAGE_PIXELS
+        raise ValueError(f"Não foi possível decodificar a imagem ({e.err})")
+    if image is None:
+        raise ValueError("Não foi possível decodificar a imagem")
+    return image
+
+def load(path):
+    """Lê e decodifica um arquivo de imagem"""
+    with open(path, 'rb') as f:
+        return decode(f.read())
+
+def analyze(image):
+    """
+    Classifica os pixels (colorido, branco, transparente), como o pixel_analyzer.
+    Retorna dicionário com as contagens e as máscaras ('masks': colorido, branco, transparente).
+    """
+    from pixel_analyzer import classify_pixels, mask_statistics
+    masks = classify_pixels(as_image(image))
+    stats = {key: int(value) for key, value in mask_statistics(*masks).items()}
+    stats['masks'] = masks
+    return stats
+
+def quantize_sampled(gray, visible, coverage=None, mode='cobertura', threshold=DEFAULT_THRESHOLD,
+                     invert=False, coverage_threshold=DEFAULT_COVERAGE_THRESHOLD, bits=1):
+    """
+    Decide cada célula a partir da imagem já reduzida ao tamanho da grade.
+    gray/visible: cinza e células visíveis; coverage: fração de pixels coloridos (ou None).
+    Retorna a grade em níveis (0 = branco; 1 = preto, ou até 2^bits - 1 em tons de cinza).
+    Sem cobertura, 'cobertura' cai no limiar fixo.
+    """
+    if mode == 'cobertura' and coverage is not None:
+        if invert:
+            coverage = 1.0 - coverage
+        if bits > 1:
+            return quantize_coverage(coverage, bits)
+        return (binarize_coverage(coverage, coverage_threshold) == 255).astype(np.uint8)
+    if mode == 'cobertura':
+        mode = 'fixo'
+    if bits > 1:
+        # Otsu e adaptativo não têm equivalente em vários tons: arredondamento
+        return quantize_gray(gray, bits, mode if mode in GRAY_MODES else 'fixo', invert, visible)
+    return (binarize_gray(gray, mode, threshold, invert, visible) == 255).astype(np.uint8)
+
+def _crop_view(image, crop):
+    """Recorte por margens (esquerda, topo, direita, base) em frações de 0 a 1, como visão"""
+    height, width = image.shape[:2]
+    x0, y0, x1, y1 = crop_bounds(width, height, crop)
+    return image[y0:y1, x0:x1]
+
+def binarize(image, width=None, height=None, mode='cobertura', threshold=DEFAULT_THRESHOLD, invert=False,
+             coverage_threshold=DEFAULT_COVERAGE_THRESHOLD, crop=(0, 0, 0, 0), bits=1):
+    """
+    Converte uma imagem (array do OpenCV ou buffer, ver as_image) na grade width x height
+    (padrão: tamanho da imagem). Retorna a grade em níveis (uint8, 1 = preto com bits=1).
+    """
+    if mode not in MODES:
+        raise ValueError(f"Modo desconhecido: {mode}")
+    image = _crop_view(as_image(image), crop)
+    height = height or image.shape[0]
+    width = width or image.shape[1]
+    gray = visible = coverage = None
+    if mode == 'cobertura':
+        from pixel_analyzer import classify_pixels
+        coverage = block_coverage(classify_pixels(image)[0], width, height)
+    else:
+        gray, visible = prepare_gray(image, width, height)
+    return quantize_sampled(gray, visible, coverage, mode, threshold, invert, coverage_threshold, bits)
+
+def pack(grid, layout='xbm', bits=1, out=None):
+    """
+    Empacota a grade no layout de bitmap_export (ou em 2/4 bits por pixel com bits > 1).
+    Retorna memoryview dos bytes; com out (buffer gravável), grava nele e retorna a fatia usada.
+    """
+    grid = as_grid(grid)
+    packed = pack_gray(grid, bits) if bits > 1 else pack_layout(grid, layout)
+    if out is None:
+        return memoryview(packed)
+    target = memoryview(out).cast('B')
+    if len(target) < len(packed):
+        raise ValueError(f"Buffer de saída pequeno: {len(target)} bytes, necessários {len(packed)}")
+    np.frombuffer(target, dtype=np.uint8)[:len(packed)] = packed
+    return target[:len(packed)]
+
+def c_source(grid, name='icone', layout='xbm', bits=1, compression=None):
+    """
+    Código C da grade (o mesmo do botão Converter): array no layout escolhido,
+    comprimido ('rle', 'lz'), como tileset 8x8 ('tileset') ou em tons de cinza (bits > 1).
+    """
+    grid = as_grid(grid)
+    height, width = grid.shape
+    if bits > 1:
+        return gray_c_code(grid, bits, name)
+    if compression == 'tileset':
+        # Tiles 8x8 em bytes XBM (alinhados a converte), independentes do layout
+        return tileset_c_code(grid, name)[0]
+    data = pack(grid, layout)
+    description, draw_call = BYTE_LAYOUTS[layout]
+    if compression:
+        return compressed_c_code(data, compression, name, width, height,
+                                 draw_call=f"{draw_call}  // dados = buf")[0]
+
+    code = f"// Bytes para PROGMEM (u8g2) - Grade {width}x{height}\n"
+    code += f"// {height} linhas x {width} colunas = {len(data)} bytes\n"
+    code += f"// Layout: {description}\n"
+    code += f"// Uso: {draw_call}\n\n"
+    code += f"static const unsigned char {c_identifier(name)}_bits[] PROGMEM = {{\n"
+    code += ''.join(f"  0x{b:02X},\n" for b in data.tolist())
+    code += "};\n\n"
+    code += f"// Tamanho: {len(data)} bytes"
+    return code
+
+def emit(grid, fmt='c', name='icone', layout='xbm', bits=1, compression=None):
+    """Conteúdo pronto para gravar: código C ('c') ou arquivo pbm/pgm/bin/xbm. Retorna bytes"""
+    if fmt == 'c':
+        return c_source(grid, name, layout, bits, compression).encode('utf-8')
+    if fmt not in FILE_FORMATS:
+        raise ValueError(f"Formato desconhecido: {fmt} (use {', '.join(EMIT_FORMATS)})")
+    return export_bytes(as_grid(grid), fmt, name, layout, bits)
+
+def self_test():
+    """Confere que as entradas são vistas sem cópia e que as saídas batem com os módulos de origem"""
+    from bitmap_export import pack_xbm
+    rng = np.random.default_rng(0)
+    ok = True
+
+    # Grade em bytearray: a visão compartilha a memória e enxerga alterações
+    buffer = bytearray((rng.random(16 * 13) < 0.5).astype(np.uint8).tobytes())
+    grid = as_grid(buffer, 13, 16)
+    buffer[0] ^= 1
+    if grid[0, 0] != buffer[0]:
+        ok = False
+        print("❌ as_grid copiou o buffer")
+    if pack(grid).tobytes() != pack_xbm(grid).tobytes():
+        ok = False
+        print("❌ pack não confere com pack_xbm")
+
+    # Saída gravada num buffer do chamador
+    out = bytearray(64)
+    written = pack(grid, 'ssd1306', out=out)
+    out[0] ^= 0xFF
+    if written[0] != out[0] or bytes(out[1:len(written)]) != pack_layout(grid, 'ssd1306').tobytes()[1:]:
+        ok = False
+        print("❌ pack(out=...) não gravou no buffer")
+
+    # Imagem BGRA plana num bytearray -> mesma binarização do núcleo
+    # (em RGBA todo pixel opaco conta como colorido: o fundo é transparente)
+    image = np.full((32, 48, 4), 255, dtype=np.uint8)
+    image[..., 3] = 0
+    image[8:24, 12:36] = (0, 0, 0, 255)
+    raw = bytearray(image.tobytes())
+    view = as_image(raw, 48, 32, 4)
+    raw[0] = 7
+    if view[0, 0, 0] != 7:
+        ok = False
+        print("❌ as_image copiou o buffer")
+    expected = np.zeros((8, 12), dtype=np.uint8)
+    expected[2:6, 3:9] = 1
+    for mode in ('fixo', 'cobertura'):
+        if not np.array_equal(binarize(view, 12, 8, mode), expected):
+            ok = False
+            print(f"❌ binarize '{mode}' não confere")
+
+    # Prévia da importação (SourcePlanes) e binarize() dão a mesma grade
+    from binarization import SourcePlanes
+    from pixel_analyzer import classify_pixels
+    photo = np.zeros((301, 517, 4), dtype=np.uint8)
+    photo[..., :3] = rng.integers(0, 256, (301, 517, 3))
+    photo[..., :3] = np.clip(photo[..., :3] // 2 + np.arange(517)[None, :, None] // 4, 0, 255)
+    photo[..., 3] = np.where(rng.random((301, 517)) < 0.9, 255, 0)
+    source = SourcePlanes(photo, classify_pixels(photo)[0])
+    for crop in ((0, 0, 0, 0), (0.1, 0.05, 0.2, 0.15)):
+        for bits in (1, 4):
+            sampled = source.sample(128, 64, crop)
+            for mode in MODES:
+                expected = binarize(photo, 128, 64, mode, crop=crop, bits=bits)
+                if not np.array_equal(quantize_sampled(*sampled, mode=mode, bits=bits), expected):
+                    ok = False
+                    print(f"❌ Prévia da importação difere de binarize ('{mode}', {bits} bits, recorte {crop})")
+
+    for fmt in EMIT_FORMATS:
+        if not isinstance(emit(grid, fmt, 'teste'), bytes):
+            ok = False
+            print(f"❌ emit('{fmt}') não retornou bytes")
+    print("✅ API confere" if ok else "❌ Falha na API")
+    return ok
+
+if __name__ == "__main__":
+    if '--teste' in sys.argv:
+        sys.exit(0 if self_test() else 1)
+    print("📖 USO:")
+    print("python3 converter_api.py --teste  : Verifica a API (cópia zero das entradas e saídas)")
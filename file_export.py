@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Exportação Binária para Arquivos
+Grava a grade direto em arquivos para SPIFFS/LittleFS ou ferramentas de imagem,
+sem passar por texto nos widgets:
+
+    .pbm  PBM P4 (binário): cabeçalho 'P4 largura altura' + linhas, bit 7 = pixel da esquerda
+    .pgm  PGM P5 (tons de cinza, grades de 2/4 bits): um byte por pixel, 0 = preto
+    .bin  bytes crus, sem cabeçalho, no layout escolhido (XBM, MSB, SSD1306, tiles)
+          ou empacotados em 2/4 bits por pixel nas grades em tons de cinza
+    .xbm  X11 XBM padrão (#define nome_width/height + static unsigned char nome_bits[])
+
+Cada arquivo é montado inteiro na memória e gravado com uma única escrita.
+"""
+
+import os
+import re
+import sys
+import tempfile
+
+import numpy as np
+
+from binarization import BINARIZATION_MODES, DEFAULT_THRESHOLD
+from bitmap_export import pack_msb, pack_xbm, pack_layout, c_identifier, format_c_bytes, LAYOUT_PACKERS
+from grayscale import GRAY_BITS, level_count, pack_gray
+
+# Formatos de arquivo (extensão -> descrição)
+FILE_FORMATS = {
+    'pbm': "PBM P4 (imagem binária)",
+    'pgm': "PGM P5 (tons de cinza)",
+    'bin': "Bytes crus no layout escolhido",
+    'xbm': "X11 XBM",
+}
+
+def pbm_bytes(grid):
+    """PBM P4: 1 = preto, linhas completadas até byte inteiro, bit 7 = pixel da esquerda"""
+    grid = np.asarray(grid)
+    height, width = grid.shape
+    return f"P4\n{width} {height}\n".encode('ascii') + pack_msb(grid).tobytes()
+
+def pgm_bytes(levels, bits):
+    """PGM P5 com maxval 2^bits - 1 (o PGM usa 0 = preto, o oposto dos níveis da grade)"""
+    levels = np.asarray(levels)
+    height, width = levels.shape
+    top = level_count(bits) - 1
+    header = f"P5\n{width} {height}\n{top}\n".encode('ascii')
+    return header + (top - levels.astype(np.uint8)).tobytes()
+
+def raw_bytes(grid, layout='xbm', bits=1):
+    """Bytes crus sem cabeçalho: layout de bitmap_export, ou 2/4 bits por pixel em tons de cinza"""
+    if bits > 1:
+        return pack_gray(grid, bits).tobytes()
+    return pack_layout(grid, layout).tobytes()
+
+def xbm_bytes(grid, name='icone'):
+    """Arquivo X11 XBM (texto C legível por GIMP, ImageMagick e pelo próprio X11)"""
+    grid = np.asarray(grid)
+    height, width = grid.shape
+    name = c_identifier(name)
+    text = (f"#define {name}_width {width}\n#define {name}_height {height}\n"
+            f"static unsigned char {name}_bits[] = {{\n"
+            f"{format_c_bytes(pack_xbm(grid), per_line=12, indent='   ')} }};\n")
+    return text.encode('ascii')
+
+def export_bytes(grid, fmt, name='icone', layout='xbm', bits=1):
+    """Conteúdo completo do arquivo no formato indicado (FILE_FORMATS)"""
+    if fmt == 'pbm':
+        return pbm_bytes(grid)
+    if fmt == 'pgm':
+        return pgm_bytes(grid if bits > 1 else np.asarray(grid) != 0, max(bits, 1))
+    if fmt == 'bin':
+        return raw_bytes(grid, layout, bits)
+    if fmt == 'xbm':
+        return xbm_bytes(grid, name)
+    raise ValueError(f"Formato de arquivo desconhecido: {fmt}")
+
+def write_bytes(path, data, atomic=False):
+    """
+    Grava o arquivo com uma única escrita.
+    atomic: grava num temporário no mesmo diretório e troca com os.replace, então
+    quem lê o arquivo (ex.: o build) vê o conteúdo antigo ou o novo, nunca pela metade.
+    """
+    if not atomic:
+        with open(path, 'wb') as f:
+            f.write(data)
+        return len(data)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return len(data)
+
+def export_file(path, grid, fmt=None, layout='xbm', bits=1):
+    """Grava a grade em path; o formato vem da extensão se não for indicado. Retorna bytes gravados"""
+    base, extension = os.path.splitext(os.path.basename(path))
+    fmt = fmt or extension.lstrip('.').lower()
+    return write_bytes(path, export_bytes(grid, fmt, base, layout, bits))
+
+def self_test():
+    """
+    Confere PBM e PGM lendo os arquivos de volta com o OpenCV (quando disponível),
+    o XBM relendo seus bytes e os .bin com os decodificadores de referência.
+    """
+    from bitmap_export import decode_layout_reference
+    from grayscale import unpack_gray
+    try:
+        import cv2
+    except ImportError:
+        cv2 = None
+
+    rng = np.random.default_rng(0)
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        for width, height in ((8, 8), (13, 7), (128, 64)):
+            grid = (rng.random((height, width)) < 0.5).astype(np.uint8)
+            for layout in LAYOUT_PACKERS:
+                if decode_layout_reference(raw_bytes(grid, layout), layout, width, height) != grid.tolist():
+                    ok = False
+                    print(f"❌ .bin {layout} {width}x{height} não confere")
+            for bits in GRAY_BITS[1:]:
+                levels = rng.integers(0, level_count(bits), (height, width), dtype=np.uint8)
+                if not np.array_equal(unpack_gray(raw_bytes(levels, bits=bits), bits, width, height), levels):
+                    ok = False
+                    print(f"❌ .bin {bits} bits {width}x{height} não confere")
+            xbm = xbm_bytes(grid, 'teste').decode('ascii')
+            data = bytes(int(h, 16) for h in re.findall(r'0x([0-9A-F]{2})', xbm))
+            if (f"teste_width {width}\n" not in xbm
+                    or decode_layout_reference(data, 'xbm', width, height) != grid.tolist()):
+                ok = False
+                print(f"❌ .xbm {width}x{height} não confere")
+            if cv2 is None:
+                continue
+            path = os.path.join(directory, "teste.pbm")
+            export_file(path, grid)
+            image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            if image is None or not np.array_equal(image < 128, grid != 0):
+                ok = False
+                print(f"❌ .pbm {width}x{height}: leitura pelo OpenCV não confere")
+            levels = rng.integers(0, 16, (height, width), dtype=np.uint8)
+            path = os.path.join(directory, "teste.pgm")
+            export_file(path, levels, bits=4)
+            image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+            if image is None or not np.array_equal(image, 15 - levels):
+                ok = False
+                print(f"❌ .pgm {width}x{height}: leitura pelo OpenCV não confere")
+    print("✅ Arquivos conferem" if ok else "❌ Falha nos arquivos")
+    return ok
+
+def main():
+    """
+    Função principal
+    """
+    args = sys.argv[1:]
+    if '--teste' in args:
+        sys.exit(0 if self_test() else 1)
+    if not args or args[0].startswith('--'):
+        print("📖 USO:")
+        print("python3 file_export.py <imagens ou .txt...> [opções]")
+        print("\n🔧 OPÇÕES:")
+        print(f"--formato F,G    : Formatos gravados ({', '.join(FILE_FORMATS)}; padrão bin)")
+        print(f"--layout L       : Layout dos .bin ({', '.join(LAYOUT_PACKERS)}; padrão xbm)")
+        print("--tamanho WxH    : Converte todas as imagens para este tamanho (padrão: original)")
+        print(f"--modo M         : Binarização ({', '.join(BINARIZATION_MODES)})")
+        print("--limiar N       : Limiar do modo fixo (padrão 240)")
+        print("--processos N    : Número de processos de conversão")
+        print("--saida DIR      : Diretório de saída (padrão: atual)")
+        print("--inverter       : Inverte preto e branco")
+        print("--teste          : Verifica os formatos lendo os arquivos de volta")
+        print("\n📝 EXEMPLOS:")
+        print("python3 file_export.py icones/*.png --tamanho 16x16 --formato bin --saida data/")
+        print("python3 file_export.py tela.png --formato bin --layout ssd1306 --tamanho 128x64")
+        print("python3 file_export.py logo.png seta.txt --formato pbm,xbm")
+        return
+
+    # Importado aqui: o empacotador de atlas usa a API de conversão, que usa este módulo
+    from atlas_packer import AtlasError, load_icons
+
+    first_option = next((i for i, a in enumerate(args) if a.startswith('--')), len(args))
+    paths = args[:first_option]
+
+    def option(flag, default, convert=str):
+        if flag in args:
+            return convert(args[args.index(flag) + 1])
+        return default
+
+    def size_option(value):
+        width, height = value.split('x')
+        return int(width), int(height)
+
+    try:
+        formats = option('--formato', ['bin'], lambda value: [f for f in value.split(',') if f])
+        layout = option('--layout', 'xbm')
+        size = option('--tamanho', None, size_option)
+        mode = option('--modo', 'fixo')
+        threshold = option('--limiar', DEFAULT_THRESHOLD, int)
+        workers = option('--processos', None, int)
+        output_dir = option('--saida', '.')
+    except (IndexError, ValueError):
+        print("❌ Erro: opções inválidas (ex: --formato pbm,bin --tamanho 16x16)")
+        return
+    invalid = [f for f in formats if f not in FILE_FORMATS]
+    if invalid or layout not in LAYOUT_PACKERS or mode not in BINARIZATION_MODES:
+        print(f"❌ Erro: --formato aceita {', '.join(FILE_FORMATS)}, --layout {', '.join(LAYOUT_PACKERS)} "
+              f"e --modo {', '.join(BINARIZATION_MODES)}")
+        return
+
+    # Cada entrada grava base.formato no diretório de saída: bases repetidas se sobrescreveriam
+    bases = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    seen = {}
+    for path, base in zip(paths, bases):
+        if base in seen:
+            print(f"❌ Erro: {seen[base]} e {path} gravariam os mesmos arquivos ({base}.*); renomeie um deles")
+            return
+        seen[base] = path
+
+    try:
+        grids = load_icons(paths, size, mode, threshold, '--inverter' in args, workers)
+    except (AtlasError, OSError) as e:
+        print(f"❌ Erro: {e}")
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    total = 0
+    for base, grid in zip(bases, grids):
+        for fmt in formats:
+            total += export_file(os.path.join(output_dir, f"{base}.{fmt}"), grid, fmt, layout)
+    print(f"✅ {len(grids) * len(formats)} arquivos gravados em {output_dir} ({total:,} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Importador de Vídeos e GIFs Animados
+Lê os quadros com cv2.VideoCapture, converte cada um para a grade com o núcleo
+de binarização e grava os quadros como arrays XBM sequenciais.
+
+Os quadros passam por um pipeline limitado: uma thread decodifica, um conjunto
+de threads converte e a thread principal grava na ordem original. Nunca há mais
+que alguns quadros em memória, então clipes longos não ocupam memória extra.
+"""
+
+import io
+import os
+import queue
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from binarization import BINARIZATION_MODES, DEFAULT_THRESHOLD
+import converter_api as api
+from bitmap_export import pack_xbm, c_identifier, c_array
+from animation_export import first_frame, write_animation
+from file_export import write_bytes
+
+# Quadros decodificados aguardando conversão (por thread de conversão)
+QUEUE_DEPTH = 4
+
+_END = object()
+
+class FrameReadError(RuntimeError):
+    """O arquivo não pôde ser aberto como vídeo/GIF"""
+
+def frame_count(path):
+    """Número de quadros informado pelo arquivo (0 se desconhecido)"""
+    capture = cv2.VideoCapture(path)
+    try:
+        return max(int(capture.get(cv2.CAP_PROP_FRAME_COUNT)), 0)
+    finally:
+        capture.release()
+
+def iter_frames(path, step=1, max_frames=None):
+    """
+    Gera os quadros (BGR) do vídeo/GIF um a um, sem carregar o arquivo inteiro.
+    step: usa um quadro a cada step; max_frames: limite de quadros gerados.
+    """
+    if step < 1:
+        raise ValueError(f"O passo deve ser pelo menos 1 (recebido {step})")
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise FrameReadError(f"Não foi possível abrir o arquivo: {path}")
+    try:
+        index = 0
+        produced = 0
+        while max_frames is None or produced < max_frames:
+            # grab() avança sem decodificar; retrieve() só nos quadros usados
+            if not capture.grab():
+                break
+            if index % step == 0:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                yield frame
+                produced += 1
+            index += 1
+    finally:
+        capture.release()
+
+def _decode_worker(frames, output, stop):
+    """Thread de decodificação: coloca quadros na fila limitada (bloqueia se cheia)"""
+    def put(item):
+        # Espera espaço na fila, desistindo se o consumidor parou
+        while not stop.is_set():
+            try:
+                output.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for frame in frames:
+            if not put(frame):
+                return
+    except Exception as e:
+        put(e)
+        return
+    put(_END)
+
+def convert_frames(path, width, height, mode='fixo', threshold=DEFAULT_THRESHOLD, invert=False,
+                   step=1, max_frames=None, workers=None):
+    """
+    Gera as grades (uint8, 1 = preto) de cada quadro, na ordem do arquivo.
+    Decodificação e conversão rodam em threads (OpenCV e numpy liberam o GIL)
+    com filas limitadas: no máximo ~QUEUE_DEPTH quadros por thread em memória.
+    """
+    workers = workers or min(4, os.cpu_count() or 1)
+    decoded = queue.Queue(maxsize=QUEUE_DEPTH * workers)
+    stop = threading.Event()
+    decoder = threading.Thread(target=_decode_worker, daemon=True,
+                               args=(iter_frames(path, step, max_frames), decoded, stop))
+
+    def convert(frame):
+        return api.binarize(frame, width, height, mode, threshold, invert)
+
+    decoder.start()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            while True:
+                item = decoded.get()
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                pending.append(pool.submit(convert, item))
+                # Janela limitada de conversões em andamento, entregues em ordem
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    finally:
+        stop.set()
+        decoder.join()
+
+def write_xbm_frames(grids, out, name, width, height):
+    """
+    Grava as grades como arrays XBM sequenciais (nome_0000_bits, ...) seguidos da
+    tabela de ponteiros nome_frames[]. Grava cada quadro assim que fica pronto.
+    Retorna o número de quadros gravados; ValueError, sem gravar nada, se não há nenhum.
+    """
+    grids = first_frame(grids)
+    name = c_identifier(name)
+    bytes_per_frame = height * ((width + 7) // 8)
+    out.write(f"// Animação {name}: quadros XBM {width}x{height} (u8g2.drawXBM)\n")
+    out.write(f"#define {name.upper()}_WIDTH {width}\n")
+    out.write(f"#define {name.upper()}_HEIGHT {height}\n\n")
+
+    count = 0
+    for grid in grids:
+        out.write(c_array(f"{name}_{count:04d}_bits", pack_xbm(grid), comment=f"Quadro {count}"))
+        out.write("\n")
+        count += 1
+
+    out.write(f"#define {name.upper()}_FRAME_COUNT {count}\n\n")
+    out.write(f"static const unsigned char * const {name}_frames[] PROGMEM = {{\n")
+    out.write(''.join(f"  {name}_{i:04d}_bits,\n" for i in range(count)))
+    out.write("};\n\n")
+    out.write(f"// Total: {count} quadros x {bytes_per_frame} bytes = {count * bytes_per_frame} bytes\n")
+    return count
+
+def main():
+    """
+    Função principal
+    """
+    if len(sys.argv) < 2:
+        print("📖 USO:")
+        print("python3 frame_importer.py <video_ou_gif> [opções]")
+        print("\n🔧 OPÇÕES:")
+        print("--grid WxH    : Tamanho da grade (padrão 128x64)")
+        print(f"--modo M      : Binarização ({', '.join(BINARIZATION_MODES)})")
+        print("--limiar N    : Limiar do modo fixo (padrão 240)")
+        print("--inverter    : Inverte claro/escuro")
+        print("--passo N     : Usa um quadro a cada N")
+        print("--max N       : Número máximo de quadros")
+        print("--saida ARQ   : Arquivo .h de saída (padrão: nome do vídeo + .h)")
+        print("--dedup       : Grava quadros repetidos uma vez só, com tabela de índices")
+        print("\n📝 EXEMPLOS:")
+        print("python3 frame_importer.py boot.gif --grid 128x64")
+        print("python3 frame_importer.py clipe.mp4 --grid 64x32 --modo bayer --passo 2 --max 60")
+        print("python3 frame_importer.py boot.gif --grid 128x64 --dedup")
+        return
+
+    path = sys.argv[1]
+
+    def option(flag, default, convert=str):
+        if flag in sys.argv:
+            return convert(sys.argv[sys.argv.index(flag) + 1])
+        return default
+
+    try:
+        grid = option('--grid', '128x64')
+        width, height = map(int, grid.split('x')) if 'x' in grid else (int(grid), int(grid))
+        mode = option('--modo', 'fixo')
+        threshold = option('--limiar', DEFAULT_THRESHOLD, int)
+        step = option('--passo', 1, int)
+        max_frames = option('--max', None, int)
+        output = option('--saida', os.path.splitext(path)[0] + '.h')
+    except (IndexError, ValueError):
+        print("❌ Erro: opções inválidas (ex: --grid 128x64 --passo 2 --max 60)")
+        return
+    if mode not in BINARIZATION_MODES:
+        print(f"❌ Erro: Modo deve ser um de: {', '.join(BINARIZATION_MODES)}")
+        return
+    if step < 1:
+        print("❌ Erro: --passo deve ser pelo menos 1")
+        return
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    print(f"🎞️ Convertendo {path} para {width}x{height} ({mode})...")
+    # O header é montado inteiro antes de gravar: um vídeo ilegível não apaga o header anterior
+    out = io.StringIO()
+    try:
+        grids = convert_frames(path, width, height, mode, threshold, '--inverter' in sys.argv,
+                               step, max_frames)
+        if '--dedup' in sys.argv:
+            stats = write_animation(grids, out, name, width, height)
+            count = stats['frames']
+        else:
+            count = write_xbm_frames(grids, out, name, width, height)
+        write_bytes(output, out.getvalue().encode('utf-8'), atomic=True)
+    except (FrameReadError, OSError, ValueError) as e:
+        print(f"❌ Erro: {e}")
+        return
+    print(f"✅ {count} quadros gravados em {output}")
+    if '--dedup' in sys.argv:
+        print(f"💾 {stats['unique']} bitmaps únicos: {stats['flash_bytes']} bytes de flash "
+              f"(economia de {stats['saved_bytes']} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Grade em Tons de Cinza (2 e 4 bits)
+Modo de vários níveis para displays OLED em tons de cinza (ex.: SSD1322 e
+SSD1327, 4 bits por pixel). O modelo da grade continua um array uint8
+(altura x largura), agora com níveis de 0 (branco/apagado) até 2^bits - 1
+(preto/aceso); com 1 bit é exatamente a grade 0/1 de sempre.
+
+Empacotamento: 8 / bits pixels por byte, em ordem de linhas, cada linha
+completada até um byte inteiro. Ordem 'msb': pixel da esquerda nos bits altos
+(com 4 bits, nibble alto = pixel par); 'lsb': pixel da esquerda nos bits baixos.
+Confira no datasheet qual ordem o controlador espera.
+
+Uso: python3 grayscale.py --teste   (ida e volta e tempo em 256x64)
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from binarization import BAYER_THRESHOLDS, floyd_steinberg
+from bitmap_export import c_identifier, c_array
+
+# Bits por pixel suportados (1 = preto e branco)
+GRAY_BITS = (1, 2, 4)
+
+# Modos de quantização: arredondamento, pontilhado ordenado ou difusão de erro
+GRAY_MODES = ('fixo', 'bayer', 'floyd-steinberg')
+
+PACK_ORDERS = ('msb', 'lsb')
+
+def level_count(bits):
+    """Número de tons para a profundidade (2, 4 ou 16)"""
+    if bits not in GRAY_BITS:
+        raise ValueError(f"Profundidade desconhecida: {bits} bits (use {', '.join(map(str, GRAY_BITS))})")
+    return 1 << bits
+
+def quantize_gray(gray, bits, mode='fixo', invert=False, visible=None):
+    """
+    Quantiza uma imagem em cinza (0-255, já no tamanho da grade) em níveis da grade:
+    0 = branco, 2^bits - 1 = preto. visible: máscara opcional; fora dela, nível 0.
+    """
+    top = level_count(bits) - 1
+    gray = np.asarray(gray, dtype=np.float32)
+    ink = gray if invert else 255 - gray  # Quantidade de "tinta" (preto = 255)
+
+    if mode == 'fixo':
+        levels = np.rint(ink * (top / 255))
+    elif mode == 'bayer':
+        # Pontilhado ordenado entre os dois tons vizinhos
+        height, width = ink.shape
+        tiled = np.tile(BAYER_THRESHOLDS, (height // 8 + 1, width // 8 + 1))[:height, :width]
+        scaled = ink * (top / 255)
+        levels = np.floor(scaled) + (np.mod(scaled, 1) * 255 > tiled)
+    elif mode == 'floyd-steinberg':
+        levels = np.rint(floyd_steinberg(ink, levels=top + 1) * (top / 255))
+    else:
+        raise ValueError(f"Modo de quantização desconhecido: {mode}")
+
+    levels = np.clip(levels, 0, top).astype(np.uint8)
+    if visible is not None:
+        levels[~visible] = 0
+    return levels
+
+def quantize_coverage(coverage, bits):
+    """Fração de pixels coloridos (0 a 1) -> nível da grade, proporcional à cobertura"""
+    top = level_count(bits) - 1
+    return np.clip(np.rint(np.asarray(coverage) * top), 0, top).astype(np.uint8)
+
+def levels_to_ink(levels, bits):
+    """Níveis da grade -> 0-255 (255 = preto), o formato de process_image()"""
+    top = level_count(bits) - 1
+    return (np.asarray(levels, dtype=np.uint16) * 255 // top).astype(np.uint8)
+
+def ink_to_levels(ink, bits):
+    """0-255 (255 = preto) -> níveis da grade"""
+    top = level_count(bits) - 1
+    return ((np.asarray(ink, dtype=np.uint16) * top + 127) // 255).astype(np.uint8)
+
+def requantize(levels, from_bits, to_bits):
+    """Converte a grade entre profundidades preservando o tom de cada célula"""
+    if from_bits == to_bits:
+        return np.asarray(levels, dtype=np.uint8).copy()
+    return ink_to_levels(levels_to_ink(levels, from_bits), to_bits)
+
+def level_palette(bits):
+    """Cor do Tk ('#rrggbb') de cada nível, do branco (0) ao preto (2^bits - 1)"""
+    top = level_count(bits) - 1
+    return [f"#{v:02x}{v:02x}{v:02x}" for v in (255 - level * 255 // top for level in range(top + 1))]
+
+def pack_gray(levels, bits, order='msb'):
+    """
+    Empacota os níveis: 8 / bits pixels por byte, linhas completadas até byte inteiro.
+    Vetorizado: a grade vira (altura, bytes por linha, pixels por byte) e cada
+    pixel é deslocado para a sua posição no byte.
+    """
+    if order not in PACK_ORDERS:
+        raise ValueError(f"Ordem desconhecida: {order}")
+    per_byte = 8 // bits
+    top = level_count(bits) - 1
+    levels = np.asarray(levels, dtype=np.uint8) & top
+    pad = (-levels.shape[1]) % per_byte
+    if pad:
+        levels = np.pad(levels, ((0, 0), (0, pad)))
+    shifts = np.arange(per_byte, dtype=np.uint8) * bits
+    if order == 'msb':
+        shifts = shifts[::-1]
+    pixels = levels.reshape(levels.shape[0], -1, per_byte) << shifts
+    return np.bitwise_or.reduce(pixels, axis=2).astype(np.uint8).ravel()
+
+def unpack_gray(data, bits, width, height, order='msb'):
+    """Inverso de pack_gray(): bytes -> níveis (altura x largura)"""
+    per_byte = 8 // bits
+    top = level_count(bits) - 1
+    row_bytes = (width + per_byte - 1) // per_byte
+    data = np.frombuffer(bytes(data), dtype=np.uint8)[:height * row_bytes].reshape(height, row_bytes)
+    shifts = np.arange(per_byte, dtype=np.uint8) * bits
+    if order == 'msb':
+        shifts = shifts[::-1]
+    levels = (data[..., None] >> shifts) & top
+    return levels.reshape(height, -1)[:, :width].astype(np.uint8)
+
+def gray_c_code(levels, bits, name='icone', order='msb'):
+    """Header C com os níveis empacotados (bits por pixel, ordem dos pixels no byte)"""
+    levels = np.asarray(levels)
+    height, width = levels.shape
+    data = pack_gray(levels, bits, order)
+    name = c_identifier(name)
+    upper = name.upper()
+    side = "altos" if order == 'msb' else "baixos"
+
+    code = f"// Bitmap {width}x{height} em {level_count(bits)} tons ({bits} bits por pixel, 0 = apagado)\n"
+    code += f"// {8 // bits} pixels por byte, pixel da esquerda nos bits {side}; {len(data)} bytes\n"
+    code += "// Uso: enviar linha a linha para a RAM do display (ex.: SSD1322/SSD1327 com 4 bits)\n\n"
+    code += f"#define {upper}_WIDTH {width}\n"
+    code += f"#define {upper}_HEIGHT {height}\n"
+    code += f"#define {upper}_BPP {bits}\n"
+    code += f"#define {upper}_ROW_BYTES {len(data) // max(height, 1)}\n\n"
+    code += c_array(f"{name}_gray", data)
+    return code
+
+def levels_to_text(levels):
+    """Níveis como texto: um dígito hexadecimal por célula, '.' para o nível 0"""
+    chars = np.array(list('.123456789ABCDEF'))[np.asarray(levels)]
+    return '\n'.join(''.join(row) for row in chars.tolist())
+
+def _pack_reference(levels, bits, order):
+    """Empacotamento de referência, pixel a pixel, escrito a partir da definição do formato"""
+    per_byte = 8 // bits
+    out = bytearray()
+    for row in np.asarray(levels).tolist():
+        for start in range(0, len(row), per_byte):
+            byte = 0
+            for k, level in enumerate(row[start:start + per_byte]):
+                position = per_byte - 1 - k if order == 'msb' else k
+                byte |= level << (position * bits)
+            out.append(byte)
+    return bytes(out)
+
+def self_test():
+    """Confere o empacotamento com a referência, a ida e volta e o tempo em 256x64"""
+    rng = np.random.default_rng(0)
+    ok = True
+    for bits in GRAY_BITS:
+        top = level_count(bits) - 1
+        for width, height in ((1, 1), (7, 3), (13, 5), (256, 64)):
+            levels = rng.integers(0, top + 1, (height, width), dtype=np.uint8)
+            for order in PACK_ORDERS:
+                data = pack_gray(levels, bits, order)
+                if (data.tobytes() != _pack_reference(levels, bits, order)
+                        or not np.array_equal(unpack_gray(data, bits, width, height, order), levels)):
+                    ok = False
+                    print(f"❌ {bits} bits {order} {width}x{height}: empacotamento não confere")
+
+    # Tempo da quantização + empacotamento numa tela 256x64 (SSD1322)
+    gray = rng.random((64, 256)).astype(np.float32) * 255
+    for mode in GRAY_MODES:
+        start = time.perf_counter()
+        for _ in range(20):
+            pack_gray(quantize_gray(gray, 4, mode), 4)
+        elapsed = (time.perf_counter() - start) / 20 * 1000
+        print(f"256x64, 4 bits, {mode:<16}: {elapsed:6.2f} ms por quadro")
+
+    # Rampa de cinza: cada tom deve cair no nível mais próximo
+    ramp = np.linspace(255, 0, 16, dtype=np.float32)[None, :]
+    if not np.array_equal(quantize_gray(ramp, 4)[0], np.arange(16)):
+        ok = False
+        print("❌ Rampa de 16 tons não confere")
+    print("✅ Tons de cinza conferem" if ok else "❌ Falha nos tons de cinza")
+    return ok
+
+if __name__ == "__main__":
+    if '--teste' in sys.argv:
+        sys.exit(0 if self_test() else 1)
+    print("📖 USO:")
+    print("python3 grayscale.py --teste  : Verifica quantização e empacotamento de 2 e 4 bits")
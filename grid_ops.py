@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Operações sobre a Grade
+Funções vetorizadas (numpy) que atuam sobre o modelo da grade
+(array uint8, 1 = preto, 0 = branco), sem depender da interface.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+def bresenham_line(r0, c0, r1, c1):
+    """
+    Retorna (linhas, colunas) de todas as células da reta entre (r0, c0) e (r1, c1),
+    inclusive as extremidades, calculadas de uma vez (Bresenham com arredondamento).
+    """
+    dr = r1 - r0
+    dc = c1 - c0
+    steps = max(abs(dr), abs(dc))
+    if steps == 0:
+        return np.array([r0]), np.array([c0])
+
+    # Eixo principal avança 1 por passo; o secundário é arredondado (meio para cima)
+    i = np.arange(steps + 1)
+    rows = r0 + np.sign(dr) * ((2 * i * abs(dr) + steps) // (2 * steps))
+    cols = c0 + np.sign(dc) * ((2 * i * abs(dc) + steps) // (2 * steps))
+    return rows, cols
+
+# Formatos de pincel disponíveis ('personalizado' usa uma máscara definida pelo usuário)
+BRUSH_SHAPES = ('quadrado', 'redondo', 'losango')
+MAX_BRUSH_SIZE = 64
+
+@lru_cache(maxsize=None)
+def brush_mask(shape, size):
+    """
+    Retorna a máscara (size x size, bool) do pincel, pré-calculada e reaproveitada.
+    A máscara é somente leitura; o centro fica em (size // 2, size // 2).
+    """
+    if shape not in BRUSH_SHAPES:
+        raise ValueError(f"Formato de pincel desconhecido: {shape}")
+    if size < 1 or size > MAX_BRUSH_SIZE:
+        raise ValueError(f"Tamanho do pincel deve estar entre 1 e {MAX_BRUSH_SIZE}")
+
+    # Distância de cada célula ao centro da máscara
+    offsets = np.arange(size) - (size - 1) / 2
+    dy = offsets[:, None]
+    dx = offsets[None, :]
+
+    if shape == 'quadrado':
+        mask = np.ones((size, size), dtype=bool)
+    elif shape == 'redondo':
+        mask = dx ** 2 + dy ** 2 <= max((size / 2) ** 2 - 0.5, 0.5)
+    else:  # losango
+        mask = np.abs(dx) + np.abs(dy) <= size / 2
+
+    mask = np.ascontiguousarray(mask)
+    mask.flags.writeable = False
+    return mask
+
+def mask_from_grid(grid):
+    """
+    Cria uma máscara de pincel personalizada a partir das células pretas da grade,
+    recortada na caixa que as contém (limitada a MAX_BRUSH_SIZE).
+    Retorna None se a grade estiver vazia.
+    """
+    grid = np.asarray(grid) != 0
+    rows = np.flatnonzero(grid.any(axis=1))
+    cols = np.flatnonzero(grid.any(axis=0))
+    if len(rows) == 0:
+        return None
+    mask = grid[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1][:MAX_BRUSH_SIZE, :MAX_BRUSH_SIZE]
+    mask = np.ascontiguousarray(mask)
+    mask.flags.writeable = False
+    return mask
+
+def stamp(grid, mask, center_row, center_col, value):
+    """
+    Carimba a máscara na grade (in-place) centrada em (center_row, center_col).
+    As bordas são recortadas por fatiamento: uma única atribuição vetorizada por carimbo.
+    Retorna False se o carimbo ficou inteiramente fora da grade.
+    """
+    mask_h, mask_w = mask.shape
+    top = center_row - mask_h // 2
+    left = center_col - mask_w // 2
+
+    # Recorte da janela na grade e da parte correspondente da máscara
+    r0, r1 = max(0, top), min(grid.shape[0], top + mask_h)
+    c0, c1 = max(0, left), min(grid.shape[1], left + mask_w)
+    if r0 >= r1 or c0 >= c1:
+        return False
+
+    grid[r0:r1, c0:c1][mask[r0 - top:r1 - top, c0 - left:c1 - left]] = value
+    return True
+
+def _row_spans(mask):
+    """
+    Faixas horizontais de células True: (linhas, inícios, fins exclusivos),
+    em ordem de linha e coluna, calculadas para a grade inteira de uma vez.
+    """
+    height, width = mask.shape
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return rows, starts, ends
+
+def flood_fill(grid, row, col, value, connectivity=4):
+    """
+    Preenche (in-place) a região conectada à célula (row, col) com value.
+    Preenchimento por faixas (scanline): a grade é dividida em faixas horizontais
+    da cor alvo e a busca em largura percorre faixas vizinhas, um nível por vez,
+    de forma vetorizada e sem recursão. connectivity: 4 ou 8.
+    Retorna o número de células preenchidas.
+    """
+    height, width = grid.shape
+    if not (0 <= row < height and 0 <= col < width):
+        return 0
+    target = grid[row, col]
+    if target == value:
+        return 0
+
+    rows, starts, ends = _row_spans(grid == target)
+
+    # Chaves globais: com passo width + 2, faixas de linhas diferentes nunca se tocam
+    stride = width + 2
+    key_start = rows * stride + starts
+    key_end = rows * stride + ends
+
+    # Vizinhança diagonal estende a sobreposição exigida em 1 célula
+    reach = 1 if connectivity == 8 else 0
+
+    seed = np.searchsorted(key_start, row * stride + col, side='right') - 1
+    visited = np.zeros(len(key_start), dtype=bool)
+    visited[seed] = True
+    frontier = np.array([seed])
+
+    while len(frontier):
+        # Faixas j das linhas vizinhas (acima e abaixo) com início < b e fim > a
+        a = np.concatenate((key_start[frontier] - stride, key_start[frontier] + stride)) - reach
+        b = np.concatenate((key_end[frontier] - stride, key_end[frontier] + stride)) + reach
+        lo = np.searchsorted(key_end, a, side='right')
+        hi = np.searchsorted(key_start, b, side='left')
+        counts = np.maximum(hi - lo, 0)
+        total = int(counts.sum())
+        if not total:
+            break
+        step = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        candidates = np.repeat(lo, counts) + step
+        frontier = np.unique(candidates[~visited[candidates]])
+        visited[frontier] = True
+
+    # Pintar as faixas alcançadas com uma soma acumulada por linha
+    fill_rows, fill_starts, fill_ends = rows[visited], starts[visited], ends[visited]
+    size = height * (width + 1)
+    delta = (np.bincount(fill_rows * (width + 1) + fill_starts, minlength=size)
+             - np.bincount(fill_rows * (width + 1) + fill_ends, minlength=size))
+    fill_mask = np.cumsum(delta.reshape(height, width + 1), axis=1)[:, :width] > 0
+    grid[fill_mask] = value
+    return int((fill_ends - fill_starts).sum())
+
+# Tamanho máximo da grade aceito pelo editor
+MAX_GRID_SIZE = 200
+
+def flip_grid(grid, direction):
+    """Espelha a grade: 'horizontal' (esquerda <-> direita) ou 'vertical' (cima <-> baixo)"""
+    if direction == 'horizontal':
+        return grid[:, ::-1].copy()
+    if direction == 'vertical':
+        return grid[::-1, :].copy()
+    raise ValueError(f"Direção inválida: {direction}")
+
+def rotate_grid(grid, clockwise=True):
+    """Gira a grade 90° (largura e altura são trocadas)"""
+    return np.rot90(grid, -1 if clockwise else 1).copy()
+
+def shift_grid(grid, rows, cols, wrap=True):
+    """
+    Desloca a grade rows linhas para baixo e cols colunas para a direita.
+    wrap=True: o que sai por uma borda entra pela oposta; wrap=False: é descartado.
+    """
+    if wrap:
+        return np.roll(grid, (rows, cols), axis=(0, 1))
+
+    height, width = grid.shape
+    shifted = np.zeros_like(grid)
+    if abs(rows) < height and abs(cols) < width:
+        shifted[max(0, rows):height + min(0, rows), max(0, cols):width + min(0, cols)] = \
+            grid[max(0, -rows):height - max(0, rows), max(0, -cols):width - max(0, cols)]
+    return shifted
+
+def scale_grid(grid, factor):
+    """Amplia a grade por um fator inteiro (cada célula vira um bloco factor x factor)"""
+    if factor < 1:
+        raise ValueError("O fator de escala deve ser um inteiro positivo")
+    return np.kron(grid, np.ones((factor, factor), dtype=grid.dtype))
+
+# Frações (vertical, horizontal) de cada âncora, nas convenções do Tk
+ANCHORS = {
+    'nw': (0.0, 0.0), 'n': (0.0, 0.5), 'ne': (0.0, 1.0),
+    'w': (0.5, 0.0), 'center': (0.5, 0.5), 'e': (0.5, 1.0),
+    'sw': (1.0, 0.0), 's': (1.0, 0.5), 'se': (1.0, 1.0),
+}
+
+def crop_or_pad(grid, new_height, new_width, anchor='center'):
+    """
+    Muda o tamanho da grade sem reamostrar: recorta ou completa com branco,
+    mantendo o desenho preso à âncora (ex.: 'nw' = canto superior esquerdo).
+    """
+    fy, fx = ANCHORS[anchor]
+    height, width = grid.shape
+    # Deslocamento do desenho antigo dentro da nova grade (negativo = recorte)
+    off_y = int(round((new_height - height) * fy))
+    off_x = int(round((new_width - width) * fx))
+
+    result = np.zeros((new_height, new_width), dtype=grid.dtype)
+    dst_y0, dst_x0 = max(0, off_y), max(0, off_x)
+    src_y0, src_x0 = max(0, -off_y), max(0, -off_x)
+    rows = min(new_height - dst_y0, height - src_y0)
+    cols = min(new_width - dst_x0, width - src_x0)
+    if rows > 0 and cols > 0:
+        result[dst_y0:dst_y0 + rows, dst_x0:dst_x0 + cols] = grid[src_y0:src_y0 + rows, src_x0:src_x0 + cols]
+    return result
+
+def overlap_weights(src_size, dst_size):
+    """
+    Matriz (dst_size x src_size) com a sobreposição de cada célula de destino
+    com cada célula de origem, em unidades da origem (cada linha soma src/dst).
+    """
+    edges = np.arange(dst_size + 1) * (src_size / dst_size)
+    lo = np.maximum(edges[:-1, None], np.arange(src_size)[None, :])
+    hi = np.minimum(edges[1:, None], np.arange(1, src_size + 1)[None, :])
+    return np.clip(hi - lo, 0, None)
+
+def resample_grid(grid, new_height, new_width, method='nearest'):
+    """
+    Reamostra a grade para o novo tamanho.
+    'nearest': célula de origem mais próxima do centro de cada célula de destino.
+    'majority': preto se pelo menos metade da área coberta na origem é preta; em
+    grades com níveis de cinza (valores acima de 1), a média dos níveis cobertos,
+    ponderada pela área e arredondada.
+    """
+    height, width = grid.shape
+    if method == 'nearest':
+        rows = ((np.arange(new_height) + 0.5) * height / new_height).astype(int)
+        cols = ((np.arange(new_width) + 0.5) * width / new_width).astype(int)
+        return grid[np.ix_(rows, cols)]
+    if method == 'majority':
+        wy = overlap_weights(height, new_height)
+        wx = overlap_weights(width, new_width)
+        area = (height / new_height) * (width / new_width)
+        if grid.size and grid.max() > 1:
+            mean = wy @ grid.astype(np.float64) @ wx.T / area
+            return np.floor(mean + 0.5 + 1e-9).astype(grid.dtype)
+        coverage = wy @ (grid != 0).astype(np.float64) @ wx.T
+        return (coverage >= area * 0.5 - 1e-9).astype(grid.dtype)
+    raise ValueError(f"Método de reamostragem desconhecido: {method}")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parser de Texto para a Grade
+Valida e converte texto ASCII (# .) ou binário (0 1) colado pelo usuário
+diretamente para o modelo da grade, em uma única passada de translate/regex.
+
+Modelo da grade: array numpy uint8 (altura x largura), 1 = preto (#), 0 = branco (.)
+"""
+
+import re
+import numpy as np
+
+# Valores das células no modelo da grade
+PRETO = 1
+BRANCO = 0
+
+# Tabelas de tradução caractere -> valor da célula
+_ASCII_TABLE = str.maketrans({'#': chr(PRETO), '.': chr(BRANCO)})
+_BINARY_TABLE = str.maketrans({'1': chr(PRETO), '0': chr(BRANCO)})
+
+# Primeiro caractere inválido no texto ASCII estrito
+_INVALID_ASCII = re.compile(r'[^#.\n]')
+
+# Linhas aceitas pelos extratores tolerantes (as demais são ignoradas)
+_BINARY_LINE = re.compile(r'^[01 ]*[01][01 ]*$', re.MULTILINE)
+_C_CODE_LINE = re.compile(r'^[#. \t]*[#.][#. \t]*$', re.MULTILINE)
+_PASTE_JUNK = re.compile(r'[^#. \n]')
+
+class GridParseError(ValueError):
+    """Erro de validação do texto, com a posição (1-based) do primeiro problema"""
+
+    def __init__(self, message, line=None, column=None):
+        super().__init__(message)
+        self.line = line
+        self.column = column
+
+def _normalize_newlines(text):
+    """Remove espaços das bordas e unifica quebras de linha em '\\n'"""
+    return '\n'.join(text.strip().splitlines())
+
+def _check_line_count(text, height):
+    line_count = text.count('\n') + 1
+    if line_count != height:
+        raise GridParseError(f"O conteúdo deve ter exatamente {height} linhas.\n"
+                             f"Atual: {line_count} linhas")
+
+def _first_bad_line(text, width, height):
+    """(índice, comprimento) da primeira linha com largura errada, ou None (sem laço por caractere)"""
+    # Posições das quebras de linha comparadas com as posições esperadas
+    buffer = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    breaks = np.flatnonzero(buffer == ord('\n'))
+    expected = np.arange(1, height) * (width + 1) - 1
+    if len(buffer) == height * (width + 1) - 1 and np.array_equal(breaks, expected):
+        return None
+    starts = np.concatenate(([0], breaks + 1))
+    ends = np.concatenate((breaks, [len(buffer)]))
+    lengths = ends - starts
+    bad = int(np.flatnonzero(lengths != width)[0])
+    return bad, int(lengths[bad])
+
+def _width_error(bad, width):
+    index, length = bad
+    return GridParseError(f"A linha {index + 1} deve ter exatamente {width} caracteres.\n"
+                          f"Atual: {length} caracteres", line=index + 1)
+
+def _check_shape(text, width, height):
+    """Verifica número de linhas e largura de cada linha"""
+    _check_line_count(text, height)
+    bad = _first_bad_line(text, width, height)
+    if bad is not None:
+        raise _width_error(bad, width)
+
+def _to_array(text, table, width, height):
+    """Converte texto já validado em array da grade com um único translate"""
+    data = (text.translate(table) + '\n').encode('ascii')
+    return np.frombuffer(data, dtype=np.uint8).reshape(height, width + 1)[:, :width].copy()
+
+def parse_ascii(text, width, height):
+    """
+    Valida e converte texto ASCII estrito ('#' e '.') para o modelo da grade.
+    Levanta GridParseError indicando a linha/coluna do primeiro erro.
+    """
+    text = _normalize_newlines(text or "")
+    if not text:
+        raise GridParseError("O conteúdo ASCII está vazio.")
+
+    _check_line_count(text, height)
+
+    # Mesma ordem de erros da validação linha a linha: em cada linha, primeiro a
+    # largura, depois os caracteres; vale o erro da primeira linha com problema
+    bad = _first_bad_line(text, width, height)
+    invalid = _INVALID_ASCII.search(text)
+    line = invalid and text.count('\n', 0, invalid.start()) + 1
+    if bad is not None and (not invalid or bad[0] + 1 <= line):
+        raise _width_error(bad, width)
+    if invalid:
+        pos = invalid.start()
+        column = pos - text.rfind('\n', 0, pos)
+        raise GridParseError(f"Caractere inválido na linha {line}, coluna {column}: '{invalid.group()}'\n"
+                             f"Use apenas '#' (preto) ou '.' (branco)", line=line, column=column)
+
+    return _to_array(text, _ASCII_TABLE, width, height)
+
+def _parse_extracted(lines, table, width, height):
+    """Valida as linhas extraídas por um dos parsers tolerantes"""
+    if not lines:
+        raise GridParseError("Nenhuma linha com dados válidos foi encontrada.")
+    text = '\n'.join(lines)
+    _check_shape(text, width, height)
+    return _to_array(text, table, width, height)
+
+def parse_binary(text, width, height):
+    """
+    Converte conteúdo binário (0 = branco, 1 = preto) para o modelo da grade.
+    Linhas que não contêm apenas '0', '1' e espaços são ignoradas.
+    """
+    lines = [line.replace(' ', '') for line in _BINARY_LINE.findall((text or "").replace('\r', ''))]
+    return _parse_extracted(lines, _BINARY_TABLE, width, height)
+
+def parse_c_code(text, width, height):
+    """
+    Extrai um desenho ASCII embutido em código C (linhas só com '#', '.', espaços e tabs).
+    """
+    lines = [re.sub(r'[ \t]', '', line) for line in _C_CODE_LINE.findall((text or "").replace('\r', ''))]
+    return _parse_extracted(lines, _ASCII_TABLE, width, height)
+
+def clean_ascii(text, width, height):
+    """
+    Limpa conteúdo ASCII colado: remove caracteres inválidos, troca espaços por '.'
+    e descarta linhas vazias. Retorna "" se o resultado não couber na grade.
+    """
+    if not text:
+        return ""
+    cleaned = _PASTE_JUNK.sub('', text.strip().replace('\r', '')).replace(' ', '.')
+    cleaned = '\n'.join(line for line in cleaned.split('\n') if line)
+    if not cleaned:
+        return ""
+    try:
+        _check_shape(cleaned, width, height)
+    except GridParseError:
+        return ""
+    return cleaned
+
+def to_grid_array(desenho):
+    """Aceita o modelo da grade ou uma lista de linhas '#'/'.' e retorna o array uint8"""
+    if isinstance(desenho, np.ndarray):
+        return (desenho != 0).astype(np.uint8)
+    rows = [''.join(row) for row in desenho]
+    if not rows:
+        return np.zeros((0, 0), dtype=np.uint8)
+    width = max(len(row) for row in rows)
+    text = '\n'.join(row.ljust(width, '.') for row in rows)
+    # Qualquer caractere diferente de '#' conta como branco, como em linha_para_byte()
+    data = np.frombuffer((text + '\n').encode('utf-32-le'), dtype=np.uint32)
+    return (data.reshape(len(rows), width + 1)[:, :width] == ord('#')).astype(np.uint8)
+
+def grid_to_text(grid, on='#', off='.'):
+    """Converte o modelo da grade em texto, uma linha por linha da grade"""
+    grid = np.asarray(grid)
+    if grid.size == 0:
+        return ""
+    chars = np.where(grid != 0, ord(on), ord(off)).astype(np.uint8)
+    chars = np.hstack((chars, np.full((grid.shape[0], 1), ord('\n'), dtype=np.uint8)))
+    return chars.tobytes().decode('ascii')[:-1]
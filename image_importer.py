@@ -10,7 +10,41 @@ from tkinter import ttk, filedialog, messagebox
 import cv2
 import numpy as np
 import os
+import analysis_cache
 from pixel_analyzer import analyze_image_pixels
+from binarization import SourcePlanes, BINARIZATION_MODES, DEFAULT_COVERAGE_THRESHOLD, DEFAULT_THRESHOLD
+from grayscale import levels_to_ink, ink_to_levels
+import converter_api as api
+
+# Modos do diálogo: 'cobertura' usa a análise pixel a pixel (fração de pixels coloridos);
+# os demais binarizam a imagem em cinza
+IMPORT_MODES = ('cobertura',) + BINARIZATION_MODES
+
+# Cor do Tk de cada valor 0-255 do resultado processado (255 = preto)
+_INK_COLORS = np.array([f"#{255 - v:02x}{255 - v:02x}{255 - v:02x}" for v in range(256)])
+
+def bitmap_photo(binary):
+    """
+    Cria um PhotoImage 1:1 a partir do resultado processado (0 = branco, 255 = preto,
+    valores intermediários = tons de cinza), preenchido com put() linha a linha,
+    sem codificar/decodificar imagem.
+    """
+    height, width = binary.shape
+    colors = _INK_COLORS[binary]
+    photo = tk.PhotoImage(width=width, height=height)
+    photo.put(' '.join('{' + ' '.join(row) + '}' for row in colors.tolist()))
+    return photo
+
+def to_rgb(image):
+    """Imagem do OpenCV (cinza, BGR ou BGRA; 8 ou 16 bits) -> RGB de 8 bits para exibir"""
+    if image.dtype != np.uint8:
+        image = cv2.convertScaleAbs(image, alpha=255.0 / np.iinfo(image.dtype).max
+                                    if image.dtype.kind in 'iu' else 255.0)
+    if image.ndim == 2 or image.shape[2] == 1:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2RGB)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
 
 class ImageImporter:
     def __init__(self, parent_gui):
@@ -20,12 +54,34 @@ class ImageImporter:
         """
         self.parent_gui = parent_gui
         self.original_image = None
+        self.source_image = None  # Imagem como o OpenCV lê (BGR/BGRA), usada na conversão
         self.processed_image = None
         self.image_path = None
+        self.coverage_threshold = DEFAULT_COVERAGE_THRESHOLD  # Fração de pixels coloridos para virar preto
+        self.binarization_mode = 'cobertura'  # Modo de conversão (IMPORT_MODES)
+        self.threshold = DEFAULT_THRESHOLD  # Limiar do modo fixo
+        self.invert = False  # Inverter claro/escuro antes de binarizar
+        self.crop = (0.0, 0.0, 0.0, 0.0)  # Margens removidas (esquerda, topo, direita, base), 0 a 1
         
         # Canvas de prévia (será configurado quando a janela for criada)
         self.preview_canvas = None
         self.original_preview_canvas = None 
+        
+        # Cache das prévias: resultado processado e bitmaps, refeitos só quando
+        # os parâmetros ou o tamanho do canvas mudam
+        self._processed = None
+        self._processed_key = None
+        self._base_photo = None
+        self._preview_render_key = None
+        self._preview_job = None
+        
+        # Planos da imagem de origem (cinza, opacidade, coloridos; uma vez por imagem) e
+        # sua redução para o tamanho e o recorte atuais: mover um ajuste só refaz a binarização
+        self._source = None
+        self._sampled = None
+        self._sampled_key = None
+        self.ascii_canvas = None
+        self.ascii_cell_size = 1
     def import_image(self):
         """Abre diálogo para selecionar e importar uma imagem"""
         try:
@@ -53,16 +109,18 @@ class ImageImporter:
     def load_and_process_image(self):
         """Carrega e processa a imagem selecionada"""
         try:
-            # Carregar imagem com OpenCV
-            self.original_image = cv2.imread(self.image_path)
-            self.imagem_processada = analyze_image_pixels(self.image_path, show_details=False, show_terminal_preview=False)
+            # Carregar imagem com OpenCV (uma única decodificação, com o canal alfa)
+            self.source_image = cv2.imread(self.image_path, cv2.IMREAD_UNCHANGED)
             # Verificar se a imagem foi carregada
-            if self.original_image is None:
+            if self.source_image is None:
                 raise Exception("Não foi possível carregar a imagem")
+            self.imagem_processada = analyze_image_pixels(self.image_path, show_details=False, show_terminal_preview=False)
+            self._source = None
+            self._sampled_key = None
+            self._processed_key = None
             
-            # Converter BGR para RGB (OpenCV usa BGR por padrão)
-            if len(self.original_image.shape) == 3:  # Se for colorida
-                self.original_image = cv2.cvtColor(self.original_image, cv2.COLOR_BGR2RGB)
+            # Cópia RGB para a prévia (OpenCV usa BGR por padrão)
+            self.original_image = to_rgb(self.source_image)
                 
             # Mostrar prévia e opções de processamento
             self.show_import_dialog()
@@ -179,6 +237,9 @@ class ImageImporter:
             ttk.Label(conversion_stats, text=f"Estimativa de pixels brancos (.): {estimated_white}").grid(row=2, column=0, sticky=tk.W, padx=(15, 0))
             ttk.Label(conversion_stats, text=f"Taxa de preenchimento: {colored_ratio*100:.1f}%").grid(row=3, column=0, sticky=tk.W, padx=(15, 0))
         
+        # Ajustes ao vivo (só a binarização é refeita a cada mudança)
+        self.create_tuning_controls(control_frame, row=5)
+        
         # Frame para prévia (mais compacto)
         preview_frame = ttk.LabelFrame(main_frame, text=f"🖼️ Prévia da Imagem Processada {self.parent_gui.grid_width}x{self.parent_gui.grid_height}", padding="10")  # Padding reduzido
         preview_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 20))  # Reduzido padding
@@ -188,6 +249,7 @@ class ImageImporter:
         # Canvas para prévia (menor para caber melhor)
         self.preview_canvas = tk.Canvas(preview_frame, width=500, height=300, bg='white')  # Canvas menor
         self.preview_canvas.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.preview_canvas.bind("<Configure>", lambda e: self.schedule_preview_update())
         
         # Frame para preview ASCII (mais compacto)
         ascii_preview_frame = ttk.LabelFrame(main_frame, text="🔤 Preview ASCII", padding="10")  # Padding reduzido
@@ -212,6 +274,9 @@ class ImageImporter:
         # Gerar prévia inicial
         self.update_preview()
         
+        # Ao fechar, os widgets de prévia deixam de existir
+        dialog.bind("<Destroy>", lambda e: self.forget_preview_widgets() if e.widget is dialog else None)
+        
         # Mostrar prévia da imagem original
         self.show_original_preview()
         
@@ -244,17 +309,51 @@ class ImageImporter:
                 self.original_preview_canvas.delete("all")
                 self.original_preview_canvas.create_text(60, 40, text=f"Erro: {str(e)}", fill="red")
         
+    def preview_key(self):
+        """Parâmetros que afetam o resultado processado (chave do cache)"""
+        return (self.parent_gui.grid_width, self.parent_gui.grid_height, self.gray_bits(),
+                self.binarization_mode, self.threshold, self.invert, self.coverage_threshold, self.crop)
+        
+    def gray_bits(self):
+        """Bits por pixel da grade de destino (1 = preto e branco)"""
+        return getattr(self.parent_gui, 'gray_bits', 1)
+        
+    def get_processed(self):
+        """Resultado de process_image() reaproveitado enquanto os parâmetros não mudam"""
+        key = self.preview_key()
+        if self._processed_key != key:
+            self._processed = self.process_image()
+            self._processed_key = key
+            self._base_photo = None
+        return self._processed
+        
+    def get_base_photo(self):
+        """Bitmap 1:1 do resultado processado (cacheado junto com o resultado)"""
+        processed = self.get_processed()
+        if self._base_photo is None:
+            self._base_photo = bitmap_photo(processed)
+        return self._base_photo
+        
+    def schedule_preview_update(self, delay=100):
+        """Agenda update_preview() agrupando eventos <Configure> seguidos"""
+        if not self.preview_canvas:
+            return
+        if self._preview_job is not None:
+            self.preview_canvas.after_cancel(self._preview_job)
+        self._preview_job = self.preview_canvas.after(delay, self.update_preview)
+        
     def update_preview(self):
         """Atualiza a prévia da imagem processada"""
+        self._preview_job = None
         # Verificar se o canvas existe
         if not self.preview_canvas:
             return
             
         try:
-            # Processar imagem com configurações atuais
-            processed = self.process_image()
+            # Processar imagem com configurações atuais (cacheado)
+            processed = self.get_processed()
             
-            # Redimensionar para prévia (usar todo o espaço disponível)
+            # Usar todo o espaço disponível
             canvas_width = self.preview_canvas.winfo_width()
             canvas_height = self.preview_canvas.winfo_height()
             
@@ -264,26 +363,120 @@ class ImageImporter:
             if canvas_height <= 1:
                 canvas_height = 300
                 
-            preview_size = (canvas_width, canvas_height)
-            preview_img = cv2.resize(processed, preview_size, interpolation=cv2.INTER_AREA)
+            # Ampliação inteira (vizinho mais próximo) que cabe no canvas
+            height, width = processed.shape
+            zoom = max(1, min(canvas_width // width, canvas_height // height))
             
-            # Converter para formato compatível com PhotoImage
-            # Como processed é um array de valores únicos (0 ou 255), converter para BGR
-            preview_img_bgr = cv2.cvtColor(preview_img, cv2.COLOR_GRAY2BGR)
+            # Nada mudou: manter a imagem atual
+            render_key = (self._processed_key, zoom, canvas_width, canvas_height)
+            if render_key == self._preview_render_key:
+                return
                 
-            # Converter para PhotoImage
-            photo = tk.PhotoImage(data=cv2.imencode('.ppm', preview_img_bgr)[1].tobytes())
+            photo = self.get_base_photo().zoom(zoom, zoom)
+            
+            # O preview ASCII só muda junto com o resultado processado
+            if self._preview_render_key is None or self._preview_render_key[0] != self._processed_key:
+                self.draw_ascii_preview()
             
             # Atualizar canvas
             self.preview_canvas.delete("all")
             self.preview_canvas.create_image(canvas_width//2, canvas_height//2, image=photo)
             self.preview_canvas.image = photo  # Manter referência
+            self._preview_render_key = render_key
             
         except Exception as e:
             if self.preview_canvas:
                 self.preview_canvas.delete("all")
                 self.preview_canvas.create_text(250, 150, text=f"Erro: {str(e)}", fill="red")
+            self._preview_render_key = None
             
+    def create_tuning_controls(self, parent, row):
+        """Cria os ajustes de modo, limiar, cobertura, inversão e recorte"""
+        tuning_frame = ttk.LabelFrame(parent, text="🎚️ Ajustes", padding="8")
+        tuning_frame.grid(row=row, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
+        tuning_frame.columnconfigure(1, weight=1)
+        tuning_frame.columnconfigure(3, weight=1)
+        
+        # Modo de conversão
+        ttk.Label(tuning_frame, text="Modo:").grid(row=0, column=0, sticky=tk.W)
+        self.mode_var = tk.StringVar(value=self.binarization_mode)
+        mode_combo = ttk.Combobox(tuning_frame, textvariable=self.mode_var, width=16, state="readonly",
+                                  values=IMPORT_MODES)
+        mode_combo.grid(row=0, column=1, sticky=tk.W, padx=(5, 15))
+        mode_combo.bind("<<ComboboxSelected>>", lambda e: self.on_tuning_change())
+        
+        self.invert_var = tk.BooleanVar(value=self.invert)
+        ttk.Checkbutton(tuning_frame, text="Inverter", variable=self.invert_var,
+                        command=self.on_tuning_change).grid(row=0, column=2, columnspan=2, sticky=tk.W)
+        
+        # Limiar (modo fixo) e cobertura mínima (modo cobertura)
+        self.threshold_var = tk.IntVar(value=self.threshold)
+        self.coverage_var = tk.IntVar(value=int(round(self.coverage_threshold * 100)))
+        sliders = [
+            ("Limiar:", self.threshold_var, 0, 255),
+            ("Cobertura (%):", self.coverage_var, 1, 100),
+        ]
+        
+        # Recorte: margem removida de cada lado, em % da imagem
+        self.crop_vars = [tk.IntVar(value=int(round(margin * 100))) for margin in self.crop]
+        for label, var in zip(("Recorte esq. (%):", "Recorte topo (%):",
+                               "Recorte dir. (%):", "Recorte base (%):"), self.crop_vars):
+            sliders.append((label, var, 0, 45))
+        
+        for i, (label, var, low, high) in enumerate(sliders):
+            r, c = 1 + i // 2, (i % 2) * 2
+            ttk.Label(tuning_frame, text=label).grid(row=r, column=c, sticky=tk.W)
+            tk.Scale(tuning_frame, variable=var, from_=low, to=high, orient=tk.HORIZONTAL,
+                     showvalue=True, length=160, command=lambda v: self.on_tuning_change()
+                     ).grid(row=r, column=c + 1, sticky=(tk.W, tk.E), padx=(5, 15))
+        
+    def on_tuning_change(self):
+        """Lê os ajustes do diálogo e agenda a atualização das prévias"""
+        self.binarization_mode = self.mode_var.get()
+        self.invert = self.invert_var.get()
+        self.threshold = self.threshold_var.get()
+        self.coverage_threshold = self.coverage_var.get() / 100
+        self.crop = tuple(var.get() / 100 for var in self.crop_vars)
+        self.schedule_preview_update(delay=30)
+        
+    def forget_preview_widgets(self):
+        """Descarta referências aos widgets do diálogo fechado"""
+        if self.preview_canvas is not None and self._preview_job is not None:
+            self.preview_canvas.after_cancel(self._preview_job)
+        self._preview_job = None
+        self.preview_canvas = None
+        self.ascii_canvas = None
+        self._preview_render_key = None
+        
+    def get_source(self):
+        """Planos da imagem de origem (cinza, opacidade, coloridos), convertidos uma vez por imagem"""
+        if self._source is None:
+            if self.source_image is None:
+                self.source_image = cv2.imread(self.image_path, cv2.IMREAD_UNCHANGED)
+            colored_mask = None
+            if self.imagem_processada:
+                colored_mask = self.imagem_processada.get('colored_mask')
+            self._source = SourcePlanes(self.source_image, colored_mask)
+        return self._source
+        
+    def get_sampled(self, width, height):
+        """
+        (cinza, visíveis, cobertura) do recorte atual no tamanho da grade, cacheados em
+        memória e, ao lado da análise, em disco (reabrir a mesma imagem não refaz a redução)
+        """
+        key = (width, height, self.crop)
+        if self._sampled_key != key:
+            cache_key = self.imagem_processada.get('cache_key') if self.imagem_processada else None
+            disk_key = cache_key and analysis_cache.sampled_key(cache_key, width, height, self.crop)
+            sampled = disk_key and analysis_cache.load_sampled(disk_key)
+            if not sampled:
+                sampled = self.get_source().sample(width, height, self.crop)
+                if disk_key:
+                    analysis_cache.save_sampled(disk_key, *sampled)
+            self._sampled = sampled
+            self._sampled_key = key
+        return self._sampled
+        
     def process_image(self):
         """Processa a imagem com as configurações atuais usando análise pixel a pixel"""
         try:
@@ -295,76 +488,22 @@ class ImageImporter:
                     show_details=False, 
                     show_terminal_preview=False
                 )
+                self._source = None
             
             # Obter dimensões da grade de destino
             target_width = self.parent_gui.grid_width
             target_height = self.parent_gui.grid_height
             
-            # Criar array de resultado (0 = branco, 255 = preto)
-            result_array = np.zeros((target_height, target_width), dtype=np.uint8)
+            # Redução (cacheada) do recorte atual; daqui em diante só a binarização
+            gray, visible, coverage = self.get_sampled(target_width, target_height)
             
-            # Se temos dados analisados, usar para conversão inteligente
-            if self.imagem_processada and 'colored_positions' in self.imagem_processada:
-                # Usar as posições dos pixels coloridos para mapeamento preciso
-                colored_positions = self.imagem_processada.get('colored_positions', [])
-                white_positions = self.imagem_processada.get('white_positions', [])
-                transparent_positions = self.imagem_processada.get('transparent_positions', [])
-                
-                # Obter dimensões da imagem original
-                original_height, original_width = self.original_image.shape[:2]
-                
-                # Mapear cada pixel da grade de destino
-                for grid_y in range(target_height):
-                    for grid_x in range(target_width):
-                        # Calcular posição correspondente na imagem original
-                        orig_x = int((grid_x + 0.5) * original_width / target_width)
-                        orig_y = int((grid_y + 0.5) * original_height / target_height)
-                        
-                        # Verificar se esta posição tem pixel colorido
-                        if (orig_x, orig_y) in colored_positions:
-                            result_array[grid_y, grid_x] = 255  # Preto
-                        else:
-                            result_array[grid_y, grid_x] = 0    # Branco
-                            
-            else:
-                # Fallback: método anterior de conversão
-                # Redimensionar para o tamanho da grade
-                target_size = (target_width, target_height)
-                resized = cv2.resize(self.original_image, target_size, interpolation=cv2.INTER_AREA)
-                
-                # Processar pixel a pixel com lógica corrigida
-                height, width = resized.shape[:2]
-                channels = resized.shape[2] if len(resized.shape) > 2 else 1
-                
-                for y in range(height):
-                    for x in range(width):
-                        if channels == 1:
-                            # Imagem em escala de cinza
-                            pixel_value = resized[y, x]
-                            # Se é quase branco (> 240), fica branco (0), senão fica preto (255)
-                            result_array[y, x] = 0 if pixel_value > 240 else 255
-                            
-                        elif channels == 3:
-                            # Imagem RGB
-                            b, g, r = resized[y, x]
-                            # Converter para escala de cinza
-                            gray_value = int(0.299 * r + 0.587 * g + 0.114 * b)
-                            # Se é quase branco (> 240), fica branco (0), senão fica preto (255)
-                            result_array[y, x] = 0 if gray_value > 240 else 255
-                            
-                        elif channels == 4:
-                            # Imagem RGBA
-                            b, g, r, a = resized[y, x]
-                            if a < 128:  # Pixel transparente
-                                result_array[y, x] = 0  # Branco
-                            else:  # Pixel visível (alpha >= 128)
-                                # Converter para escala de cinza
-                                gray_value = int(0.299 * r + 0.587 * g + 0.114 * b)
-                                # Se é quase branco (> 240), fica branco (0), senão fica preto (255)
-                                result_array[y, x] = 0 if gray_value > 240 else 255
-            
-            # Retornar array de valores únicos (0 ou 255)
-            return result_array
+            # Decisão de cada célula pela API de conversão (0/1 ou níveis de cinza)
+            bits = self.gray_bits()
+            levels = api.quantize_sampled(gray, visible, coverage, self.binarization_mode, self.threshold,
+                                          self.invert, self.coverage_threshold, bits)
+            
+            # Retornar array de valores 0-255 (255 = preto)
+            return levels_to_ink(levels, bits)
             
         except Exception as e:
             raise Exception(f"Erro ao processar imagem: {str(e)}")
@@ -372,19 +511,13 @@ class ImageImporter:
     def apply_import(self, dialog):
         """Aplica a imagem processada à grade de desenho"""
         try:
-            # Processar imagem final
-            processed = self.process_image()
-            
-            # Converter para formato da grade ('.' para branco, '#' para preto)
-            # 0 = branco (deve virar '.'), 255 = preto (deve virar '#')
-            self.parent_gui.grid_data = []
-            for row in processed:
-                grid_row = []
-                for pixel in row:
-                    # Se o pixel é 0 (branco), coloca '.' (branco na grade)
-                    # Se o pixel é 255 (preto), coloca '#' (preto na grade)
-                    grid_row.append('#' if pixel == 255 else '.')
-                self.parent_gui.grid_data.append(grid_row)
+            # Processar imagem final (reaproveita a prévia se nada mudou)
+            processed = self.get_processed()
+            
+            # Converter para o modelo da grade (0 = branco '.', 1 = preto '#';
+            # em tons de cinza, níveis até 2^bits - 1)
+            # 0 = branco, 255 = preto no array processado
+            self.parent_gui.grid_data = ink_to_levels(processed, self.gray_bits())
                 
             # Atualizar interface
             self.parent_gui.fill_cells()
@@ -400,6 +533,15 @@ class ImageImporter:
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao aplicar imagem: {str(e)}")
 
+    def draw_ascii_preview(self):
+        """Redesenha o preview ASCII com o bitmap cacheado"""
+        if not self.ascii_canvas:
+            return
+        photo = self.get_base_photo().zoom(self.ascii_cell_size, self.ascii_cell_size)
+        self.ascii_canvas.delete("all")
+        self.ascii_canvas.create_image(2, 2, image=photo, anchor='nw')
+        self.ascii_canvas.image = photo  # Manter referência
+        
     def show_ascii_preview_in_frame(self, parent_frame):
         """Mostra um preview da conversão ASCII no frame especificado"""
         try:
@@ -413,83 +555,47 @@ class ImageImporter:
             display_width =self.parent_gui.grid_width
             display_height =self.parent_gui.grid_height
             
-            # Calcular escala para mostrar
-            scale_x = display_width / self.parent_gui.grid_width
-            scale_y = display_height / self.parent_gui.grid_height
-            scale = min(scale_x, scale_y)
+            # Mesmo resultado (cacheado) que será aplicado na importação
+            self.get_processed()
+            cell_size = max(1, min(8, 800 // max(display_width, display_height)))
+            
+            # Mostrar preview ASCII
+            ttk.Label(parent_frame, text=f"Preview {display_width}x{display_height}:", 
+                     anchor="center").grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
+            
+            # Canvas para preview ASCII (centralizado)
+            ascii_canvas = tk.Canvas(parent_frame, width=display_width*cell_size, height=display_height*cell_size, 
+                                   bg='white', relief='sunken', bd=1)
+            ascii_canvas.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
+            
+            # Centralizar o canvas horizontalmente
+            parent_frame.columnconfigure(0, weight=1)
+            
+            # Desenhar grade ASCII: um único bitmap ampliado em vez de um retângulo por célula
+            self.ascii_canvas = ascii_canvas
+            self.ascii_cell_size = cell_size
+            self.draw_ascii_preview()
+            
+            # Legenda (centralizada)
+            legend_frame = ttk.Frame(parent_frame)
+            legend_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(5, 0))
+            legend_frame.columnconfigure(0, weight=1)
+            
+            # Título da legenda centralizado
+            ttk.Label(legend_frame, text="🔤 Legenda:", 
+                     anchor="center").grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
+            
+            # Itens da legenda centralizados
+            legend_items = [
+                "'#' = Preto (pixel com cor)",
+                "'.' = Branco (espaço vazio)",
+                "' ' = Transparente"
+            ]
+            
+            for i, item in enumerate(legend_items):
+                ttk.Label(legend_frame, text=item, 
+                         anchor="center").grid(row=i+1, column=0, sticky=(tk.W, tk.E), pady=2)
             
-            if scale < 1.0:
-                # Redimensionar para mostrar
-                target_size = (display_width, display_height)
-                resized = cv2.resize(self.original_image, target_size, interpolation=cv2.INTER_AREA)
-                
-                # Converter para ASCII
-                ascii_grid = []
-                for y in range(display_height):
-                    ascii_line = ""
-                    for x in range(display_width):
-                        if len(resized.shape) == 3:
-                            if resized.shape[2] == 4:  # RGBA
-                                b, g, r, a = resized[y, x]
-                                if a < 128:  # Transparente
-                                    ascii_line += " "
-                                else:
-                                    gray_value = int(0.299 * r + 0.587 * g + 0.114 * b)
-                                    ascii_line += "#" if gray_value <= 240 else "."
-                            else:  # RGB
-                                b, g, r = resized[y, x]
-                                gray_value = int(0.299 * r + 0.587 * g + 0.114 * b)
-                                ascii_line += "#" if gray_value <= 240 else "."
-                        else:  # Grayscale
-                            pixel_value = resized[y, x]
-                            ascii_line += "#" if pixel_value <= 240 else "."
-                    ascii_grid.append(ascii_line)
-                
-                # Mostrar preview ASCII
-                ttk.Label(parent_frame, text=f"Preview {display_width}x{display_height}:", 
-                         anchor="center").grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
-                
-                # Canvas para preview ASCII (centralizado)
-                ascii_canvas = tk.Canvas(parent_frame, width=display_width*8, height=display_height*8, 
-                                       bg='white', relief='sunken', bd=1)
-                ascii_canvas.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
-                
-                # Centralizar o canvas horizontalmente
-                parent_frame.columnconfigure(0, weight=1)
-                
-                # Desenhar grade ASCII
-                cell_size = 8
-                for y, line in enumerate(ascii_grid):
-                    for x, char in enumerate(line):
-                        x_pos = x * cell_size
-                        y_pos = y * cell_size
-                        if char == "#":
-                            ascii_canvas.create_rectangle(x_pos, y_pos, x_pos + cell_size, y_pos + cell_size, 
-                                                        fill='black', outline='lightgray')
-                        else:
-                            ascii_canvas.create_rectangle(x_pos, y_pos, x_pos + cell_size, y_pos + cell_size, 
-                                                        fill='white', outline='lightgray')
-                
-                # Legenda (centralizada)
-                legend_frame = ttk.Frame(parent_frame)
-                legend_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(5, 0))
-                legend_frame.columnconfigure(0, weight=1)
-                
-                # Título da legenda centralizado
-                ttk.Label(legend_frame, text="🔤 Legenda:", 
-                         anchor="center").grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
-                
-                # Itens da legenda centralizados
-                legend_items = [
-                    "'#' = Preto (pixel com cor)",
-                    "'.' = Branco (espaço vazio)",
-                    "' ' = Transparente"
-                ]
-                
-                for i, item in enumerate(legend_items):
-                    ttk.Label(legend_frame, text=item, 
-                             anchor="center").grid(row=i+1, column=0, sticky=(tk.W, tk.E), pady=2)
-                
         except Exception as e:
             # Em caso de erro, mostrar mensagem
             ttk.Label(parent_frame, text=f"⚠️ Erro no preview ASCII: {str(e)}").grid(row=0, column=0, sticky=tk.W)
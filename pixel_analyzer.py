@@ -9,6 +9,11 @@ import cv2
 import numpy as np
 import os
 import sys
+from binarization import image_to_binary, BINARIZATION_MODES, DEFAULT_THRESHOLD
+import analysis_cache
+
+# Versão das regras de classify_pixels(); mudar as regras invalida o cache em disco
+ANALYSIS_VERSION = 1
 
 def analyze_pixel_color(r, g, b, a=None):
     """
@@ -35,6 +40,33 @@ def analyze_pixel_color(r, g, b, a=None):
     else:
         return 'colorido'  # Qualquer outra coisa é considerada colorida
 
+def classify_pixels(image):
+    """
+    Classifica todos os pixels de uma vez (mesmas regras de analyze_image_pixels)
+    Retorna: (colored, white, transparent) como máscaras booleanas altura x largura
+    """
+    height, width = image.shape[:2]
+    channels = image.shape[2] if len(image.shape) > 2 else 1
+    transparent = np.zeros((height, width), dtype=bool)
+    
+    if channels == 1:
+        # Escala de cinza: quase branco (> 240) é branco
+        gray = image.reshape(height, width)
+        white = gray > 240
+    elif channels == 4:
+        # RGBA: alpha baixo é transparente, o resto é colorido
+        transparent = image[:, :, 3] < 128
+        white = np.zeros((height, width), dtype=bool)
+    else:
+        # RGB: mesma regra de analyze_pixel_color (branco = canais altos e pouco diferentes)
+        bgr = image[:, :, :3]
+        high = bgr.min(axis=2).astype(np.int16)
+        rgb_diff = bgr.max(axis=2).astype(np.int16) - high
+        white = (high > 200) & (rgb_diff <= 30)
+    
+    colored = ~(white | transparent)
+    return colored, white, transparent
+
 def show_image_in_terminal(image_path, max_width=80, max_height=40):
     """
     Mostra a imagem no terminal usando caracteres ASCII
@@ -125,11 +157,12 @@ def show_image_in_terminal(image_path, max_width=80, max_height=40):
     print(f"Pixels visíveis: {visible_pixels:,} ({visible_pixels/total_pixels*100:.1f}%)")
     print(f"Pixels transparentes: {total_pixels - visible_pixels:,} ({(total_pixels - visible_pixels)/total_pixels*100:.1f}%)")
 
-def show_ascii_conversion_preview(image_path, grid_width=16, grid_height=16):
+def show_ascii_conversion_preview(image_path, grid_width=16, grid_height=16, mode='fixo', threshold=DEFAULT_THRESHOLD):
     """
     Mostra como a imagem ficaria convertida para ASCII na grade especificada
+    mode: modo de binarização (ver binarization.BINARIZATION_MODES)
     """
-    print(f"\n🎯 PREVIEW DA CONVERSÃO ASCII ({grid_width}x{grid_height})")
+    print(f"\n🎯 PREVIEW DA CONVERSÃO ASCII ({grid_width}x{grid_height}) - modo {mode}")
     print("=" * 60)
     
     # Carregar e processar imagem
@@ -138,48 +171,18 @@ def show_ascii_conversion_preview(image_path, grid_width=16, grid_height=16):
         print("❌ Erro ao carregar imagem")
         return
     
-    # Redimensionar para o tamanho da grade
-    resized = cv2.resize(image, (grid_width, grid_height), interpolation=cv2.INTER_AREA)
-    
-    # Converter para escala de cinza se necessário
-    if len(resized.shape) == 3:
-        if resized.shape[2] == 4:  # RGBA
-            # Processar cada pixel considerando transparência
-            gray = np.zeros((grid_height, grid_width), dtype=np.uint8)
-            for y in range(grid_height):
-                for x in range(grid_width):
-                    b, g, r, a = resized[y, x]
-                    if a >= 128:  # Pixel visível
-                        gray[y, x] = int(0.299 * r + 0.587 * g + 0.114 * b)
-                    else:  # Pixel transparente
-                        gray[y, x] = 255  # Branco
-        else:  # RGB
-            gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
-    else:
-        gray = resized
+    # Reduzir para a grade e binarizar (núcleo compartilhado com o importador)
+    binary = image_to_binary(image, grid_width, grid_height, mode, threshold)
     
     # Mostrar grade ASCII
     print(f"📐 Grade: {grid_width}x{grid_height}")
     print("=" * (grid_width + 2))
     
-    colored_count = 0
-    transparent_count = 0
+    for row in binary:
+        print("|" + "".join("#" if pixel else "." for pixel in row) + "|")
     
-    for y in range(grid_height):
-        line = "|"
-        for x in range(grid_width):
-            pixel_value = gray[y, x]
-            
-            # Converter para ASCII
-            if pixel_value > 240:  # Quase branco (transparente ou branco)
-                line += "."
-                transparent_count += 1
-            else:  # Tem cor
-                line += "#"
-                colored_count += 1
-        
-        line += "|"
-        print(line)
+    colored_count = int(np.count_nonzero(binary))
+    transparent_count = grid_width * grid_height - colored_count
     
     print("=" * (grid_width + 2))
     print("📊 LEGENDA:")
@@ -189,9 +192,41 @@ def show_ascii_conversion_preview(image_path, grid_width=16, grid_height=16):
     print(f"Pixels coloridos: {colored_count} ({colored_count/(grid_width*grid_height)*100:.1f}%)")
     print(f"Pixels transparentes/brancos: {transparent_count} ({transparent_count/(grid_width*grid_height)*100:.1f}%)")
 
-def analyze_image_pixels(image_path, show_details=True, show_terminal_preview=True):
+def _load_analysis(image_path, use_cache):
+    """
+    Lê o arquivo uma vez e retorna (imagem ou None, altura, largura, canais, máscaras,
+    chave do cache ou None). Com cache, uma imagem já analisada não é nem decodificada
+    (imagem = None).
+    """
+    with open(image_path, 'rb') as f:
+        data = f.read()
+
+    key = None
+    if use_cache and analysis_cache.cache_enabled():
+        key = analysis_cache.analysis_key(data, ('classify_pixels', ANALYSIS_VERSION))
+        cached = analysis_cache.load_analysis(key)
+        if cached is not None:
+            height, width, channels, _, masks = cached
+            print("💾 Análise carregada do cache")
+            return None, height, width, channels, masks, key
+
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    if image is None:
+        return None, 0, 0, 0, None, None
+
+    height, width = image.shape[:2]
+    channels = image.shape[2] if len(image.shape) > 2 else 1
+    masks = classify_pixels(image)
+    if key is not None:
+        counts = (height * width,) + tuple(int(np.count_nonzero(mask)) for mask in masks)
+        analysis_cache.save_analysis(key, height, width, channels, counts, masks)
+    return image, height, width, channels, masks, key
+
+def analyze_image_pixels(image_path, show_details=True, show_terminal_preview=True, use_cache=True):
     """
     Analisa todos os pixels de uma imagem
+    use_cache: reaproveita a análise guardada em disco para o mesmo conteúdo
+    (analysis_cache); ignorado com show_details, que precisa dos pixels.
     """
     print(f"🔍 Analisando imagem: {image_path}")
     print("=" * 60)
@@ -201,16 +236,14 @@ def analyze_image_pixels(image_path, show_details=True, show_terminal_preview=Tr
         print(f"❌ Erro: Arquivo não encontrado: {image_path}")
         return
     
-    # Tentar carregar com OpenCV
-    image = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
+    # Carregar imagem (ou a análise em cache) com OpenCV
+    image, height, width, channels, masks, cache_key = _load_analysis(image_path, use_cache and not show_details)
     
-    if image is None:
+    if masks is None:
         print(f"❌ Erro: Não foi possível carregar a imagem: {image_path}")
         return
     
     # Informações da imagem
-    height, width = image.shape[:2]
-    channels = image.shape[2] if len(image.shape) > 2 else 1
     
     print(f"📐 Dimensões: {width}x{height} pixels")
     print(f"🎨 Canais: {channels}")
@@ -226,59 +259,23 @@ def analyze_image_pixels(image_path, show_details=True, show_terminal_preview=Tr
     
     # Contadores
     total_pixels = width * height
-    colored_pixels = 0
-    white_pixels = 0
-    transparent_pixels = 0
-    
-    # Listas para armazenar posições
-    colored_positions = []
-    white_positions = []
-    transparent_positions = []
     
-    # Analisar cada pixel
+    # Analisar todos os pixels de uma vez
     print("🔍 Analisando pixels...")
-    
-    for y in range(height):
-        for x in range(width):
-            if channels == 1:
-                # Imagem em escala de cinza
-                gray_value = image[y, x]
-                if gray_value > 240:
-                    pixel_type = 'branco'
-                    white_pixels += 1
-                    white_positions.append((x,y))
-                else:
-                    pixel_type = 'colorido'
-                    colored_pixels += 1
-                    colored_positions.append((x,y))
-                    
-            elif channels == 3:
-                # Imagem RGB
-                b, g, r = image[y, x]  # OpenCV usa BGR
-                pixel_type = analyze_pixel_color(r, g, b)
-                
-                if pixel_type == 'branco':
-                    white_pixels += 1
-                    white_positions.append((x,y))
-                else:
-                    colored_pixels += 1
-                    colored_positions.append((x,y))
-                    
-            elif channels == 4:
-                # Imagem RGBA
-                b, g, r, a = image[y, x]  # OpenCV usa BGRA
-                if a < 128:  # Transparente (alpha muito baixo)
-                    pixel_type = 'transparente'
-                    transparent_pixels += 1
-                    transparent_positions.append((x,y))
-                else:  # Pixel visível (alpha >= 128)
-                    pixel_type = 'colorido'
-                    colored_pixels += 1
-                    colored_positions.append((x,y))
-            
-            # Mostrar detalhes do pixel (opcional)
-            if show_details and (x < 10 or y < 10):  # Mostrar apenas primeiros pixels
-                print(f"Pixel ({x},{y}): {pixel_type} - RGB: {r if 'r' in locals() else 'N/A'},{g if 'g' in locals() else 'N/A'},{b if 'b' in locals() else 'N/A'}{f', A: {a}' if 'a' in locals() else ''}")
+    colored_mask, white_mask, transparent_mask = masks
+    colored_pixels = int(np.count_nonzero(colored_mask))
+    white_pixels = int(np.count_nonzero(white_mask))
+    transparent_pixels = int(np.count_nonzero(transparent_mask))
+    
+    # Mostrar detalhes dos primeiros pixels (opcional)
+    if show_details:
+        types = np.where(transparent_mask, 'transparente', np.where(white_mask, 'branco', 'colorido'))
+        for y in range(height):
+            # Mostrar apenas primeiros pixels (x < 10 ou y < 10)
+            for x in range(width if y < 10 else min(10, width)):
+                values = image[y, x] if channels > 1 else [image[y, x]] * 3
+                alpha = f", A: {values[3]}" if channels == 4 else ''
+                print(f"Pixel ({x},{y}): {types[y, x]} - RGB: {values[2]},{values[1]},{values[0]}{alpha}")
     
     # Estatísticas finais
     print("\n" + "=" * 60)
@@ -299,19 +296,67 @@ def analyze_image_pixels(image_path, show_details=True, show_terminal_preview=Tr
         show_image_in_terminal(image_path)
         show_ascii_conversion_preview(image_path, 16, 16)  # Preview 16x16
     
-    return {
+    # As listas de posições só são montadas se alguém as pedir (ver PixelAnalysis)
+    return PixelAnalysis({
         'total': total_pixels,
         'colored': colored_pixels,
         'white': white_pixels,
         'transparent': transparent_pixels if channels == 4 else 0,
-        'colored_positions': colored_positions,
-        'white_positions': white_positions,
-        'transparent_positions': transparent_positions if channels == 4 else []
+        'colored_mask': colored_mask,
+        'white_mask': white_mask,
+        'transparent_mask': transparent_mask if channels == 4 else np.zeros_like(transparent_mask),
+        'cache_key': cache_key,  # Para guardar dados derivados (ex.: reduções) ao lado da análise
+    })
+
+def _positions(mask):
+    """Lista de posições (x, y) dos pixels marcados na máscara"""
+    ys, xs = np.nonzero(mask)
+    return list(zip(xs.tolist(), ys.tolist()))
+
+class PixelAnalysis(dict):
+    """
+    Resultado de analyze_image_pixels(). As listas de posições (x, y) das versões
+    anteriores ('colored_positions', 'white_positions', 'transparent_positions')
+    custam segundos em imagens grandes: são montadas das máscaras no primeiro acesso.
+    """
+
+    _POSITION_KEYS = {'colored_positions': 'colored_mask', 'white_positions': 'white_mask',
+                      'transparent_positions': 'transparent_mask'}
+
+    def __missing__(self, key):
+        if key not in self._POSITION_KEYS:
+            raise KeyError(key)
+        positions = self[key] = _positions(self[self._POSITION_KEYS[key]])
+        return positions
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self._POSITION_KEYS or super().__contains__(key)
+
+def mask_statistics(colored, white, transparent):
+    """
+    Contagens de uma região a partir das máscaras de classify_pixels().
+    As contagens são feitas nos dois últimos eixos, então a mesma função serve
+    para uma região (altura x largura) ou para várias células de uma vez
+    (linhas x colunas x altura x largura, ex.: visões de uma sprite sheet).
+    Retorna dicionário com 'total', 'colored', 'white' e 'transparent'.
+    """
+    return {
+        'total': colored.shape[-2] * colored.shape[-1],
+        'colored': np.count_nonzero(colored, axis=(-2, -1)),
+        'white': np.count_nonzero(white, axis=(-2, -1)),
+        'transparent': np.count_nonzero(transparent, axis=(-2, -1)),
     }
 
 def analyze_specific_region(image_path, x1, y1, x2, y2):
     """
     Analisa uma região específica da imagem
+    Retorna as contagens de mask_statistics() (None em caso de erro)
     """
     print(f"🔍 Analisando região ({x1},{y1}) a ({x2},{y2})")
     print("=" * 40)
@@ -336,41 +381,20 @@ def analyze_specific_region(image_path, x1, y1, x2, y2):
     print(f"📐 Região: {region_width}x{region_height} pixels")
     print(f"🎨 Canais: {channels}")
     
-    # Contadores para região
-    colored = 0
-    white = 0
-    transparent = 0
-    
-    for y in range(region_height):
-        for x in range(region_width):
-            if channels == 1:
-                gray_value = region[y, x]
-                if gray_value > 240:
-                    white += 1
-                else:
-                    colored += 1
-            elif channels == 3:
-                b, g, r = region[y, x]
-                pixel_type = analyze_pixel_color(r, g, b)
-                if pixel_type == 'branco':
-                    white += 1
-                else:
-                    colored += 1
-            elif channels == 4:
-                b, g, r, a = region[y, x]
-                if a < 128:  # Transparente
-                    transparent += 1
-                else:  # Pixel visível
-                    colored += 1
-    
-    total_region = region_width * region_height
+    # Classificar a região inteira de uma vez
+    stats = mask_statistics(*classify_pixels(region))
+    total_region = stats['total']
+    colored = int(stats['colored'])
+    white = int(stats['white'])
+    transparent = int(stats['transparent'])
     
     print(f"\n📊 ESTATÍSTICAS DA REGIÃO:")
     print(f"Total: {total_region:,}")
-    print(f"Coloridos: {colored:,} ({colored/total_region*100:.1f}%)")
-    print(f"Brancos: {white:,} ({white/total_region*100:.1f}%)")
+    print(f"Coloridos: {colored:,} ({colored/max(total_region, 1)*100:.1f}%)")
+    print(f"Brancos: {white:,} ({white/max(total_region, 1)*100:.1f}%)")
     if channels == 4:
-        print(f"Transparentes: {transparent:,} ({transparent/total_region*100:.1f}%)")
+        print(f"Transparentes: {transparent:,} ({transparent/max(total_region, 1)*100:.1f}%)")
+    return stats
 
 def main():
     """
@@ -382,19 +406,24 @@ def main():
         print("\n🔧 OPÇÕES:")
         print("--details     : Mostra detalhes de cada pixel")
         print("--no-preview  : Não mostra preview no terminal")
+        print("--no-cache    : Ignora o cache de análise em disco")
         print("--region x1 y1 x2 y2 : Analisa região específica")
         print("--grid WxH    : Especifica tamanho da grade para preview")
+        print(f"--modo M      : Binarização do preview ({', '.join(BINARIZATION_MODES)})")
+        print("--limiar N    : Limiar do modo fixo (padrão 240)")
         print("\n📝 EXEMPLOS:")
         print("python3 pixel_analyzer.py wifi.png")
         print("python3 pixel_analyzer.py wifi.png --details")
         print("python3 pixel_analyzer.py wifi.png --no-preview")
         print("python3 pixel_analyzer.py wifi.png --grid 32x32")
+        print("python3 pixel_analyzer.py foto.jpg --grid 128x64 --modo floyd-steinberg")
         print("python3 pixel_analyzer.py wifi.png --region 0 0 16 16")
         return
     
     image_path = sys.argv[1]
     show_details = '--details' in sys.argv
     show_preview = '--no-preview' not in sys.argv
+    use_cache = '--no-cache' not in sys.argv
     
     # Verificar se é análise de região
     if '--region' in sys.argv:
@@ -423,13 +452,28 @@ def main():
         except ValueError:
             print("❌ Erro: Formato da grade deve ser WxH (ex: 16x16)")
     
+    # Modo e limiar de binarização do preview
+    mode = 'fixo'
+    threshold = DEFAULT_THRESHOLD
+    try:
+        if '--modo' in sys.argv:
+            mode = sys.argv[sys.argv.index('--modo') + 1]
+            if mode not in BINARIZATION_MODES:
+                print(f"❌ Erro: Modo deve ser um de: {', '.join(BINARIZATION_MODES)}")
+                return
+        if '--limiar' in sys.argv:
+            threshold = int(sys.argv[sys.argv.index('--limiar') + 1])
+    except (IndexError, ValueError):
+        print("❌ Erro: --modo e --limiar precisam de um valor (ex: --modo otsu --limiar 200)")
+        return
+    
     # Análise completa da imagem
     try:
-        resultado = analyze_image_pixels(image_path, show_details, show_preview)
+        resultado = analyze_image_pixels(image_path, show_details, show_preview, use_cache)
         
         # Se preview está ativado, mostrar também com grade personalizada
         if show_preview:
-            show_ascii_conversion_preview(image_path, grid_width, grid_height)
+            show_ascii_conversion_preview(image_path, grid_width, grid_height, mode, threshold)
             
     except Exception as e:
         print(f"❌ Erro na análise: {e}")
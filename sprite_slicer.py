@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fatiador de Sprite Sheets
+Converte uma sprite sheet inteira de uma vez (uma decodificação e uma
+classificação vetorizada da folha) e separa os ícones com visões do array,
+sem copiar nem recortar imagem por imagem. Células vazias são puladas pelas
+estatísticas de mask_statistics() (as mesmas de analyze_specific_region) e
+cada ícone vira um array nomeado no header gerado.
+
+Geometria da folha (em pixels):
+    margem | célula | espaçamento | célula | espaçamento | ... | margem
+"""
+
+import os
+import sys
+
+import numpy as np
+
+from binarization import BINARIZATION_MODES, DEFAULT_THRESHOLD, block_coverage, binarize_coverage
+from bitmap_export import pack_xbm, c_identifier, c_array
+from pixel_analyzer import classify_pixels, mask_statistics
+import converter_api as api
+
+SLICE_MODES = ('cobertura',) + BINARIZATION_MODES
+
+class SpriteSheetError(ValueError):
+    """Geometria incompatível com a folha ou imagem inválida"""
+
+def sheet_layout(sheet_width, sheet_height, cell_width, cell_height, spacing=0, margin=0):
+    """Número de (colunas, linhas) de células completas que cabem na folha"""
+    if cell_width < 1 or cell_height < 1 or spacing < 0 or margin < 0:
+        raise SpriteSheetError("Célula deve ter pelo menos 1x1 e espaçamento/margem não podem ser negativos")
+    columns = (sheet_width - 2 * margin + spacing) // (cell_width + spacing)
+    rows = (sheet_height - 2 * margin + spacing) // (cell_height + spacing)
+    if columns < 1 or rows < 1:
+        raise SpriteSheetError(f"Nenhuma célula {cell_width}x{cell_height} cabe na folha {sheet_width}x{sheet_height}")
+    return columns, rows
+
+def cell_views(array, cell_width, cell_height, spacing=0, margin=0):
+    """
+    Visão (linhas, colunas, altura, largura) das células de um array 2D, sem cópia:
+    cada célula é array[y:y + altura, x:x + largura] da folha original (somente leitura).
+    """
+    array = np.asarray(array)
+    columns, rows = sheet_layout(array.shape[1], array.shape[0], cell_width, cell_height, spacing, margin)
+    inner = array[margin:, margin:]
+    row_stride, col_stride = inner.strides[:2]
+    return np.lib.stride_tricks.as_strided(
+        inner,
+        shape=(rows, columns, cell_height, cell_width),
+        strides=(row_stride * (cell_height + spacing), col_stride * (cell_width + spacing),
+                 row_stride, col_stride),
+        writeable=False)
+
+def classify_sheet(image, mode='cobertura', threshold=DEFAULT_THRESHOLD, invert=False):
+    """
+    Classifica a folha inteira de uma vez.
+    Retorna (grade uint8 da folha em tamanho original, 1 = preto; máscaras de classify_pixels).
+    'cobertura' usa a máscara de pixels coloridos; os demais modos usam o núcleo de binarização.
+    """
+    masks = classify_pixels(image)
+    if mode == 'cobertura':
+        # Mesma inversão do importador: a cobertura inteira é invertida
+        sheet = (masks[0] != invert).astype(np.uint8)
+    else:
+        sheet = api.binarize(image, mode=mode, threshold=threshold, invert=invert)
+    return sheet, masks
+
+def slice_sheet(image, cell_width, cell_height, spacing=0, margin=0, mode='cobertura',
+                threshold=DEFAULT_THRESHOLD, invert=False, size=None, min_pixels=1):
+    """
+    Fatia a folha em ícones.
+    size: (largura, altura) opcional para reduzir cada célula (cobertura por bloco);
+    min_pixels: células com menos pixels coloridos que isso são consideradas vazias.
+    Retorna lista de (linha, coluna, grade) das células não vazias, em ordem de leitura.
+    Sem size, cada grade é uma visão da grade da folha (sem cópia).
+    """
+    if image is None:
+        raise SpriteSheetError("Imagem inválida")
+    sheet, masks = classify_sheet(image, mode, threshold, invert)
+    cells = cell_views(sheet, cell_width, cell_height, spacing, margin)
+    stats = mask_statistics(*(cell_views(mask, cell_width, cell_height, spacing, margin) for mask in masks))
+    occupied = stats['colored'] >= min_pixels
+
+    icons = []
+    for row, column in zip(*np.nonzero(occupied)):
+        grid = cells[row, column]
+        if size is not None:
+            # Mesma regra de cobertura do importador: fração de pixels pretos por célula da grade
+            grid = (binarize_coverage(block_coverage(grid, *size)) == 255).astype(np.uint8)
+        icons.append((int(row), int(column), grid))
+    return icons
+
+def sprites_c_code(icons, name='sprites', names=None):
+    """
+    Header C com um array XBM por ícone, os tamanhos e uma tabela de ponteiros.
+    names: nomes dos ícones na ordem (padrão: nome_<linha>_<coluna>).
+    """
+    name = c_identifier(name)
+    upper = name.upper()
+    if names is None:
+        names = [f"{name}_{row}_{column}" for row, column, _ in icons]
+    symbols = [c_identifier(icon_name) for icon_name in names]
+
+    code = f"// {len(icons)} ícones da sprite sheet {name} (u8g2.drawXBMP)\n"
+    code += f"#define {upper}_COUNT {len(icons)}\n\n"
+    for symbol, (row, column, grid) in zip(symbols, icons):
+        height, width = grid.shape
+        code += f"#define {symbol.upper()}_WIDTH {width}\n"
+        code += f"#define {symbol.upper()}_HEIGHT {height}\n"
+        code += c_array(f"{symbol}_bits", pack_xbm(grid),
+                        comment=f"{symbol}: célula ({row}, {column}), {width}x{height}")
+        code += "\n"
+    code += f"static const unsigned char * const {name}_icons[] PROGMEM = {{\n"
+    code += ''.join(f"  {symbol}_bits,\n" for symbol in symbols)
+    code += "};\n"
+    return code
+
+def main():
+    """
+    Função principal
+    """
+    args = sys.argv[1:]
+    if not args or args[0].startswith('--'):
+        print("📖 USO:")
+        print("python3 sprite_slicer.py <sprite_sheet> --celula WxH [opções]")
+        print("\n🔧 OPÇÕES:")
+        print("--celula WxH     : Tamanho de cada célula da folha, em pixels (obrigatório)")
+        print("--espaco N       : Pixels entre células (padrão 0)")
+        print("--margem N       : Pixels de borda ao redor da folha (padrão 0)")
+        print("--tamanho WxH    : Reduz cada ícone para este tamanho (padrão: tamanho da célula)")
+        print(f"--modo M         : Classificação ({', '.join(SLICE_MODES)}, padrão cobertura)")
+        print("--limiar N       : Limiar do modo fixo (padrão 240)")
+        print("--min-pixels N   : Pixels coloridos para a célula não ser vazia (padrão 1)")
+        print("--nomes a,b,c    : Nomes dos ícones, em ordem de leitura")
+        print("--nome NOME      : Prefixo dos símbolos C (padrão: nome do arquivo)")
+        print("--saida ARQ      : Header de saída (padrão NOME.h)")
+        print("--inverter       : Inverte preto e branco")
+        print("\n📝 EXEMPLOS:")
+        print("python3 sprite_slicer.py icones.png --celula 16x16")
+        print("python3 sprite_slicer.py folha.png --celula 32x32 --espaco 2 --margem 1 --tamanho 16x16")
+        print("python3 sprite_slicer.py folha.png --celula 8x8 --nomes wifi,bateria,seta --saida ui.h")
+        return
+
+    path = args[0]
+
+    def option(flag, default, convert=str):
+        if flag in args:
+            return convert(args[args.index(flag) + 1])
+        return default
+
+    def size_option(value):
+        width, height = value.split('x')
+        return int(width), int(height)
+
+    try:
+        cell_width, cell_height = option('--celula', None, size_option)
+        spacing = option('--espaco', 0, int)
+        margin = option('--margem', 0, int)
+        size = option('--tamanho', None, size_option)
+        mode = option('--modo', 'cobertura')
+        threshold = option('--limiar', DEFAULT_THRESHOLD, int)
+        min_pixels = option('--min-pixels', 1, int)
+        names = option('--nomes', None, lambda value: [n for n in value.split(',') if n])
+        name = option('--nome', os.path.splitext(os.path.basename(path))[0])
+        output = option('--saida', f"{c_identifier(name)}.h")
+    except (IndexError, ValueError, TypeError):
+        print("❌ Erro: opções inválidas (ex: --celula 16x16 --espaco 2)")
+        return
+    if mode not in SLICE_MODES:
+        print(f"❌ Erro: --modo deve ser um de: {', '.join(SLICE_MODES)}")
+        return
+
+    import cv2
+    image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    try:
+        icons = slice_sheet(image, cell_width, cell_height, spacing, margin, mode, threshold,
+                            '--inverter' in args, size, min_pixels)
+    except SpriteSheetError as e:
+        print(f"❌ Erro: {e}")
+        return
+    if names is not None and len(names) != len(icons):
+        print(f"❌ Erro: {len(names)} nomes para {len(icons)} ícones não vazios")
+        return
+
+    columns, rows = sheet_layout(image.shape[1], image.shape[0], cell_width, cell_height, spacing, margin)
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write(sprites_c_code(icons, name, names))
+    print(f"✅ {len(icons)} ícones de {rows * columns} células ({columns}x{rows}) gravados em {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Texto em Bitmap (fontes Hershey do OpenCV)
+Desenha rótulos e números na grade em vez de pintá-los pixel a pixel.
+
+Cada caractere é desenhado uma única vez com cv2.putText (sem anti-aliasing)
+numa célula da altura pedida e guardado num cache LRU indexado por caractere,
+fonte, altura e espessura; uma frase é a concatenação das células em cache.
+Digitar no editor só desenha os caracteres ainda não vistos.
+
+Altura em pixels = linha inteira: a maior escala em que todos os caracteres
+(parênteses, maiúsculas, descendentes) cabem nela. As fontes Hershey só têm
+ASCII imprimível (32 a 126): acentos e outros caracteres saem como '?'.
+
+Também exporta o conjunto de caracteres como uma fonte C compacta: larguras,
+posição de cada caractere e os bits de todos em sequência, sem sobra no fim das linhas.
+"""
+
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+from bitmap_export import c_identifier, c_array
+import converter_api as api
+
+try:
+    import cv2
+    HERSHEY_FONTS = {
+        'simplex': cv2.FONT_HERSHEY_SIMPLEX,
+        'plain': cv2.FONT_HERSHEY_PLAIN,
+        'duplex': cv2.FONT_HERSHEY_DUPLEX,
+        'complex': cv2.FONT_HERSHEY_COMPLEX,
+        'triplex': cv2.FONT_HERSHEY_TRIPLEX,
+        'complex_small': cv2.FONT_HERSHEY_COMPLEX_SMALL,
+        'script_simplex': cv2.FONT_HERSHEY_SCRIPT_SIMPLEX,
+        'script_complex': cv2.FONT_HERSHEY_SCRIPT_COMPLEX,
+    }
+    CV2_AVAILABLE = True
+except ImportError:
+    HERSHEY_FONTS = {}
+    CV2_AVAILABLE = False
+
+# Faixa de caracteres das fontes Hershey (ASCII imprimível)
+FIRST_CHAR = 32
+LAST_CHAR = 126
+
+# Glifos guardados no cache (caractere x fonte x altura x espessura)
+GLYPH_CACHE_SIZE = 4096
+
+MIN_HEIGHT = 5
+MAX_HEIGHT = 128
+
+def _check(font, height, thickness):
+    if not CV2_AVAILABLE:
+        raise ImportError("O texto precisa do OpenCV: pip install opencv-python")
+    if font not in HERSHEY_FONTS:
+        raise ValueError(f"Fonte desconhecida: {font} (use {', '.join(HERSHEY_FONTS)})")
+    if not MIN_HEIGHT <= height <= MAX_HEIGHT:
+        raise ValueError(f"Altura deve estar entre {MIN_HEIGHT} e {MAX_HEIGHT} pixels")
+    if thickness < 1 or thickness > max(1, height // 4):
+        raise ValueError(f"Espessura deve estar entre 1 e {max(1, height // 4)} para {height} pixels")
+
+# Todos os caracteres: a linha precisa caber o mais alto e o mais baixo deles
+_ALL_CHARS = ''.join(chr(code) for code in range(FIRST_CHAR, LAST_CHAR + 1))
+
+@lru_cache(maxsize=64)
+def font_metrics(font='simplex', height=8, thickness=1):
+    """
+    (escala do cv2.putText, linha de base): a maior escala em que a tinta de todos
+    os caracteres cabe na altura pedida, medida desenhando-os (as medidas de
+    cv2.getTextSize deixam linhas em branco nas fontes Hershey).
+    """
+    _check(font, height, thickness)
+    face = HERSHEY_FONTS[font]
+    for cap in range(height, 0, -1):
+        scale = cv2.getFontScaleFromHeight(face, cap, thickness)
+        (width, _), _ = cv2.getTextSize(_ALL_CHARS, face, scale, thickness)
+        canvas = np.zeros((height * 3, width + thickness), dtype=np.uint8)
+        cv2.putText(canvas, _ALL_CHARS, (0, height * 2), face, scale, 1, thickness, cv2.LINE_8)
+        rows = np.flatnonzero(canvas.any(axis=1))
+        if rows[-1] - rows[0] < height:
+            return scale, height * 2 - rows[0]
+    return cv2.getFontScaleFromHeight(face, 1, thickness), height - 1
+
+def render_glyph(char, font='simplex', height=8, thickness=1):
+    """
+    Célula de um caractere: array 0/1 (altura x avanço), somente leitura (é compartilhado
+    pelo cache). Caracteres fora de ASCII imprimível viram '?'.
+    """
+    if not FIRST_CHAR <= ord(char) <= LAST_CHAR:
+        char = '?'
+    return _cached_glyph(char, font, int(height), int(thickness))
+
+@lru_cache(maxsize=GLYPH_CACHE_SIZE)
+def _cached_glyph(char, font, height, thickness):
+    scale, baseline = font_metrics(font, height, thickness)
+    face = HERSHEY_FONTS[font]
+    (advance, _), _ = cv2.getTextSize(char, face, scale, thickness)
+    # Traços grossos passam do avanço do caractere: a célula cresce junto
+    advance = max(advance + thickness - 1, 1)
+    glyph = np.zeros((height, advance), dtype=np.uint8)
+    if char != ' ':
+        cv2.putText(glyph, char, ((thickness - 1) // 2, baseline), face, scale, 1, thickness, cv2.LINE_8)
+    glyph.flags.writeable = False
+    return glyph
+
+def cache_info():
+    """Acertos, faltas e ocupação do cache de glifos"""
+    return _cached_glyph.cache_info()
+
+def clear_cache():
+    _cached_glyph.cache_clear()
+
+def render_line(text, font='simplex', height=8, thickness=1, spacing=0):
+    """Uma linha de texto: células em cache lado a lado, spacing colunas em branco entre elas"""
+    if not text:
+        return np.zeros((height, 0), dtype=np.uint8)
+    glyphs = [render_glyph(char, font, height, thickness) for char in text]
+    if spacing:
+        gap = np.zeros((height, spacing), dtype=np.uint8)
+        glyphs = [part for glyph in glyphs for part in (glyph, gap)][:-1]
+    return np.concatenate(glyphs, axis=1)
+
+def render_text(text, font='simplex', height=8, thickness=1, spacing=0, line_gap=1):
+    """
+    Texto (com quebras de linha) como grade 0/1 (1 = preto). Linhas alinhadas à
+    esquerda, separadas por line_gap linhas em branco.
+    """
+    lines = [render_line(line, font, height, thickness, spacing) for line in text.split('\n')]
+    width = max(line.shape[1] for line in lines)
+    grid = np.zeros((len(lines) * (height + line_gap) - line_gap, width), dtype=np.uint8)
+    for i, line in enumerate(lines):
+        top = i * (height + line_gap)
+        grid[top:top + height, :line.shape[1]] = line
+    return grid
+
+def stamp_text(grid, text, row, col, value=1, font='simplex', height=8, thickness=1, spacing=0, line_gap=1):
+    """
+    Escreve o texto na grade (in-place) com o canto superior esquerdo em (row, col),
+    recortado nas bordas; só os pixels do texto mudam (valor value). Retorna a grade do texto.
+    """
+    text_grid = render_text(text, font, height, thickness, spacing, line_gap)
+    text_h, text_w = text_grid.shape
+    r0, r1 = max(0, row), min(grid.shape[0], row + text_h)
+    c0, c1 = max(0, col), min(grid.shape[1], col + text_w)
+    if r0 < r1 and c0 < c1:
+        grid[r0:r1, c0:c1][text_grid[r0 - row:r1 - row, c0 - col:c1 - col] != 0] = value
+    return text_grid
+
+def font_glyphs(font='simplex', height=8, thickness=1, first=FIRST_CHAR, last=LAST_CHAR):
+    """Glifos de first a last (códigos ASCII), na ordem"""
+    return [render_glyph(chr(code), font, height, thickness) for code in range(first, last + 1)]
+
+def pack_font(glyphs):
+    """
+    Fonte compacta: os bits de todos os glifos em sequência, linha a linha, sem
+    completar linhas até byte inteiro (bit 0 do byte primeiro, como no XBM).
+    Retorna (larguras, posição em bits de cada glifo, bytes).
+    """
+    widths = [glyph.shape[1] for glyph in glyphs]
+    bits = np.concatenate([glyph.ravel() for glyph in glyphs]) if glyphs else np.zeros(0, np.uint8)
+    offsets = np.concatenate(([0], np.cumsum([glyph.size for glyph in glyphs])[:-1])).astype(int).tolist()
+    return widths, offsets, np.packbits(bits, bitorder='little')
+
+def unpack_glyph(data, offset, width, height):
+    """Inverso de pack_font para um glifo (referência em Python para conferir a fonte C)"""
+    bits = np.unpackbits(np.frombuffer(bytes(data), dtype=np.uint8), bitorder='little')
+    return bits[offset:offset + width * height].reshape(height, width)
+
+_C_DRAW = """// Desenha o caractere c com o canto superior esquerdo em (x, y); retorna a largura
+static uint8_t {name}_draw_char(u8g2_t *u8g2, int16_t x, int16_t y, char c) {{
+  if (c < {upper}_FIRST || c > {upper}_LAST) c = '?';
+  uint8_t i = (uint8_t)(c - {upper}_FIRST);
+  uint8_t w = pgm_read_byte(&{name}_widths[i]);
+  {offset_type} bit = {offset_read}(&{name}_offsets[i]);
+  for (uint8_t dy = 0; dy < {upper}_HEIGHT; dy++) {{
+    for (uint8_t dx = 0; dx < w; dx++, bit++) {{
+      if (pgm_read_byte(&{name}_bits[bit >> 3]) & (1 << (bit & 7))) u8g2_DrawPixel(u8g2, x + dx, y + dy);
+    }}
+  }}
+  return w;
+}}
+
+// Desenha a frase s a partir de (x, y); retorna o x depois do último caractere
+static int16_t {name}_draw_str(u8g2_t *u8g2, int16_t x, int16_t y, const char *s) {{
+  while (*s) x += {name}_draw_char(u8g2, x, y, *s++);
+  return x;
+}}
+"""
+
+def font_stats(glyphs, packed):
+    """Flash da fonte compacta contra um array XBM por caractere"""
+    height = glyphs[0].shape[0] if glyphs else 0
+    separate = sum(height * ((glyph.shape[1] + 7) // 8) for glyph in glyphs)
+    offset_bytes = 2 if len(packed) * 8 <= 0xFFFF else 4
+    compact = len(packed) + len(glyphs) * (1 + offset_bytes)
+    return {'glyphs': len(glyphs), 'separate_bytes': separate, 'font_bytes': compact,
+            'saved_bytes': separate - compact}
+
+def font_c_code(font='simplex', height=8, thickness=1, first=FIRST_CHAR, last=LAST_CHAR, name=None):
+    """Header C da fonte compacta (larguras, posições, bits e funções de desenho). Retorna (código, estatísticas)"""
+    glyphs = font_glyphs(font, height, thickness, first, last)
+    widths, offsets, packed = pack_font(glyphs)
+    stats = font_stats(glyphs, packed)
+    name = c_identifier(name or f"fonte_{font}_{height}")
+    upper = name.upper()
+    wide = len(packed) * 8 > 0xFFFF
+    offset_type, offset_read = ('uint32_t', 'pgm_read_dword') if wide else ('uint16_t', 'pgm_read_word')
+
+    code = f"// Fonte Hershey '{font}', {height} pixels de altura, espessura {thickness}\n"
+    code += (f"// {stats['glyphs']} caracteres ('{chr(first)}' a '{chr(last)}'), {stats['font_bytes']} bytes de flash "
+             f"(arrays XBM separados: {stats['separate_bytes']} bytes)\n")
+    code += "#include <stdint.h>\n\n"
+    code += f"#define {upper}_HEIGHT {height}\n"
+    code += f"#define {upper}_FIRST {first}\n"
+    code += f"#define {upper}_LAST {last}\n\n"
+    code += c_array(f"{name}_widths", widths, comment="Largura (avanço) de cada caractere",
+                    storage='static const uint8_t')
+    code += "\n"
+    code += f"// Posição em bits de cada caractere em {name}_bits\n"
+    code += f"static const {offset_type} {name}_offsets[] PROGMEM = {{\n"
+    code += ',\n'.join("  " + ', '.join(map(str, offsets[i:i + 12])) for i in range(0, len(offsets), 12))
+    code += "\n};\n\n"
+    code += c_array(f"{name}_bits", packed, comment="Linhas dos caracteres em sequência, bit 0 primeiro",
+                    storage='static const uint8_t')
+    code += "\n"
+    code += _C_DRAW.format(name=name, upper=upper, offset_type=offset_type, offset_read=offset_read)
+    return code, stats
+
+def self_test():
+    """Confere composição pelo cache, recorte, ida e volta da fonte compacta e o tempo de digitação"""
+    import time
+    ok = True
+    clear_cache()
+
+    text = "Temp: 23.5C"
+    grid = render_text(text, 'simplex', 10)
+    if grid.shape[0] != 10 or not grid.any() or set(np.unique(grid).tolist()) - {0, 1}:
+        ok = False
+        print("❌ render_text não gerou uma grade 0/1 de 10 linhas")
+    if cache_info().misses != len(set(text)):
+        ok = False
+        print(f"❌ Cache: {cache_info().misses} glifos desenhados para {len(set(text))} caracteres distintos")
+    widths = sum(render_glyph(char, 'simplex', 10).shape[1] for char in text)
+    if grid.shape[1] != widths or cache_info().misses != len(set(text)):
+        ok = False
+        print("❌ A frase não é a soma das células em cache dos caracteres")
+    if not np.array_equal(render_glyph('ç', 'simplex', 10), render_glyph('?', 'simplex', 10)):
+        ok = False
+        print("❌ Caractere fora do ASCII deveria sair como '?'")
+
+    # Carimbo recortado nas bordas
+    canvas = np.zeros((8, 12), dtype=np.uint8)
+    text_grid = stamp_text(canvas, "AB", -2, 5, 3, height=10)
+    if not np.array_equal(canvas[:, 5:] != 0, text_grid[2:, :7] != 0) or canvas[:, :5].any():
+        ok = False
+        print("❌ stamp_text não recortou o texto nas bordas")
+
+    # Fonte compacta: cada glifo volta igual
+    for font in ('simplex', 'plain'):
+        for height, thickness in ((8, 1), (16, 2)):
+            glyphs = font_glyphs(font, height, thickness)
+            widths, offsets, packed = pack_font(glyphs)
+            for glyph, width, offset in zip(glyphs, widths, offsets):
+                if not np.array_equal(unpack_glyph(packed, offset, width, height), glyph):
+                    ok = False
+                    print(f"❌ Fonte {font} {height}px: glifo não confere")
+                    break
+
+    # Digitação: uma frase com glifos já em cache
+    start = time.perf_counter()
+    for i in range(200):
+        render_text(f"Temp: {i % 100}.5C", 'simplex', 16)
+    elapsed = (time.perf_counter() - start) / 200 * 1000
+    print(f"Frase de 11 caracteres a 16 px (cache quente): {elapsed:.3f} ms")
+    print("✅ Texto confere" if ok else "❌ Falha no texto")
+    return ok
+
+def main():
+    """
+    Função principal
+    """
+    args = sys.argv[1:]
+    if '--teste' in args:
+        sys.exit(0 if self_test() else 1)
+    if not args or (args[0].startswith('--') and '--fonte-completa' not in args):
+        print("📖 USO:")
+        print("python3 text_renderer.py \"<texto>\" [opções]")
+        print("python3 text_renderer.py --fonte-completa [opções]")
+        print("\n🔧 OPÇÕES:")
+        print(f"--fonte F        : Fonte Hershey ({', '.join(HERSHEY_FONTS) or 'requer OpenCV'}; padrão simplex)")
+        print(f"--altura N       : Altura da linha em pixels ({MIN_HEIGHT} a {MAX_HEIGHT}, padrão 8)")
+        print("--espessura N    : Espessura do traço (padrão 1)")
+        print("--espaco N       : Colunas em branco entre caracteres (padrão 0)")
+        print(f"--formato F      : Saída do texto ({', '.join(api.EMIT_FORMATS)} ou ascii; padrão c)")
+        print("--nome NOME      : Nome do array C")
+        print("--saida ARQ      : Arquivo de saída (padrão: tela)")
+        print("--fonte-completa : Exporta os caracteres ASCII 32-126 como fonte C compacta")
+        print("--teste          : Verifica cache, composição e fonte compacta")
+        print("\n📝 EXEMPLOS:")
+        print("python3 text_renderer.py \"12:34\" --altura 16 --nome relogio")
+        print("python3 text_renderer.py \"OK\" --formato ascii")
+        print("python3 text_renderer.py --fonte-completa --fonte plain --altura 10 --saida fonte10.h")
+        return
+
+    def option(flag, default, convert=str):
+        if flag in args:
+            return convert(args[args.index(flag) + 1])
+        return default
+
+    try:
+        font = option('--fonte', 'simplex')
+        height = option('--altura', 8, int)
+        thickness = option('--espessura', 1, int)
+        spacing = option('--espaco', 0, int)
+        fmt = option('--formato', 'c')
+        name = option('--nome', None)
+        output = option('--saida', None)
+    except (IndexError, ValueError):
+        print("❌ Erro: opções inválidas (ex: --altura 12 --espessura 1)")
+        return
+    if fmt not in api.EMIT_FORMATS + ('ascii',):
+        print(f"❌ Erro: --formato aceita {', '.join(api.EMIT_FORMATS)} e ascii")
+        return
+
+    try:
+        if '--fonte-completa' in args:
+            content, stats = font_c_code(font, height, thickness, name=name)
+            summary = (f"✅ {stats['glyphs']} caracteres: {stats['font_bytes']} bytes "
+                       f"(arrays separados: {stats['separate_bytes']} bytes)")
+        else:
+            grid = render_text(args[0].replace('\\n', '\n'), font, height, thickness, spacing)
+            if fmt == 'ascii':
+                content = '\n'.join(''.join('#' if v else '.' for v in row) for row in grid.tolist())
+            else:
+                content = api.emit(grid, fmt, name or 'texto')
+            summary = f"✅ Texto {grid.shape[1]}x{grid.shape[0]}"
+    except (ImportError, ValueError) as e:
+        print(f"❌ Erro: {e}")
+        return
+
+    if output is None:
+        print(content if isinstance(content, str) else content.decode('utf-8', 'replace'))
+        return
+    with open(output, 'wb') as f:
+        f.write(content.encode('utf-8') if isinstance(content, str) else content)
+    print(f"{summary} -> {output}")
+
+if __name__ == "__main__":
+    main()
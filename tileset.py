@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tileset 8x8 com Deduplicação
+Divide a grade em tiles 8x8 alinhados aos bytes de converte() (cada tile são
+8 bytes XBM, um por linha), grava cada tile distinto uma única vez e gera o
+mapa de tiles que reconstrói a tela. No dispositivo:
+
+    for (ty = 0; ty < NOME_MAP_ROWS; ty++)
+      for (tx = 0; tx < NOME_MAP_COLS; tx++)
+        u8g2.drawXBMP(tx * 8, ty * 8, 8, 8, nome_tiles[pgm_read_byte(&nome_map[ty * NOME_MAP_COLS + tx])]);
+
+Com mais de 256 tiles únicos o mapa passa a uint16_t e a leitura vira
+pgm_read_word; o comentário gerado no header já traz a leitura certa.
+
+Uso: python3 tileset.py --teste   (reconstrução da grade a partir do tileset)
+"""
+
+import sys
+
+import numpy as np
+
+from animation_export import index_type, pgm_read
+from bitmap_export import pack_xbm, c_identifier, format_c_bytes
+
+TILE_SIZE = 8
+
+def split_tiles(grid):
+    """
+    Bytes de cada tile 8x8, sem laços: os bytes XBM (altura completada até
+    múltiplo de 8) são reorganizados em (linhas de tiles, colunas de tiles, 8).
+    """
+    grid = np.asarray(grid) != 0
+    pad_rows = (-grid.shape[0]) % TILE_SIZE
+    if pad_rows:
+        grid = np.pad(grid, ((0, pad_rows), (0, 0)))
+    packed = pack_xbm(grid).reshape(grid.shape[0] // TILE_SIZE, TILE_SIZE, -1)
+    return np.ascontiguousarray(packed.transpose(0, 2, 1))
+
+def build_tileset(grid):
+    """
+    Deduplica os tiles da grade. Cada tile (8 bytes) é visto como um único uint64,
+    então a comparação é um np.unique sobre inteiros.
+    Retorna (tiles únicos (N x 8) na ordem em que aparecem, mapa (linhas x colunas)).
+    """
+    tiles = split_tiles(grid)
+    rows, cols = tiles.shape[:2]
+    keys = tiles.reshape(-1, TILE_SIZE).view(np.uint64).ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    # Renumerar na ordem da primeira ocorrência (mapa estável e legível)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    tilemap = rank[inverse.ravel()].reshape(rows, cols)
+    unique_tiles = tiles.reshape(-1, TILE_SIZE)[first[order]]
+    return unique_tiles, tilemap
+
+def render_tileset(unique_tiles, tilemap, width, height):
+    """Reconstrói a grade (uint8, 1 = preto) a partir do tileset e do mapa"""
+    tiles = unique_tiles[tilemap]  # (linhas, colunas, 8 bytes)
+    bits = np.unpackbits(tiles[..., None], axis=-1, bitorder='little')  # (linhas, colunas, 8, 8)
+    grid = bits.transpose(0, 2, 1, 3).reshape(tilemap.shape[0] * TILE_SIZE, tilemap.shape[1] * TILE_SIZE)
+    return grid[:height, :width]
+
+def tileset_stats(tile_count, unique_count, width, height):
+    """Flash do tileset + mapa comparada com o XBM bruto"""
+    map_entry = 1 if unique_count <= 256 else 2
+    raw = height * ((width + 7) // 8)
+    used = unique_count * TILE_SIZE + tile_count * map_entry
+    return {
+        'tiles': tile_count,
+        'unique': unique_count,
+        'raw_bytes': raw,
+        'flash_bytes': used,
+        'saved_bytes': raw - used,
+    }
+
+def tileset_c_code(grid, name='tela'):
+    """Header C com o tileset deduplicado, o mapa de tiles e o uso de flash. Retorna (código, stats)"""
+    grid = np.asarray(grid)
+    height, width = grid.shape
+    unique_tiles, tilemap = build_tileset(grid)
+    stats = tileset_stats(tilemap.size, len(unique_tiles), width, height)
+    name = c_identifier(name)
+    upper = name.upper()
+    map_type, _ = index_type(stats['unique'])
+
+    code = f"// Tela {width}x{height} em tiles 8x8 deduplicados (u8g2.drawXBMP por tile)\n"
+    code += f"// {stats['tiles']} tiles, {stats['unique']} únicos: {stats['flash_bytes']} bytes de flash "
+    code += f"(XBM bruto: {stats['raw_bytes']} bytes, economia de {stats['saved_bytes']} bytes)\n"
+    code += "#include <stdint.h>\n\n"
+    code += f"#define {upper}_WIDTH {width}\n"
+    code += f"#define {upper}_HEIGHT {height}\n"
+    code += f"#define {upper}_MAP_COLS {tilemap.shape[1]}\n"
+    code += f"#define {upper}_MAP_ROWS {tilemap.shape[0]}\n"
+    code += f"#define {upper}_TILE_COUNT {stats['unique']}\n\n"
+    code += f"static const unsigned char {name}_tiles[][8] PROGMEM = {{\n"
+    for i, tile in enumerate(unique_tiles):
+        code += f"  {{{format_c_bytes(tile, indent='').strip()}}},  // Tile {i}\n"
+    code += "};\n\n"
+    code += f"// Tile (tx, ty): {name}_tiles[{pgm_read(map_type)}(&{name}_map[ty * {upper}_MAP_COLS + tx])]\n"
+    code += f"static const {map_type} {name}_map[] PROGMEM = {{\n"
+    code += ',\n'.join('  ' + ', '.join(str(i) for i in row) for row in tilemap.tolist())
+    code += "\n};\n"
+    return code, stats
+
+def self_test():
+    """Reconstrói grades de teste a partir do tileset e compara com a original"""
+    rng = np.random.default_rng(0)
+    screen = np.zeros((64, 128), dtype=np.uint8)
+    screen[:8, :] = 1
+    screen[:, :8] = 1
+    screen[24:40, 32:96] = (np.indices((16, 64)).sum(axis=0) % 2)
+    grids = {
+        'tela 128x64': screen,
+        'ruído 20x31': (rng.random((31, 20)) < 0.5).astype(np.uint8),
+        'vazia 13x5': np.zeros((5, 13), dtype=np.uint8),
+    }
+    ok = True
+    for label, grid in grids.items():
+        unique_tiles, tilemap = build_tileset(grid)
+        if not np.array_equal(render_tileset(unique_tiles, tilemap, *grid.shape[::-1]), grid):
+            ok = False
+            print(f"❌ {label}: reconstrução não confere")
+            continue
+        stats = tileset_stats(tilemap.size, len(unique_tiles), grid.shape[1], grid.shape[0])
+        print(f"{label:<14} {stats['tiles']:>4} tiles, {stats['unique']:>4} únicos: "
+              f"{stats['flash_bytes']:>5} bytes (XBM: {stats['raw_bytes']})")
+    print("✅ Tilesets conferem" if ok else "❌ Falha nos tilesets")
+    return ok
+
+if __name__ == "__main__":
+    if '--teste' in sys.argv:
+        sys.exit(0 if self_test() else 1)
+    print("📖 USO:")
+    print("python3 tileset.py --teste  : Verifica a reconstrução das grades a partir do tileset")